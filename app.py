@@ -1,33 +1,114 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, g, send_from_directory, abort
+from markupsafe import Markup
 import functools
 import os
 import mysql.connector
 from config import Config
+from db_pool import ConnectionPool, PooledConnection, PoolExhausted
+from availability import AvailabilityCache, build_slot_views, to_time
+from occupancy import OccupancyMap
+from versions import ResourceVersions
+from reference_cache import ReferenceCache
+from page_cache import PageCache
+import slot_schedule
+import stats
+import slot_locks
+import lock_reaper
 import datetime
+import glob
+import time
+import zlib
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.security import check_password_hash
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadTimeSignature
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from twilio.rest import Client
+import outbox
+import queries
+import changes
+import uploads
+import thumbnails
+import posters
+import assets
+import mimetypes
+import compression
+from fast_json import FastJSONProvider
+from live_events import AvailabilityHub
+import json
+import re
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = FastJSONProvider(app)
 
 # Ensure upload folders exist
 UPLOAD_FOLDER = os.path.join(app.root_path, 'static', 'uploads')
 PAYMENT_UPLOAD_FOLDER = os.path.join(app.root_path, 'static', 'uploads', 'payment_proofs')
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['PAYMENT_UPLOAD_FOLDER'] = PAYMENT_UPLOAD_FOLDER
+# Hard cap on any request body; Werkzeug answers 413 before the view reads it
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_REQUEST_BYTES
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+poster_manifest = posters.Manifest()
+
+def poster_srcset(filename, fmt):
+    return poster_manifest.srcset(filename, fmt, url_for('static', filename='tournament_images/' + posters.VARIANT_DIR))
+
+def poster_fallback(filename):
+    return poster_manifest.fallback_src(filename, url_for('static', filename='tournament_images/' + posters.VARIANT_DIR))
+
+app.jinja_env.globals.update(poster_srcset=poster_srcset, poster_fallback=poster_fallback)
+
+# CSS/JS are linked by content hash (asset_url) and served precompressed
+asset_manifest = assets.build(app.static_folder) if Config.ASSET_FINGERPRINTS else {}
+hashed_assets = set(asset_manifest.values())
+
+def asset_url(filename):
+    return url_for('static', filename=asset_manifest.get(filename, filename))
+
+app.jinja_env.globals.update(asset_url=asset_url)
+
+send_static_file = app.view_functions['static']
+
+def static_file(filename):
+    """Flask's static view, except that hashed assets get their brotli/gzip copy and a one-year cache."""
+    if filename not in hashed_assets:
+        return send_static_file(filename=filename)
+    name, encoding = assets.precompressed(app.static_folder, filename, request.accept_encodings)
+    response = send_from_directory(app.static_folder, name, mimetype=mimetypes.guess_type(filename)[0])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+app.view_functions['static'] = static_file
+
+# Static files whose name changes with their content may be cached forever
+IMMUTABLE_STATIC = re.compile(r'^/static/tournament_images/v/[0-9a-f]{16}-\d+\.(webp|jpg)$')
+
+@app.after_request
+def immutable_static(response):
+    if response.status_code == 200 and IMMUTABLE_STATIC.match(request.path):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@app.after_request
+def compress(response):
+    if Config.COMPRESSION_ENABLED:
+        compression.compress_response(response, request.accept_encodings, Config.COMPRESS_MIN_BYTES,
+                                      Config.COMPRESS_GZIP_LEVEL, Config.COMPRESS_BROTLI_QUALITY)
+    return response
+
+@app.errorhandler(413)
+def request_too_large(e):
+    message = f"Upload too large. Max {Config.MAX_REQUEST_BYTES / (1024 * 1024):.0f}MB per request."
+    if request.path.startswith('/api/'):
+        return jsonify({"error": message}), 413
+    return message, 413
 
 
 from flask import make_response
@@ -42,6 +123,120 @@ def no_cache(view):
         return response
     return wrapped_view
 
+def release_tag():
+    """Changes when templates, code or CSS/JS are deployed, so cached pages from the old release revalidate."""
+    files = sorted(glob.glob(os.path.join(app.root_path, '*.py')) + glob.glob(os.path.join(app.root_path, 'templates', '*.html'))
+                   + [os.path.join(app.static_folder, f) for f in assets.sources(app.static_folder)])
+    return '%x' % zlib.crc32(repr([(os.path.basename(f), int(os.path.getmtime(f))) for f in files]).encode())
+
+RELEASE_TAG = release_tag()
+
+def conditional(validator):
+    """
+    Conditional GET for a view whose state is versioned outside the database.
+    validator() returns (etag, last_modified or None), or None when there is
+    no version (the view then just runs). A matching If-None-Match (or
+    If-Modified-Since) gets a 304 before the view runs, so no SQL is executed.
+    Pages rendered while the database was unavailable (g.no_page_cache) get
+    no validators, so browsers don't keep revalidating an empty copy. An
+    encoded body (the page cache's gzip copy) gets a weak ETag, as
+    compression.compress_response gives its output.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped_view(**kwargs):
+            current = validator()
+            # Pages carrying a flash message are one-offs
+            if current is None or '_flashes' in session:
+                return view(**kwargs)
+            etag, last_modified = current
+            etag = f"{etag}-{RELEASE_TAG}"
+            # Last-Modified has one-second resolution: only send it once that second is over
+            if last_modified and int(last_modified) >= int(time.time()):
+                last_modified = None
+
+            if request.if_none_match:
+                fresh = request.if_none_match.contains_weak(etag)
+            else:
+                fresh = bool(last_modified and request.if_modified_since
+                             and int(last_modified) <= request.if_modified_since.timestamp())
+            if fresh:
+                response = app.response_class(status=304)
+                # Same form as the 200 it stands for: weak when that body is gzipped
+                if request.if_none_match:
+                    weak = not request.if_none_match.contains(etag)
+                else:
+                    weak = 'gzip' in request.accept_encodings
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+                if g.get('no_page_cache'):
+                    response.headers['Cache-Control'] = 'no-cache'
+                    return response
+                # The page cache's gzip body is a different representation of the same page
+                weak = 'Content-Encoding' in response.headers
+            response.set_etag(etag, weak=weak)
+            if last_modified:
+                response.last_modified = int(last_modified)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapped_view
+    return decorator
+
+def table_version(name):
+    return lambda: resource_versions.etag(name)
+
+def static_page():
+    """Validator for pages that only change with a release."""
+    return 'page', None
+
+def cached_page(*tables):
+    """
+    Serve a public GET page from the rendered-page cache. The key includes
+    the shared versions of `tables`, so an admin edit to them (or a deploy)
+    is picked up without purging anything. Responses carrying a flash
+    message or a session change, and pages rendered while the database was
+    unavailable (g.no_page_cache), are not cached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped_view(**kwargs):
+            if not page_cache.enabled or '_flashes' in session:
+                return view(**kwargs)
+            key = (request.endpoint, request.query_string,
+                   tuple(resource_versions.get(t)[0] for t in tables), RELEASE_TAG)
+            page = page_cache.get(key)
+            if page is None:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200 or session.modified or g.get('no_page_cache'):
+                    return response
+                page = page_cache.put(key, response.get_data(), response.mimetype)
+
+            if 'gzip' in request.accept_encodings:
+                response = app.response_class(page.gzip_body, mimetype=page.mimetype)
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = app.response_class(page.body, mimetype=page.mimetype)
+            response.vary.add('Accept-Encoding')
+            return response
+        return wrapped_view
+    return decorator
+
+def slots_version():
+    """Validator for the per-date slot APIs, from the shared occupancy map."""
+    date_str = request.args.get('date')
+    if not date_str:
+        return None
+    now = datetime.datetime.now()
+    stamp = occupancy.stamp(date_str, now.timestamp())
+    if stamp is None:
+        return None
+    if date_str == now.date().isoformat():
+        # Today's slots turn "past" on the half-hour grid
+        stamp += f"-p{(now.hour * 60 + now.minute) // 30}"
+    return f"slots-{stamp}", None
+
 def admin_required(view):
     @functools.wraps(view)
     def wrapped_view(**kwargs):
@@ -50,250 +245,236 @@ def admin_required(view):
         return view(**kwargs)
     return wrapped_view
 
-def get_db_connection():
-    try:
-        conn = mysql.connector.connect(
+_db_pool = None
+
+def get_db_pool():
+    """Return this process's connection pool, creating it after a gunicorn fork."""
+    global _db_pool
+    if _db_pool is None or _db_pool.pid != os.getpid():
+        _db_pool = ConnectionPool(
+            size=Config.MYSQL_POOL_SIZE,
+            timeout=Config.MYSQL_POOL_TIMEOUT,
+            ping_after=Config.MYSQL_POOL_PING_AFTER,
             host=Config.MYSQL_HOST,
             user=Config.MYSQL_USER,
             password=Config.MYSQL_PASSWORD,
             database=Config.MYSQL_DB
         )
-        # Fix for Error 1055 (ONLY_FULL_GROUP_BY) - Allow non-aggregated columns
-        cursor = conn.cursor()
-        cursor.execute("SET SESSION sql_mode=(SELECT REPLACE(@@sql_mode,'ONLY_FULL_GROUP_BY',''))")
-        cursor.close()
-        return conn
-    except mysql.connector.Error as err:
-        print(f"Database Error: {err}")
-        return None
-
-# --- Notification Functions ---
-
-
-def send_email_core(to_email, subject, body):
-    """
-    Reusable secure email sending function.
-    """
-    try:
-        sender_email = os.environ.get('MAIL_USERNAME') or Config.MAIL_USERNAME
-        sender_password = os.environ.get('MAIL_PASSWORD') or Config.MAIL_PASSWORD
-        
-        if not sender_email or not sender_password:
-             print(f"Email Failed to {to_email}: Missing Credentials")
-             return False
-
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body, 'plain'))
+    return _db_pool
 
-        # Secure connection with TLS
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.send_message(msg)
-        server.quit()
-        print(f"Email sent successfully to {to_email}")
-        return True
+def get_db_connection():
+    """Return the connection for the current request, checking one out of the pool on first use."""
+    if 'db_conn' not in g:
+        try:
+            g.db_conn = PooledConnection(get_db_pool().acquire())
+        except (mysql.connector.Error, PoolExhausted) as err:
+            print(f"Database Error: {err}")
+            return None
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        get_db_pool().release(conn.raw)
 
-    except Exception as e:
-        print(f"Email Failed to {to_email}: {e}")
-        return False
+# --- Notification Functions ---
+# These queue messages in notification_outbox on the caller's transaction;
+# notification_worker.py delivers them after the transaction commits.
 
-def send_notification_email(booking_details):
+def queue_admin_booking_email(cursor, booking_details):
     """
     1. ADMIN EMAIL NOTIFICATION (ON USER BOOKING)
     """
-    try:
-        admin_email = os.environ.get('MAIL_USERNAME') or Config.MAIL_USERNAME # Send to self/admin
-        
-        subject = "New Ground Slot Booking Received"
-        
-        body = f"""
-        New Ground Slot Booking Received
-        
-        User Details:
-        Name: {booking_details['name']}
-        Phone: {booking_details['phone']}
-        Email: {booking_details['email']}
-        
-        Booking Details:
-        Date: {booking_details['date']}
-        Slot Time: {booking_details['start_time']} - {booking_details.get('end_time', 'N/A')}
-        Amount Paid: ₹{booking_details['paid_amount']}
-        Booking Status: PENDING
-        
-        Please login to the admin dashboard to verify and confirm this booking.
-        """
-        
-        send_email_core(admin_email, subject, body)
-
-    except Exception as e:
-        print(f"Admin Notification Wrapper Failed: {e}")
+    admin_email = os.environ.get('MAIL_USERNAME') or Config.MAIL_USERNAME # Send to self/admin
+    if not admin_email:
+        print("Admin Notification Skipped: Missing MAIL_USERNAME")
+        return
 
-
-def send_whatsapp_core(to_number, body):
-    """
-    Reusable Twilio WhatsApp sending function.
+    subject = "New Ground Slot Booking Received"
+    
+    body = f"""
+    New Ground Slot Booking Received
+    
+    User Details:
+    Name: {booking_details['name']}
+    Phone: {booking_details['phone']}
+    Email: {booking_details['email']}
+    
+    Booking Details:
+    Date: {booking_details['date']}
+    Slot Time: {booking_details['start_time']} - {booking_details.get('end_time', 'N/A')}
+    Amount Paid: ₹{booking_details['paid_amount']}
+    Booking Status: PENDING
+    
+    Please login to the admin dashboard to verify and confirm this booking.
     """
-    try:
-        sid = os.environ.get('TWILIO_SID') or Config.TWILIO_SID
-        token = os.environ.get('TWILIO_AUTH_TOKEN') or Config.TWILIO_AUTH_TOKEN
-        wa_from = os.environ.get('TWILIO_WHATSAPP_NUM') or Config.TWILIO_WHATSAPP_NUM
-        
-        if not all([sid, token, wa_from, to_number]):
-            print(f"WhatsApp Failed to {to_number}: Missing Credentials or Number")
-            return False
-
-        client = Client(sid, token)
-        
-        message = client.messages.create(
-            from_=wa_from,
-            body=body,
-            to=to_number
-        )
-        print(f"WhatsApp sent to {to_number}: {message.sid}")
-        return True
+    
+    outbox.enqueue(cursor, 'email', admin_email, body, subject)
 
-    except Exception as e:
-        print(f"WhatsApp Failed to {to_number}: {e}")
-        return False
 
-def send_whatsapp_notification(booking_details):
+def queue_admin_booking_whatsapp(cursor, booking_details):
     """
     1. ADMIN WHATSAPP NOTIFICATION (ON USER BOOKING)
     """
-    try:
-        admin_phone = os.environ.get('ADMIN_PHONE') or Config.ADMIN_PHONE 
-        
-        message_body = (
-            f"🏏 *New Booking Received!*\n\n"
-            f"👤 *Name:* {booking_details['name']}\n"
-            f"📞 *Phone:* {booking_details['phone']}\n"
-            f"📅 *Date:* {booking_details['date']}\n"
-            f"⏰ *Time:* {booking_details['start_time']} - {booking_details.get('end_time', 'N/A')}\n"
-            f"💰 *Paid:* ₹{booking_details['paid_amount']}\n\n"
-            f"Please verify in Admin Panel."
-        )
-
-        send_whatsapp_core(admin_phone, message_body)
-
-    except Exception as e:
-        print(f"Admin WhatsApp Wrapper Failed: {e}")
-
-def send_user_whatsapp_confirmation(user_phone, booking_details):
+    admin_phone = os.environ.get('ADMIN_PHONE') or Config.ADMIN_PHONE 
+    if not admin_phone:
+        print("Admin WhatsApp Skipped: Missing ADMIN_PHONE")
+        return
+
+    message_body = (
+        f"🏏 *New Booking Received!*\n\n"
+        f"👤 *Name:* {booking_details['name']}\n"
+        f"📞 *Phone:* {booking_details['phone']}\n"
+        f"📅 *Date:* {booking_details['date']}\n"
+        f"⏰ *Time:* {booking_details['start_time']} - {booking_details.get('end_time', 'N/A')}\n"
+        f"💰 *Paid:* ₹{booking_details['paid_amount']}\n\n"
+        f"Please verify in Admin Panel."
+    )
+
+    outbox.enqueue(cursor, 'whatsapp', admin_phone, message_body)
+
+def queue_user_whatsapp_confirmation(cursor, user_phone, booking_details):
     """
     2. USER WHATSAPP NOTIFICATION (ON ADMIN CONFIRMATION)
     """
-    try:
-        # Ensure user phone works with Twilio (needs whatsapp: prefix if not present)
-        # Assuming user_phone is just digits (e.g., 9876543210) or +91...
-        # Twilio requires 'whatsapp:+919876543210'
-        
-        formatted_phone = user_phone
-        if not user_phone.startswith('whatsapp:'):
-             # basic cleanup
-             clean_phone = user_phone.replace(' ', '').replace('-', '')
-             if not clean_phone.startswith('+'):
-                 clean_phone = f"+91{clean_phone}" # Default to India if no code? Or just assume provided
-             formatted_phone = f"whatsapp:{clean_phone}"
-        
-        ground_name = "D MAX SPORTS CLUB"
-        maps_link = "https://www.google.com/maps?q=D+MAX+SPORTS+CLUB+Hubballi"
-        
-        message_body = (
-            f"✅ *Booking Confirmed!*\n\n"
-            f"Hey {booking_details.get('name', 'Player')}, your slot is locked! 🏏\n\n"
-            f"📅 *Date:* {booking_details.get('date')}\n"
-            f"⏰ *Time:* {booking_details.get('start_time')}\n\n"
-            f"📍 *Location:* {ground_name}\n"
-            f"🗺️ *Map:* {maps_link}\n\n"
-            f"Please reach 15 mins early. Enjoy your game!"
-        )
-        
-        send_whatsapp_core(formatted_phone, message_body)
+    if not user_phone:
+        print("User WhatsApp Skipped: No phone on the booking")
+        return
 
-    except Exception as e:
-        print(f"User WhatsApp Wrapper Failed: {e}")
+    # Ensure user phone works with Twilio (needs whatsapp: prefix if not present)
+    # Assuming user_phone is just digits (e.g., 9876543210) or +91...
+    # Twilio requires 'whatsapp:+919876543210'
+    
+    formatted_phone = user_phone
+    if not user_phone.startswith('whatsapp:'):
+         # basic cleanup
+         clean_phone = user_phone.replace(' ', '').replace('-', '')
+         if not clean_phone.startswith('+'):
+             clean_phone = f"+91{clean_phone}" # Default to India if no code? Or just assume provided
+         formatted_phone = f"whatsapp:{clean_phone}"
+    
+    ground_name = "D MAX SPORTS CLUB"
+    maps_link = "https://www.google.com/maps?q=D+MAX+SPORTS+CLUB+Hubballi"
+    
+    message_body = (
+        f"✅ *Booking Confirmed!*\n\n"
+        f"Hey {booking_details.get('name', 'Player')}, your slot is locked! 🏏\n\n"
+        f"📅 *Date:* {booking_details.get('date')}\n"
+        f"⏰ *Time:* {booking_details.get('start_time')}\n\n"
+        f"📍 *Location:* {ground_name}\n"
+        f"🗺️ *Map:* {maps_link}\n\n"
+        f"Please reach 15 mins early. Enjoy your game!"
+    )
+    
+    outbox.enqueue(cursor, 'whatsapp', formatted_phone, message_body)
 
 
-def send_user_confirmation_email(user_email, booking_details):
+def queue_user_confirmation_email(cursor, user_email, booking_details):
     """
     2. USER EMAIL NOTIFICATION (ON ADMIN CONFIRMATION)
     """
-    try:
-        subject = "Your Ground Slot Booking is Confirmed"
-        
-        ground_name = "D MAX SPORTS CLUB"
-        address = "Gudihal road, near vani plot, Devaragudihal, Hubballi, Karnataka 580024"
-        maps_link = "https://www.google.com/maps?q=D+MAX+SPORTS+CLUB+Hubballi"
-        
-        body = f"""
-        Booking Confirmation
-        
-        Dear {booking_details.get('name', 'Player')},
-        
-        Your booking has been successfully confirmed!
-        
-        Booking Details:
-        Date: {booking_details.get('date')}
-        Slot Time: {booking_details.get('start_time')}
-        
-        Ground Location:
-        Ground Name: {ground_name}
-        Address: {address}
-        Google Maps: {maps_link}
-        
-        Instructions:
-        - Please reach 15 minutes before your slot time.
-        - Bring a valid ID proof.
-        - Have a great game!
-        
-        Regards,
-        {ground_name} Team
-        """
-        
-        send_email_core(user_email, subject, body)
+    if not user_email:
+        print("User Confirmation Skipped: No email on the booking")
+        return
 
-    except Exception as e:
-        print(f"User Confirmation Wrapper Failed: {e}")
+    subject = "Your Ground Slot Booking is Confirmed"
+    
+    ground_name = "D MAX SPORTS CLUB"
+    address = "Gudihal road, near vani plot, Devaragudihal, Hubballi, Karnataka 580024"
+    maps_link = "https://www.google.com/maps?q=D+MAX+SPORTS+CLUB+Hubballi"
+    
+    body = f"""
+    Booking Confirmation
+    
+    Dear {booking_details.get('name', 'Player')},
+    
+    Your booking has been successfully confirmed!
+    
+    Booking Details:
+    Date: {booking_details.get('date')}
+    Slot Time: {booking_details.get('start_time')}
+    
+    Ground Location:
+    Ground Name: {ground_name}
+    Address: {address}
+    Google Maps: {maps_link}
+    
+    Instructions:
+    - Please reach 15 minutes before your slot time.
+    - Bring a valid ID proof.
+    - Have a great game!
+    
+    Regards,
+    {ground_name} Team
+    """
+    
+    outbox.enqueue(cursor, 'email', user_email, body, subject)
 
 
 # --- Routes for Pages ---
 
 @app.route('/')
+@conditional(static_page)
+@cached_page()
 def home():
     return render_template('index.html')
 
 @app.route('/booking')
+@conditional(static_page)
+@cached_page()
 def booking():
     return render_template('booking.html')
 
+def load_reference_rows(query):
+    """Run a reference-table query for the cache; None (not cached) if the DB is unavailable."""
+    conn = get_db_connection()
+    if not conn:
+        g.no_page_cache = True
+        return None
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(query)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return rows
+
+def active_pricing():
+    return reference_cache.get('pricing', 'active', lambda: load_reference_rows(
+        "SELECT * FROM pricing WHERE is_active = TRUE")) or []
+
+def all_tournaments():
+    return reference_cache.get('tournaments', 'all', lambda: load_reference_rows(
+        "SELECT * FROM tournaments ORDER BY event_date ASC")) or []
+
+def tournaments_json():
+    """The tournament list encoded once per version, or None without a DB."""
+    def encode():
+        rows = reference_cache.get('tournaments', 'all', lambda: load_reference_rows(
+            "SELECT * FROM tournaments ORDER BY event_date ASC"))
+        return None if rows is None else app.json.encode(rows)
+    return reference_cache.get('tournaments', 'json', encode)
+
+def tournament_grid():
+    """Rendered tournament cards (fragment cache, versioned with the tournaments table), or None without a DB."""
+    def render():
+        rows = reference_cache.get('tournaments', 'all', lambda: load_reference_rows(
+            "SELECT * FROM tournaments ORDER BY event_date ASC"))
+        return None if rows is None else render_template('_tournament_grid.html', tournaments=rows)
+    html = reference_cache.get('tournaments', 'grid', render)
+    return Markup(html) if html is not None else None
+
 @app.route('/pricing')
+@conditional(table_version('pricing'))
+@cached_page('pricing')
 def pricing():
-    conn = get_db_connection()
-    pricing_items = []
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM pricing WHERE is_active = TRUE")
-        pricing_items = cursor.fetchall()
-        cursor.close()
-        conn.close()
-    return render_template('pricing.html', pricing=pricing_items)
+    return render_template('pricing.html', pricing=active_pricing())
 
 @app.route('/tournaments')
+@conditional(table_version('tournaments'))
+@cached_page('tournaments')
 def tournaments():
-    conn = get_db_connection()
-    tournaments = []
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM tournaments ORDER BY event_date ASC")
-        tournaments = cursor.fetchall()
-        cursor.close()
-        conn.close()
-    return render_template('tournaments.html', tournaments=tournaments)
+    return render_template('tournaments.html', grid=tournament_grid())
 
 @app.route('/contact', methods=['GET', 'POST'])
 def contact():
@@ -310,6 +491,7 @@ def contact():
         if conn:
             cursor = conn.cursor()
             cursor.execute('INSERT INTO contact_messages (name, email, message) VALUES (%s, %s, %s)', (name, email, message))
+            changes.record(cursor, 'contact_message', cursor.lastrowid)
             conn.commit()
             cursor.close()
             conn.close()
@@ -350,63 +532,149 @@ def admin_login():
             
     return render_template('admin_login.html')
 
+BOOKINGS_PAGE_SIZE = 50
+
+TOURNAMENT_SUMMARY_SELECT = """
+    SELECT t.*, COUNT(tr.id) as registration_count
+    FROM tournaments t
+    LEFT JOIN tournament_registrations tr ON t.id = tr.tournament_id
+"""
+
+def parse_booking_cursor(value):
+    """'YYYY-MM-DD:id' -> (date, id); None if missing or malformed."""
+    try:
+        date_str, group_id = (value or '').split(':')
+        return datetime.date.fromisoformat(date_str), int(group_id)
+    except ValueError:
+        return None
+
+def fetch_booking_page(cursor, status=None, date_from=None, date_to=None, customer=None, after=None, limit=BOOKINGS_PAGE_SIZE):
+    """
+    One page of booking groups, newest first.
+
+    Pages are keyed on (booking_date, id), walking the booking_groups date
+    index, so a page costs the same however many bookings come before it.
+    Returns (groups, next_cursor); next_cursor is None on the last page.
+    """
+    where = []
+    params = []
+    if after:
+        where.append(queries.BOOKING_PAGE_AFTER)
+        params += [after[0], after[0], after[1]]
+    if status:
+        where.append("g.booking_status = %s")
+        params.append(status)
+    if date_from:
+        where.append("g.booking_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("g.booking_date <= %s")
+        params.append(date_to)
+    if customer:
+        where.append("g.user_id IN (SELECT id FROM users WHERE phone = %s OR name LIKE %s OR email LIKE %s)")
+        params += [customer, customer + '%', customer + '%']
+
+    cursor.execute(queries.BOOKING_PAGE.format(where=' AND '.join(where) if where else 'TRUE'), params + [limit + 1])
+    groups = cursor.fetchall()
+    next_cursor = None
+    if len(groups) > limit:
+        groups = groups[:limit]
+        next_cursor = f"{groups[-1]['booking_date'].isoformat()}:{groups[-1]['id']}"
+    return groups, next_cursor
+
+def booking_json(b):
+    """JSON shape of a booking group for the admin dashboard."""
+    start_t = to_time(b['slot_start'])
+    end_t = to_time(b['slot_end'])
+    return {
+        'id': b['id'],
+        'booking_date': b['booking_date'].isoformat(),
+        'start_time': start_t.strftime('%H:%M') if start_t else None,
+        'end_time': end_t.strftime('%H:%M') if end_t else None,
+        'customer_name': b['customer_name'],
+        'customer_phone': b['customer_phone'],
+        'customer_email': b['customer_email'],
+        'duration_hours': b['duration_hours'],
+        'total_price': float(b['total_price'] or 0),
+        'paid_amount': float(b['paid_amount'] or 0),
+        'status': b['status'],
+        'payment_status': b['payment_status'],
+        'payment_image': b['payment_image'],
+        'payment_url': url_for('static', filename='uploads/payment_proofs/' + b['payment_image']) if b['payment_image'] else None,
+        'payment_thumb_url': url_for('payment_proof_thumb', filename=b['payment_image']) if b['payment_image'] else None
+    }
+
+@app.route('/admin/proofs/<filename>/thumb')
+@admin_required
+def payment_proof_thumb(filename):
+    """Thumbnail of a payment screenshot, made now if thumbnail_worker.py hasn't yet; the full image without Pillow."""
+    folder = app.config['PAYMENT_UPLOAD_FOLDER']
+    if secure_filename(filename) != filename or not os.path.isfile(os.path.join(folder, filename)):
+        abort(404)
+    if not thumbnails.available():
+        return redirect(url_for('static', filename='uploads/payment_proofs/' + filename))
+    if not os.path.exists(thumbnails.thumb_path(folder, filename)):
+        if thumbnails.make_thumbnail(folder, filename, Config.THUMBNAIL_SIZE, Config.THUMBNAIL_QUALITY) is None:
+            return redirect(url_for('static', filename='uploads/payment_proofs/' + filename))
+    # Screenshot names are unique (content hash or upload timestamp), so the thumbnail never changes
+    response = send_from_directory(os.path.join(folder, thumbnails.THUMB_DIR), thumbnails.thumb_name(filename),
+                                   max_age=30 * 86400)
+    response.headers['Cache-Control'] = 'private, max-age=2592000, immutable'
+    return response
+
+@app.route('/admin/api/bookings')
+@admin_required
+@no_cache
+def admin_api_bookings():
+    """Keyset-paginated booking requests: ?status=&from=&to=&customer=&cursor=&limit="""
+    after = None
+    if request.args.get('cursor'):
+        after = parse_booking_cursor(request.args['cursor'])
+        if after is None:
+            return jsonify({"error": "Invalid cursor"}), 400
+    status = request.args.get('status') or None
+    if status and status not in ('pending', 'confirmed', 'rejected'):
+        return jsonify({"error": "Invalid status"}), 400
+    try:
+        date_from = datetime.date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = datetime.date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+    limit = min(max(request.args.get('limit', BOOKINGS_PAGE_SIZE, type=int), 1), 200)
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({"error": "Database error"}), 500
+    cursor = conn.cursor(dictionary=True)
+    try:
+        bookings, next_cursor = fetch_booking_page(
+            cursor, status=status, date_from=date_from, date_to=date_to,
+            customer=(request.args.get('customer') or '').strip() or None,
+            after=after, limit=limit
+        )
+    finally:
+        cursor.close()
+    return jsonify({"bookings": [booking_json(b) for b in bookings], "next_cursor": next_cursor})
+
 @app.route('/admin/dashboard')
 @admin_required
 @no_cache
 def admin_dashboard():
     conn = get_db_connection()
-    bookings = []
+    pending_count = 0
     tournaments = []
+    contact_messages = []
+    changes_version = 0
     if conn:
         cursor = conn.cursor(dictionary=True)
-        # Fetch Bookings with Slot Info
-        # Note: We join on left in case slot was deleted (though we try to soft delete)
-        query = """
-            SELECT MIN(b.id) as id,
-                   b.booking_date,
-                   b.payment_proof as payment_image,
-                   b.booking_status as status,
-                   b.payment_status,
-                   COUNT(b.id) as duration_hours,
-                   SUM(b.total_price) as total_price,
-                   SUM(b.paid_amount) as paid_amount,
-                   MIN(s.start_time) as slot_start,
-                   MAX(s.end_time) as slot_end,
-                   u.name as customer_name, u.phone as customer_phone, u.email as customer_email
-            FROM bookings b 
-            LEFT JOIN slots s ON b.slot_id = s.id 
-            LEFT JOIN users u ON b.user_id = u.id
-            GROUP BY b.payment_proof, b.booking_date, b.user_id, b.booking_status, b.payment_status, u.name, u.phone, u.email
-            ORDER BY b.booking_date DESC, MIN(b.created_at) DESC
-        """
-        cursor.execute(query)
-        bookings = cursor.fetchall()
-        
-        for b in bookings:
-            # Format times for display
-            if b.get('slot_start'):
-                # Assuming timedelta or time object, convert to string
-                t = b['slot_start']
-                # Handle timedelta (mysql-connector sometimes returns these for TIME cols)
-                if isinstance(t, datetime.timedelta):
-                    total_seconds = int(t.total_seconds())
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    b['start_time'] = f"{hours:02}:{minutes:02}"
-                else:
-                     b['start_time'] = str(t)
-            
-            # Format created_at if exists
-            if b.get('created_at'):
-                b['created_at'] = b['created_at'].strftime('%Y-%m-%d %H:%M')
+        # Read first: anything committed while the page loads is re-sent by /admin/api/changes
+        changes_version = changes.latest(cursor)
+        # Bookings themselves are loaded page by page from /admin/api/bookings
+        cursor.execute(queries.PENDING_COUNT)
+        pending_count = cursor.fetchone()['pending']
 
         # Fetch Tournaments (with registration counts)
-        cursor.execute("""
-            SELECT t.*, COUNT(tr.id) as registration_count 
-            FROM tournaments t 
-            LEFT JOIN tournament_registrations tr ON t.id = tr.tournament_id 
-            GROUP BY t.id
-        """)
+        cursor.execute(TOURNAMENT_SUMMARY_SELECT + " GROUP BY t.id")
         tournaments = cursor.fetchall()
         # Fetch Contact Messages
         cursor.execute("SELECT * FROM contact_messages ORDER BY sent_at DESC LIMIT 10")
@@ -415,144 +683,359 @@ def admin_dashboard():
         cursor.close()
         conn.close()
         
-    return render_template('admin_dashboard.html', bookings=bookings, tournaments=tournaments, contact_messages=contact_messages)
+    return render_template('admin_dashboard.html', pending_count=pending_count, tournaments=tournaments,
+                           contact_messages=contact_messages, page_size=BOOKINGS_PAGE_SIZE,
+                           changes_version=changes_version, sync_seconds=Config.DASHBOARD_SYNC_SECONDS)
+
+def tournament_json(t):
+    return {
+        'id': t['id'],
+        'title': t['title'],
+        'event_date': t['event_date'].isoformat() if t['event_date'] else None,
+        'entry_fee': str(t['entry_fee']),
+        'registration_count': t['registration_count'],
+    }
+
+def contact_message_json(m):
+    return {
+        'id': m['id'],
+        'sent_at': str(m['sent_at']),
+        'name': m['name'],
+        'email': m['email'],
+        'message': m['message'],
+    }
+
+def in_clause(ids):
+    return ', '.join(['%s'] * len(ids))
+
+_change_log_pruned_at = 0.0
+
+@app.route('/admin/api/changes')
+@admin_required
+@no_cache
+def admin_api_changes():
+    """
+    Dashboard delta sync: booking groups, tournaments and contact messages
+    changed since ?since=<version>, re-read by primary key. Ids no longer
+    found are reported as deleted. reset=true means the client is too far
+    behind and should reload the page.
+    """
+    global _change_log_pruned_at
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({"error": "since must be a version number"}), 400
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({"error": "Database error"}), 500
+    cursor = conn.cursor(dictionary=True)
+    try:
+        changed, version = changes.since(cursor, since)
+        if changed is None:
+            return jsonify({"version": version, "reset": True})
+        result = {"version": version, "reset": False}
+
+        ids = sorted(changed['booking_group'])
+        if ids:
+            cursor.execute(f"{queries.BOOKING_GROUP_SELECT} WHERE g.id IN ({in_clause(ids)}) "
+                           "ORDER BY g.booking_date DESC, g.id DESC", ids)
+            rows = cursor.fetchall()
+            result['bookings'] = [booking_json(b) for b in rows]
+            result['deleted_bookings'] = sorted(set(ids) - {b['id'] for b in rows})
+            cursor.execute(queries.PENDING_COUNT)
+            result['pending_count'] = cursor.fetchone()['pending']
+
+        ids = sorted(changed['tournament'])
+        if ids:
+            cursor.execute(f"{TOURNAMENT_SUMMARY_SELECT} WHERE t.id IN ({in_clause(ids)}) GROUP BY t.id", ids)
+            rows = cursor.fetchall()
+            result['tournaments'] = [tournament_json(t) for t in rows]
+            result['deleted_tournaments'] = sorted(set(ids) - {t['id'] for t in rows})
+
+        ids = sorted(changed['contact_message'])
+        if ids:
+            cursor.execute(f"SELECT * FROM contact_messages WHERE id IN ({in_clause(ids)}) ORDER BY sent_at DESC", ids)
+            result['messages'] = [contact_message_json(m) for m in cursor.fetchall()]
+
+        # Keep the log short; once an hour per worker is plenty
+        if time.time() - _change_log_pruned_at > 3600:
+            _change_log_pruned_at = time.time()
+            changes.prune(cursor, Config.CHANGE_LOG_KEEP_DAYS)
+            conn.commit()
+        return jsonify(result)
+    finally:
+        cursor.close()
 
-@app.route('/admin/bookings/approve/<int:id>', methods=['POST'])
+def parse_date_arg(name, default):
+    try:
+        return datetime.date.fromisoformat(request.args.get(name, ''))
+    except ValueError:
+        return default
+
+@app.route('/admin/stats')
 @admin_required
 @no_cache
-def approve_booking(id):
+def admin_stats():
+    """Revenue and occupancy over a date range, read from the daily_stats rollup."""
+    today = datetime.date.today()
+    date_to = parse_date_arg('to', today)
+    date_from = parse_date_arg('from', date_to - datetime.timedelta(days=29))
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
+
+    report = None
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor(dictionary=True)
         try:
-            # 1. Fetch booking payment proof first
-            cursor.execute("SELECT payment_proof FROM bookings WHERE id = %s", (id,))
-            initial_booking = cursor.fetchone()
-            
-            if initial_booking:
-                payment_proof = initial_booking['payment_proof']
-                
-                # 2. Confirm ALL bookings with this payment proof
-                cursor.execute("UPDATE bookings SET booking_status = 'confirmed', payment_status = 'paid_verified' WHERE payment_proof = %s", (payment_proof,))
-                conn.commit()
-                
-                # 3. Send Email (Fetch one booking for details, assume consistent)
-                query = """
-                    SELECT b.*, u.name as customer_name, u.email as customer_email,
-                           MIN(s.start_time) as slot_start, MAX(s.end_time) as slot_end
-                    FROM bookings b
-                    JOIN users u ON b.user_id = u.id
-                    JOIN slots s ON b.slot_id = s.id
-                    WHERE b.payment_proof = %s
-                    GROUP BY b.payment_proof
-                """
-                cursor.execute(query, (payment_proof,))
-                booking = cursor.fetchone()
-
-                if booking:
-                    # Format time range
-                    start_t = booking['slot_start']
-                    if isinstance(start_t, datetime.timedelta):
-                        start_t = (datetime.datetime.min + start_t).time()
-                    
-                    end_t = booking['slot_end']
-                    if isinstance(end_t, datetime.timedelta):
-                        end_t = (datetime.datetime.min + end_t).time()
-
-                    time_display = f"{start_t.strftime('%H:%M')} - {end_t.strftime('%H:%M')}"
-                    
-                    details = {
-                        'name': booking['customer_name'],
-                        'date': booking['booking_date'],
-                        'start_time': time_display,
-                        'paid_amount': booking['paid_amount'] # Note: This might be sum? No, this query fetches 'b.*' which is arbitrary row. We should probably sum paid.
-                        # Actually 'b.*' with GROUP BY is non-standard but often works for first row in MySQL default mode.
-                        # Better to sustain existing simple logic or sum it properly.
-                        # Let's just use the logic from dashboard.
-                    }
-                    # Re-fetch sum
-                    cursor.execute("SELECT SUM(paid_amount) as total_paid FROM bookings WHERE payment_proof = %s", (payment_proof,))
-                    total = cursor.fetchone()
-                    details['paid_amount'] = total['total_paid']
-                    
-                    details['paid_amount'] = total['total_paid']
-                    
-                    # Send Notifications (Email + WhatsApp)
-                    try:
-                        send_user_confirmation_email(booking['customer_email'], details)
-                    except: pass
-                    
-                    try:
-                        send_user_whatsapp_confirmation(booking['customer_phone'], details)
-                    except: pass
-                    
-                    flash('Booking group approved and verified!')
-            else:
-                flash('Booking not found.')
-                
-        except Exception as e:
-            flash(f'Error: {e}')
+            report = stats.report(cursor, date_from, date_to)
         finally:
-             cursor.close()
-             conn.close()
+            cursor.close()
+    return render_template('admin_stats.html', report=report, date_from=date_from, date_to=date_to)
+
+def booking_group_id(booking_id):
+    """The group a booking belongs to, or None."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    cursor = conn.cursor()
+    cursor.execute("SELECT group_id FROM bookings WHERE id = %s", (booking_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else None
+
+def set_booking_groups_status(cursor, group_ids, booking_status, payment_status):
+    """Update many groups and their bookings: one statement per table."""
+    params = [booking_status, payment_status] + list(group_ids)
+    cursor.execute(queries.SET_GROUPS_STATUS.format(ids=in_clause(group_ids)), params)
+    cursor.execute(queries.SET_GROUP_BOOKINGS_STATUS.format(ids=in_clause(group_ids)), params)
+
+def slot_range(start_time, end_time):
+    start_t = to_time(start_time)
+    end_t = to_time(end_time)
+    return f"{start_t.strftime('%H:%M')} - {end_t.strftime('%H:%M')}"
+
+def wants_json():
+    """True for the dashboard's fetch() calls, which ask for JSON instead of a redirect."""
+    return request.accept_mimetypes.best == 'application/json'
+
+def admin_action_result(message, status=200):
+    """JSON for the dashboard's fetch() calls, flash + redirect for plain form posts."""
+    if wants_json():
+        return jsonify({"ok": status == 200, "message": message}), status
+    flash(message)
     return redirect(url_for('admin_dashboard'))
 
-@app.route('/admin/bookings/reject/<int:id>', methods=['POST'])
+GROUP_ACTIONS = {
+    'approve': ('confirmed', 'paid_verified'),
+    'reject': ('rejected', 'rejected'),
+}
+BULK_MAX_GROUPS = 200
+ACTIONABLE_PAYMENT_STATUSES = ('pending', 'paid_manual_verification')
+GROUP_NOT_FOUND = 'Booking not found.'
+
+def queue_bulk_confirmations(cursor, groups):
+    """One confirmation email + WhatsApp per customer, listing all of their approved groups."""
+    by_customer = {}
+    for group in groups:
+        by_customer.setdefault(group['user_id'], []).append(group)
+    for customer_groups in by_customer.values():
+        customer_groups.sort(key=lambda g: (g['booking_date'], to_time(g['start_time'])))
+        first = customer_groups[0]
+        if len(customer_groups) == 1:
+            date, times = first['booking_date'], slot_range(first['start_time'], first['end_time'])
+        else:
+            date = ', '.join(dict.fromkeys(str(g['booking_date']) for g in customer_groups))
+            times = ', '.join(f"{g['booking_date']} {slot_range(g['start_time'], g['end_time'])}" for g in customer_groups)
+        details = {
+            'name': first['customer_name'],
+            'date': date,
+            'start_time': times,
+            'paid_amount': sum(g['paid_amount'] or 0 for g in customer_groups)
+        }
+        queue_user_confirmation_email(cursor, first['customer_email'], details)
+        queue_user_whatsapp_confirmation(cursor, first['customer_phone'], details)
+
+def apply_group_action(cursor, action, ids):
+    """
+    Approve or reject booking groups on the caller's transaction. The rows are
+    locked FOR UPDATE and only groups still awaiting verification change, so a
+    repeated or concurrent approve/reject can't queue the confirmations twice
+    or revive a rejected group. Returns ({id: result}, [changed groups]).
+    """
+    booking_status, payment_status = GROUP_ACTIONS[action]
+    cursor.execute(f"""
+        SELECT g.id, g.user_id, g.booking_date, g.start_time, g.end_time, g.paid_amount, g.payment_status,
+               u.name as customer_name, u.email as customer_email, u.phone as customer_phone
+        FROM booking_groups g
+        JOIN users u ON g.user_id = u.id
+        WHERE g.id IN ({in_clause(ids)})
+        FOR UPDATE
+    """, ids)
+    found = {g['id']: g for g in cursor.fetchall()}
+    results = {}
+    groups = []
+    for group_id in ids:
+        group = found.get(group_id)
+        if group is None:
+            results[group_id] = {"id": group_id, "ok": False, "error": GROUP_NOT_FOUND}
+        elif group['payment_status'] not in ACTIONABLE_PAYMENT_STATUSES:
+            results[group_id] = {"id": group_id, "ok": False, "error": f"Already {group['payment_status']}."}
+        else:
+            results[group_id] = {"id": group_id, "ok": True, "status": booking_status}
+            groups.append(group)
+
+    if groups:
+        group_ids = [g['id'] for g in groups]
+        set_booking_groups_status(cursor, group_ids, booking_status, payment_status)
+        stats.refresh_cells(cursor, stats.group_cells(cursor, *group_ids))
+        if action == 'approve':
+            queue_bulk_confirmations(cursor, groups)
+        changes.record(cursor, 'booking_group', *group_ids)
+    return results, groups
+
+def publish_group_action(action, groups):
+    """After commit: a rejection frees slots, so those dates are re-read for every worker."""
+    dates = {g['booking_date'] for g in groups}
+    if action == 'approve':
+        invalidate_availability(*dates)
+    else:
+        refresh_availability(*dates)
+
+def booking_group_action(action, group_id, message):
+    conn = get_db_connection()
+    if not conn:
+        return admin_action_result('Database error', 500)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction()
+        results, groups = apply_group_action(cursor, action, [group_id])
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return admin_action_result(f'Error: {e}', 500)
+    finally:
+        cursor.close()
+        conn.close()
+
+    result = results[group_id]
+    if not result['ok']:
+        return admin_action_result(result['error'], 404 if result['error'] == GROUP_NOT_FOUND else 409)
+    publish_group_action(action, groups)
+    return admin_action_result(message)
+
+@app.route('/admin/groups/<int:group_id>/approve', methods=['POST'])
 @admin_required
 @no_cache
-def reject_booking(id):
+def approve_booking_group(group_id):
+    return booking_group_action('approve', group_id, 'Booking group approved and verified!')
+
+@app.route('/admin/groups/<int:group_id>/reject', methods=['POST'])
+@admin_required
+@no_cache
+def reject_booking_group(group_id):
+    return booking_group_action('reject', group_id, 'Booking group rejected.')
+
+@app.route('/admin/groups/<int:group_id>/delete', methods=['POST'])
+@admin_required
+@no_cache
+def delete_booking_group(group_id):
     conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        try:
-            # Reject booking group
-            cursor.execute("SELECT payment_proof FROM bookings WHERE id = %s", (id,))
-            initial_booking = cursor.fetchone()
-            
-            if initial_booking:
-                payment_proof = initial_booking['payment_proof']
-                cursor.execute("UPDATE bookings SET booking_status = 'rejected', payment_status = 'rejected' WHERE payment_proof = %s", (payment_proof,))
-                conn.commit()
-                flash('Booking group rejected.')
-            else:
-                 flash('Booking not found.')
+    if not conn:
+        return admin_action_result('Database error', 500)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT booking_date FROM booking_groups WHERE id = %s", (group_id,))
+        group = cursor.fetchone()
+        if not group:
+            return admin_action_result('Booking not found.', 404)
+
+        # Its bookings go with it (ON DELETE CASCADE)
+        cells = stats.group_cells(cursor, group_id)
+        cursor.execute("DELETE FROM booking_groups WHERE id = %s", (group_id,))
+        stats.refresh_cells(cursor, cells)
+        changes.record(cursor, 'booking_group', group_id)
+        conn.commit()
+        refresh_availability(group['booking_date'])
+        return admin_action_result('Booking group deleted permanently.')
+    except Exception as e:
+        conn.rollback()
+        return admin_action_result(f'Error: {e}', 500)
+    finally:
+        cursor.close()
+        conn.close()
 
-        except Exception as e:
-            flash(f'Error: {e}')
-        finally:
-             cursor.close()
-             conn.close()
-    return redirect(url_for('admin_dashboard'))
+@app.route('/admin/groups/bulk', methods=['POST'])
+@admin_required
+@no_cache
+def bulk_booking_groups():
+    """
+    Approve or reject many booking groups in one transaction:
+    {"action": "approve"|"reject", "ids": [...]}. Groups that are missing or
+    no longer awaiting verification are skipped; the response has one
+    result per id.
+    """
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action not in GROUP_ACTIONS:
+        return jsonify({"error": "action must be approve or reject"}), 400
+    try:
+        ids = list(dict.fromkeys(int(i) for i in data.get('ids') or []))
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids must be booking group ids"}), 400
+    if not ids or len(ids) > BULK_MAX_GROUPS:
+        return jsonify({"error": f"Select between 1 and {BULK_MAX_GROUPS} bookings"}), 400
 
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({"error": "Database error"}), 500
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction()
+        results, groups = apply_group_action(cursor, action, ids)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    publish_group_action(action, groups)
+    done = len(groups)
+    return jsonify({
+        "ok": done == len(ids),
+        "message": f"{done} of {len(ids)} booking group{'s' if len(ids) != 1 else ''} {'approved' if action == 'approve' else 'rejected'}.",
+        "results": [results[i] for i in ids],
+    })
 
+# Booking-id routes kept for old links: act on the booking's group
+
+@app.route('/admin/bookings/approve/<int:id>', methods=['POST'])
+@admin_required
+@no_cache
+def approve_booking(id):
+    group_id = booking_group_id(id)
+    if group_id is None:
+        return admin_action_result('Booking not found.', 404)
+    return approve_booking_group(group_id=group_id)
 
+@app.route('/admin/bookings/reject/<int:id>', methods=['POST'])
+@admin_required
+@no_cache
+def reject_booking(id):
+    group_id = booking_group_id(id)
+    if group_id is None:
+        return admin_action_result('Booking not found.', 404)
+    return reject_booking_group(group_id=group_id)
 
 @app.route('/admin/bookings/delete/<int:id>', methods=['POST'])
 @admin_required
 @no_cache
 def delete_booking(id):
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        try:
-            # Delete booking group
-            cursor.execute("SELECT payment_proof FROM bookings WHERE id = %s", (id,))
-            initial_booking = cursor.fetchone()
-            
-            if initial_booking:
-                payment_proof = initial_booking['payment_proof']
-                cursor.execute("DELETE FROM bookings WHERE payment_proof = %s", (payment_proof,))
-                conn.commit()
-                flash('Booking group deleted permanently.')
-            else:
-                 flash('Booking not found.')
-
-        except Exception as e:
-            flash(f'Error: {e}')
-        finally:
-            cursor.close()
-            conn.close()
-    return redirect(url_for('admin_dashboard'))
+    group_id = booking_group_id(id)
+    if group_id is None:
+        return admin_action_result('Booking not found.', 404)
+    return delete_booking_group(group_id=group_id)
 
 # --- Admin Slot Management ---
 
@@ -563,10 +1046,18 @@ def admin_slots():
     date_str = request.args.get('date', datetime.date.today().isoformat())
     conn = get_db_connection()
     slots = []
+    schedules = []
     if conn:
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM slots WHERE slot_date = %s ORDER BY start_time ASC", (date_str,))
         slots = cursor.fetchall()
+
+        cursor.execute("SELECT * FROM slot_schedules ORDER BY weekday, open_time")
+        schedules = cursor.fetchall()
+        for sc in schedules:
+            sc['weekday_name'] = slot_schedule.WEEKDAYS[sc['weekday']]
+            sc['open_time'] = to_time(sc['open_time'])
+            sc['close_time'] = to_time(sc['close_time'])
         
         # Format times
         for s in slots:
@@ -577,7 +1068,9 @@ def admin_slots():
                  
         cursor.close()
         conn.close()
-    return render_template('admin_slots.html', slots=slots, selected_date=date_str)
+    return render_template('admin_slots.html', slots=slots, selected_date=date_str,
+                           schedules=schedules, weekdays=slot_schedule.WEEKDAYS,
+                           horizon_weeks=Config.SLOT_HORIZON_WEEKS)
 
 @app.route('/admin/slots/add', methods=['POST'])
 @admin_required
@@ -592,7 +1085,9 @@ def add_slot():
         cursor = conn.cursor()
         try:
             cursor.execute("INSERT INTO slots (slot_date, start_time, end_time) VALUES (%s, %s, %s)", (slot_date, start_time, end_time))
+            stats.refresh_days(cursor, slot_date)
             conn.commit()
+            refresh_availability(slot_date)
             flash('Slot added successfully')
         except mysql.connector.Error as err:
             flash(f'Error adding slot: {err}')
@@ -613,41 +1108,22 @@ def generate_slots():
     if conn:
         cursor = conn.cursor()
         try:
-            # Parse times
-            start_dt = datetime.datetime.strptime(start_time_str, '%H:%M')
-            end_dt = datetime.datetime.strptime(end_time_str, '%H:%M')
-            
-            # Handle overnight (e.g. 09:00 to 00:00)
-            if end_dt <= start_dt:
-                end_dt += datetime.timedelta(days=1)
-            
-            current_time = start_dt
-            
-            slots_created = 0
-            
-            # Loop until current time reaches end time
-            while current_time < end_dt:
-                slot_start = current_time.strftime('%H:%M:%S') # Always time part
-                
-                # 1 Hour Interval
-                next_time_obj = current_time + datetime.timedelta(hours=1)
-                
-                # Careful not to exceed requested end
-                if next_time_obj > end_dt:
-                    break
-                    
-                slot_end = next_time_obj.strftime('%H:%M:%S')
-                
-                # Check if exists
-                cursor.execute("SELECT id FROM slots WHERE slot_date = %s AND start_time = %s", (slot_date, slot_start))
-                if not cursor.fetchone():
-                    cursor.execute("INSERT INTO slots (slot_date, start_time, end_time) VALUES (%s, %s, %s)", 
-                                   (slot_date, slot_start, slot_end))
-                    slots_created += 1
-                
-                current_time = next_time_obj
+            # Hourly slots from start to end (09:00 to 00:00 runs to midnight;
+            # slots after midnight go on the next date)
+            day = datetime.date.fromisoformat(slot_date)
+            start_t = datetime.datetime.strptime(start_time_str, '%H:%M').time()
+            end_t = datetime.datetime.strptime(end_time_str, '%H:%M').time()
+            rows = [
+                (day + datetime.timedelta(days=day_offset), slot_start, slot_end, None)
+                for day_offset, slot_start, slot_end in slot_schedule.day_slots(start_t, end_t)
+            ]
+            cursor.executemany(slot_schedule.INSERT_SLOT, rows)
+            slots_created = max(cursor.rowcount, 0)
+            dates = sorted({row[0] for row in rows}) or [day]
+            stats.refresh_days(cursor, dates[0], dates[-1])
 
             conn.commit()
+            refresh_availability(*dates)
             if slots_created > 0:
                 flash(f'{slots_created} slots generated successfully!')
             else:
@@ -661,6 +1137,71 @@ def generate_slots():
             
     return redirect(url_for('admin_slots', date=slot_date))
 
+SCHEDULE_DAY_GROUPS = {'weekdays': range(0, 5), 'weekends': range(5, 7), 'all': range(0, 7)}
+
+@app.route('/admin/slots/schedules/add', methods=['POST'])
+@admin_required
+@no_cache
+def add_slot_schedule():
+    day = request.form.get('weekday', '')
+    weekdays = SCHEDULE_DAY_GROUPS.get(day) or ([int(day)] if day.isdigit() and int(day) < 7 else [])
+    open_time = request.form.get('open_time')
+    close_time = request.form.get('close_time')
+    slot_minutes = request.form.get('slot_minutes', 60, type=int)
+    if not weekdays or not open_time or not close_time or not slot_minutes or slot_minutes <= 0:
+        flash('Invalid schedule.')
+        return redirect(url_for('admin_slots'))
+
+    conn = get_db_connection()
+    if conn:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                "INSERT INTO slot_schedules (weekday, open_time, close_time, slot_minutes) VALUES (%s, %s, %s, %s)",
+                [(d, open_time, close_time, slot_minutes) for d in weekdays]
+            )
+            conn.commit()
+            flash('Schedule added. Generate slots to apply it.')
+        except mysql.connector.Error as err:
+            flash(f'Error adding schedule: {err}')
+        finally:
+            cursor.close()
+            conn.close()
+    return redirect(url_for('admin_slots'))
+
+@app.route('/admin/slots/schedules/delete/<int:id>', methods=['POST'])
+@admin_required
+@no_cache
+def delete_slot_schedule(id):
+    conn = get_db_connection()
+    if conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM slot_schedules WHERE id = %s", (id,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+        flash('Schedule removed. Slots already generated are kept.')
+    return redirect(url_for('admin_slots'))
+
+@app.route('/admin/slots/schedules/generate', methods=['POST'])
+@admin_required
+@no_cache
+def generate_scheduled_slots():
+    weeks = request.form.get('weeks', Config.SLOT_HORIZON_WEEKS, type=int)
+    conn = get_db_connection()
+    if conn:
+        try:
+            created, dates = slot_schedule.generate_slots(conn, weeks)
+            # Other workers' cached copies of these dates are stale now
+            occupancy.forget(*dates)
+            invalidate_availability(*dates)
+            flash(f'{created} slots generated for the next {weeks} weeks.')
+        except mysql.connector.Error as err:
+            flash(f'Error generating slots: {err}')
+        finally:
+            conn.close()
+    return redirect(url_for('admin_slots'))
+
 @app.route('/admin/slots/toggle/<int:id>', methods=['POST'])
 @admin_required
 @no_cache
@@ -668,8 +1209,12 @@ def toggle_slot(id):
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
+        slot_date = slot_date_for(cursor, id)
         cursor.execute("UPDATE slots SET is_active = NOT is_active WHERE id = %s", (id,))
+        if slot_date:
+            stats.refresh_days(cursor, slot_date)
         conn.commit()
+        refresh_availability(slot_date)
         cursor.close()
         conn.close()
         flash('Slot status updated')
@@ -682,17 +1227,24 @@ def delete_slot(id):
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
+        slot_date = slot_date_for(cursor, id)
         try:
             # Check for bookings first? For now, try delete (FK might restrict it)
             cursor.execute("DELETE FROM slots WHERE id = %s", (id,))
+            if slot_date:
+                stats.refresh_days(cursor, slot_date)
             conn.commit()
             flash('Slot deleted')
         except mysql.connector.Error:
             # Likely FK constraint
+            conn.rollback()
             flash('Cannot delete slot with existing bookings. Disabled it instead.')
             cursor.execute("UPDATE slots SET is_active = FALSE WHERE id = %s", (id,))
+            if slot_date:
+                stats.refresh_days(cursor, slot_date)
             conn.commit()
         finally:
+            refresh_availability(slot_date)
             cursor.close()
             conn.close()
     return redirect(url_for('admin_slots'))
@@ -708,41 +1260,24 @@ def add_tournament():
     fee = request.form['fee']
     
     image_filename = None
-    image_filename = None
-    if 'image' in request.files:
-        file = request.files['image']
-        
-        # Validation: Extensions
-        ALLOWED_TOURNAMENT_EXTENSIONS = {'png', 'jpg', 'jpeg'}
-        if file and ('.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in ALLOWED_TOURNAMENT_EXTENSIONS):
-            
-            # Validation: Size (Max 2MB)
-            file.seek(0, os.SEEK_END)
-            file_size = file.tell()
-            file.seek(0)
-            
-            if file_size > 2 * 1024 * 1024:
-                flash('File too large. Maximum size is 2MB.', 'error')
-                return redirect(url_for('admin_dashboard'))
-
-            # Use timestamp to ensure unique filenames
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = secure_filename(f"{timestamp}_{file.filename}")
-            
-            # Save to tournament_images folder
-            save_path = os.path.join(app.root_path, 'static', 'tournament_images', filename)
-            file.save(save_path)
-            image_filename = filename
-        elif file:
-             flash('Invalid file format. Allowed: PNG, JPG, JPEG.', 'error')
-             return redirect(url_for('admin_dashboard'))
+    file = request.files.get('image')
+    if file and file.filename:
+        # PNG/JPEG up to 2MB, stored under its content hash; resized variants are made for srcset
+        try:
+            image_filename, _ = uploads.store_image(file.stream, posters.FOLDER, Config.POSTER_MAX_BYTES)
+        except uploads.UploadRejected as e:
+            flash(str(e), 'error')
+            return redirect(url_for('admin_dashboard'))
+        posters.add(image_filename)
 
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
         cursor.execute("INSERT INTO tournaments (title, description, event_date, entry_fee, image_url) VALUES (%s, %s, %s, %s, %s)",
                        (title, description, date, fee, image_filename))
+        changes.record(cursor, 'tournament', cursor.lastrowid)
         conn.commit()
+        reference_cache.invalidate('tournaments')
         cursor.close()
         conn.close()
         flash('Tournament created successfully!')
@@ -757,12 +1292,38 @@ def delete_tournament(id):
     if conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM tournaments WHERE id = %s", (id,))
+        changes.record(cursor, 'tournament', id)
         conn.commit()
+        reference_cache.invalidate('tournaments')
         cursor.close()
         conn.close()
         flash('Tournament deleted.')
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/admin/api/db_pool')
+@admin_required
+@no_cache
+def db_pool_stats():
+    return jsonify(get_db_pool().stats())
+
+@app.route('/admin/api/reference_cache')
+@admin_required
+@no_cache
+def reference_cache_stats():
+    return jsonify(reference_cache.stats())
+
+@app.route('/admin/api/availability_hub')
+@admin_required
+@no_cache
+def availability_hub_stats():
+    return jsonify(availability_hub.stats())
+
+@app.route('/admin/api/page_cache')
+@admin_required
+@no_cache
+def page_cache_stats():
+    return jsonify(page_cache.stats())
+
 @app.route('/admin/logout')
 def admin_logout():
     session.clear()
@@ -771,18 +1332,160 @@ def admin_logout():
 # --- API Endpoints ---
 
 @app.route('/api/tournaments', methods=['GET'])
+@conditional(table_version('tournaments'))
 def api_tournaments():
+    return app.json.json_response(tournaments_json() or '[]')
+
+availability_cache = AvailabilityCache(ttl=Config.AVAILABILITY_CACHE_TTL, max_age=Config.AVAILABILITY_CACHE_MAX_AGE)
+occupancy = OccupancyMap(Config.OCCUPANCY_FILE)
+availability_hub = AvailabilityHub(occupancy, interval=Config.SSE_POLL_INTERVAL, max_streams=Config.SSE_MAX_STREAMS)
+resource_versions = ResourceVersions(Config.VERSIONS_FILE)
+reference_cache = ReferenceCache(resource_versions, ttl=Config.REFERENCE_CACHE_TTL,
+                                 max_entries=Config.REFERENCE_CACHE_MAX_ENTRIES,
+                                 enabled=Config.REFERENCE_CACHE_ENABLED)
+page_cache = PageCache(ttl=Config.PAGE_CACHE_TTL, max_entries=Config.PAGE_CACHE_MAX_ENTRIES,
+                       enabled=Config.PAGE_CACHE_ENABLED)
+lock_backend = slot_locks.create_backend(Config.SLOT_LOCK_BACKEND, get_db_connection, wait=Config.SLOT_LOCK_WAIT)
+
+def apply_lock_holds(rows):
+    """Fill locked_until from the lock backend when its holds aren't in slot_locks."""
+    if lock_backend.in_database:
+        return rows
+    now = datetime.datetime.now()
+    holds = lock_backend.owners(r['id'] for r in rows)
+    for r in rows:
+        hold = holds.get(r['id'])
+        r['locked_until'] = hold[1] if hold and hold[1] > now else None
+    return rows
+
+def load_availability(date_str, refresh=False):
+    """
+    Fetch every slot on a date with its booked/locked state in one query (cache loader).
+    Publishes the state to the shared occupancy map if it isn't there yet, or if refresh is set.
+    """
+    conn = get_db_connection()
+    if not conn:
+        g.no_page_cache = True
+        return None
+    cursor = conn.cursor(dictionary=True)
+
+    # Expired holds are ignored by the query and deleted by the lock reaper
+    cursor.execute(queries.AVAILABILITY_FOR_DATE, (date_str,))
+    rows = apply_lock_holds(cursor.fetchall())
+    cursor.close()
+
+    if refresh or not occupancy.is_known(date_str):
+        occupancy.store(date_str, rows)
+    return rows
+
+def get_availability(date_str):
+    """Slot rows for a date, with booked/locked state read from the shared occupancy map."""
+    rows = availability_cache.get(date_str, load_availability, version=lambda: occupancy.version(date_str))
+    return occupancy.overlay(date_str, rows)
+
+def invalidate_availability(*dates):
+    """Drop cached availability for the given dates (date objects or 'YYYY-MM-DD')."""
+    for d in dates:
+        if d:
+            availability_cache.invalidate(d.isoformat() if isinstance(d, datetime.date) else str(d))
+
+def refresh_availability(*dates):
+    """Re-read dates from the DB after an admin change and republish them to every worker."""
+    for d in dates:
+        if d:
+            date_str = d.isoformat() if isinstance(d, datetime.date) else str(d)
+            availability_cache.invalidate(date_str)
+            load_availability(date_str, refresh=True)
+
+def rebuild_occupancy():
+    """Load booked/locked state for upcoming dates into the shared occupancy map (run at startup)."""
+    rows_by_date = {}
     conn = get_db_connection()
-    tournaments = []
     if conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM tournaments ORDER BY event_date ASC")
-        tournaments = cursor.fetchall()
-        cursor.close()
-        conn.close()
-    return jsonify(tournaments)
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(queries.AVAILABILITY_SELECT + " WHERE s.slot_date BETWEEN CURDATE() - INTERVAL 1 DAY AND CURDATE() + INTERVAL %s DAY",
+                           (occupancy.days - 2,))
+            for r in apply_lock_holds(cursor.fetchall()):
+                rows_by_date.setdefault(r['slot_date'], []).append(r)
+            cursor.close()
+        except mysql.connector.Error as err:
+            print(f"Occupancy rebuild failed: {err}")
+            rows_by_date = {}
+    # Even with no DB, don't trust whatever an earlier run left in the shared file
+    occupancy.rebuild(rows_by_date)
+
+def slot_date_for(cursor, slot_id):
+    cursor.execute("SELECT slot_date FROM slots WHERE id = %s", (slot_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return row['slot_date'] if isinstance(row, dict) else row[0]
+
+@app.route('/api/availability', methods=['GET'])
+@conditional(slots_version)
+def api_availability():
+    """Slots for a date with booked/locked/past state, in one payload"""
+    try:
+        date_str = request.args.get('date')
+        if not date_str:
+            return jsonify({"error": "Date required"}), 400
+
+        rows = get_availability(date_str)
+        if rows is None:
+            return jsonify({"error": "Database error"}), 500
+
+        slots = [s for s in build_slot_views(rows, date_str) if s['is_active']]
+        return jsonify({"date": date_str, "slots": slots})
+    except Exception as e:
+        print(f"Error in api_availability: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/availability/stream', methods=['GET'])
+def availability_stream():
+    """
+    Server-Sent Events for a date's slots: lock, unlock, book, reject and reload
+    (see live_events.py). Streams end after SSE_MAX_SECONDS and the browser
+    reconnects, so a worker thread is never held indefinitely. Each stream
+    holds a thread, so past SSE_MAX_STREAMS per worker the page gets a 204
+    and polls /api/availability instead, leaving threads for other requests.
+    """
+    date_str = request.args.get('date', '')
+    try:
+        datetime.date.fromisoformat(date_str)
+    except ValueError:
+        return jsonify({"error": "Date required"}), 400
+    # Publish the date to the occupancy map so the hub can watch it
+    if get_availability(date_str) is None:
+        return jsonify({"error": "Database error"}), 500
+    if occupancy.live_state(date_str) is None:
+        return '', 204 # slots off the half-hour grid: not tracked, the page keeps its snapshot
+
+    cursor = availability_hub.subscribe(date_str)
+    if cursor is None:
+        return '', 204 # this worker's stream threads are all taken
+
+    def events(cursor):
+        yield "retry: 3000\n\n"
+        deadline = time.monotonic() + Config.SSE_MAX_SECONDS
+        while time.monotonic() < deadline:
+            batch, cursor = availability_hub.wait(date_str, cursor, timeout=Config.SSE_KEEPALIVE_SECONDS)
+            if not batch:
+                yield ": keepalive\n\n"
+            for event in batch:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    response = app.response_class(events(cursor), mimetype='text/event-stream')
+    # Runs even if the client goes away before the generator starts
+    response.call_on_close(lambda: availability_hub.unsubscribe(date_str))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # nginx: don't buffer the stream
+    return response
 
 @app.route('/api/slots', methods=['GET'])
+@conditional(slots_version)
 def get_slots():
     """Return active slots for a specific date"""
     try:
@@ -790,48 +1493,11 @@ def get_slots():
         if not date_str:
             return jsonify([])
 
-        conn = get_db_connection()
-        slots = []
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            # Fetch slots for this specific date
-            cursor.execute("SELECT id, start_time, end_time FROM slots WHERE slot_date = %s AND is_active = TRUE ORDER BY start_time ASC", (date_str,))
-            raw_slots = cursor.fetchall()
-            
-            # Server-side Time Check
-            now = datetime.datetime.now()
-            today_str = now.strftime('%Y-%m-%d')
-            is_today = (date_str == today_str)
-            is_past_date = (date_str < today_str)
-
-            for s in raw_slots:
-                # Convert timedelta to string (HH:MM AM/PM)
-                start_t = s['start_time']
-                if isinstance(start_t, datetime.timedelta):
-                    start_t = (datetime.datetime.min + start_t).time()
-                
-                display_str = start_t.strftime("%I:%M %p")
-                
-                # Check if past
-                # If date is in past, all slots are past
-                # If today, check time
-                slot_is_past = False
-                if is_past_date:
-                    slot_is_past = True
-                elif is_today:
-                    slot_dt = datetime.datetime.combine(now.date(), start_t)
-                    if slot_dt < now:
-                        slot_is_past = True
-
-                slots.append({
-                    "id": s['id'],
-                    "display": display_str,
-                    "start_time": str(start_t), # HH:MM:SS
-                    "is_past": slot_is_past
-                })
-                
-            cursor.close()
-            conn.close()
+        rows = get_availability(date_str) or []
+        slots = [
+            {"id": s['id'], "display": s['display'], "start_time": s['start_time'], "is_past": s['is_past']}
+            for s in build_slot_views(rows, date_str) if s['is_active']
+        ]
         return jsonify(slots)
     except Exception as e:
         print(f"Error in get_slots: {e}")
@@ -840,49 +1506,16 @@ def get_slots():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/check_availability', methods=['GET'])
+@conditional(slots_version)
 def check_availability():
     try:
         date_str = request.args.get('date') # YYYY-MM-DD
         if not date_str:
             return jsonify({"error": "Date required"}), 400
-        
-        conn = get_db_connection()
-        unavailable_slot_ids = []
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            
-            # 0. Clean up expired locks first (Lazy cleanup)
-            cursor.execute("DELETE FROM slot_locks WHERE lock_expiry < NOW()")
-            conn.commit()
-            
-            # 1. Fetch BOOKED slots
-            query_booked = """
-                SELECT slot_id 
-                FROM bookings 
-                WHERE booking_status != 'rejected'
-                AND slot_id IN (SELECT id FROM slots WHERE slot_date = %s)
-            """
-            cursor.execute(query_booked, (date_str,))
-            booked_results = cursor.fetchall()
-            unavailable_slot_ids.extend([r['slot_id'] for r in booked_results])
-            
-            # 2. Fetch LOCKED slots
-            query_locked = """
-                SELECT slot_id 
-                FROM slot_locks 
-                WHERE lock_expiry > NOW()
-                AND slot_id IN (SELECT id FROM slots WHERE slot_date = %s)
-            """
-            cursor.execute(query_locked, (date_str,))
-            locked_results = cursor.fetchall()
-            unavailable_slot_ids.extend([r['slot_id'] for r in locked_results])
-            
-            # Unique IDs
-            unavailable_slot_ids = list(set(unavailable_slot_ids))
-            
-            cursor.close()
-            conn.close()
-            
+
+        rows = get_availability(date_str) or []
+        # Booked or currently locked slot IDs
+        unavailable_slot_ids = [s['id'] for s in build_slot_views(rows, date_str) if s['is_booked'] or s['is_locked']]
         return jsonify(unavailable_slot_ids)
     except Exception as e:
         print(f"Error in check_availability: {e}")
@@ -906,41 +1539,25 @@ def lock_slot():
         if not conn:
             return jsonify({"error": "Database error"}), 500
             
-        conn.start_transaction()
-        cursor = conn.cursor(dictionary=True)
-        
-        # 1. Clean expired locks
-        cursor.execute("DELETE FROM slot_locks WHERE lock_expiry < NOW()")
+        cursor = conn.cursor(dictionary=True, buffered=True)
         
-        # 2. Check if already booked
-        cursor.execute("SELECT id FROM bookings WHERE slot_id = %s AND booking_status != 'rejected'", (slot_id,))
-        if cursor.fetchone():
-            conn.rollback()
+        # 1. Check if already booked (and find the slot's date for cache invalidation)
+        cursor.execute(queries.SLOT_BOOKED_CHECK, (slot_id,))
+        slot_row = cursor.fetchone()
+        if not slot_row:
+            return jsonify({"error": "Slot not found"}), 404
+        if slot_row['is_booked']:
             return jsonify({"error": "Slot already booked", "status": "taken"}), 409
             
-        # 3. Check if locked by SOMEONE ELSE
-        cursor.execute("SELECT user_identifier FROM slot_locks WHERE slot_id = %s", (slot_id,))
-        existing_lock = cursor.fetchone()
-        
-        if existing_lock:
-            if existing_lock['user_identifier'] == user_identifier:
-                # Refresh my lock
-                new_expiry = (datetime.datetime.now() + datetime.timedelta(minutes=5))
-                cursor.execute("UPDATE slot_locks SET lock_expiry = %s WHERE slot_id = %s", (new_expiry, slot_id))
-                conn.commit()
-                return jsonify({"message": "Lock refreshed", "expiry": new_expiry.isoformat()})
-            else:
-                # Locked by another
-                conn.rollback()
-                return jsonify({"error": "Slot is temporarily locked by another user", "status": "locked"}), 409
-        
-        # 4. Create New Lock
-        new_expiry = (datetime.datetime.now() + datetime.timedelta(minutes=5))
-        cursor.execute("INSERT INTO slot_locks (slot_id, user_identifier, lock_expiry) VALUES (%s, %s, %s)", 
-                       (slot_id, user_identifier, new_expiry))
-        
-        conn.commit()
-        return jsonify({"message": "Slot locked", "expiry": new_expiry.isoformat()})
+        # 2. Take (or refresh my) hold; fails if SOMEONE ELSE holds it
+        status, new_expiry = lock_backend.acquire(slot_id, user_identifier, Config.SLOT_LOCK_TTL)
+        if status == slot_locks.TAKEN:
+            return jsonify({"error": "Slot is temporarily locked by another user", "status": "locked"}), 409
+
+        occupancy.set_lock(slot_row['slot_date'], slot_row['start_time'], new_expiry)
+        invalidate_availability(slot_row['slot_date'])
+        message = "Lock refreshed" if status == slot_locks.REFRESHED else "Slot locked"
+        return jsonify({"message": message, "expiry": new_expiry.isoformat()})
         
     except Exception as e:
         if conn: conn.rollback()
@@ -960,10 +1577,18 @@ def initiate_payment():
     token = serializer.dumps({'init_time': datetime.datetime.now().isoformat()})
     return jsonify({'token': token})
 
+def discard_payment_proof(filename):
+    """Remove a proof (and any thumbnail already made of it) stored by a booking that didn't commit."""
+    folder = app.config['PAYMENT_UPLOAD_FOLDER']
+    for path in (os.path.join(folder, filename), thumbnails.thumb_path(folder, filename)):
+        if os.path.exists(path):
+            os.remove(path)
+
 @app.route('/api/book_slot', methods=['POST'])
 def book_slot():
     conn = None
     cursor = None
+    proof_created = False
     try:
         # 0. Validate Payment Token (Strict Time Limit)
         payment_token = request.form.get('payment_token')
@@ -1009,10 +1634,32 @@ def book_slot():
             duration_hours = (end_full - start_full).total_seconds() / 3600.0
             if duration_hours <= 0:
                  return jsonify({"error": "Invalid time range."}), 400
+
+            booking_date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
                  
         except ValueError:
              return jsonify({"error": "Invalid data format"}), 400
 
+        # Fast conflict pre-check against the shared occupancy map (no DB round trip).
+        # The authoritative check still runs inside the transaction below.
+        requested_times = []
+        current_time_iter = start_full
+        while current_time_iter < end_full:
+            requested_times.append(current_time_iter.time())
+            current_time_iter += datetime.timedelta(hours=1)
+        if occupancy.any_booked(date, requested_times):
+            return jsonify({"error": "Selected slot is already booked."}), 409
+
+        user_identifier = request.form.get('user_identifier')
+        if not user_identifier:
+             return jsonify({"error": "Session identifier missing."}), 400
+
+        file = request.files.get('payment_screenshot')
+        if not file:
+            return jsonify({"error": "Payment screenshot is mandatory"}), 400
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
+
         # --- DB SECTION START ---
         conn = get_db_connection()
         if not conn:
@@ -1034,8 +1681,7 @@ def book_slot():
             user_id = cursor.lastrowid
 
         # 3. Get Pricing (Assume 1 hour pricing exists)
-        cursor.execute("SELECT id, price FROM pricing WHERE duration_hours = 1 AND is_active = TRUE LIMIT 1")
-        pricing_row = cursor.fetchone()
+        pricing_row = next((p for p in active_pricing() if p['duration_hours'] == 1), None)
         if not pricing_row:
              conn.rollback()
              return jsonify({"error": "Pricing configuration not found."}), 500
@@ -1044,7 +1690,6 @@ def book_slot():
         pricing_id = pricing_row['id']
         
         # Weekend Logic Check (Saturday/Sunday)
-        booking_date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
         day_of_week = booking_date_obj.weekday() 
         weekend_discount = False
         # If Sat(5) or Sun(6)
@@ -1058,106 +1703,57 @@ def book_slot():
                  weekend_discount = True
 
         # 4. Resolve Slots and Check Availability
-        # We assume slots are 1-hour blocks.
-        # We need to find the specific slot_id for each hour in the range.
+        # We assume slots are 1-hour blocks. The whole range is read (and its
+        # slot rows locked) in one query, then checked against bookings in one join.
+        cursor.execute(queries.BOOK_RANGE_SELECT, (date, start_full.time(), end_full.time()))
+        slot_ids_by_time = {to_time(row['start_time']): row['id'] for row in cursor.fetchall()}
+
         slots_to_book = [] # List of {slot_id, start_time, price}
-        
-        current_time_iter = start_full
-        while current_time_iter < end_full:
-            slot_start_time = current_time_iter.time()
-            
-            # Find slot in DB for this Date + StartTime
-            # Note: We query by slot_date AND start_time
-            cursor.execute("SELECT id FROM slots WHERE slot_date = %s AND start_time = %s AND is_active = TRUE", (date, slot_start_time))
-            slot_record = cursor.fetchone()
-            
-            if not slot_record:
+        for slot_start_time in requested_times:
+            if slot_start_time not in slot_ids_by_time:
                 conn.rollback()
                 return jsonify({"error": f"Slot starting at {slot_start_time} not found/inactive for this date."}), 400
-                
-            slot_id = slot_record['id']
-            
-            # Check if booked
-            cursor.execute("""
-                SELECT id FROM bookings 
-                WHERE slot_id = %s 
-                AND booking_status IN ('confirmed', 'pending') 
-                AND payment_status != 'rejected'
-            """, (slot_id,))
-            if cursor.fetchone():
-                conn.rollback()
-                return jsonify({"error": f"Slot at {slot_start_time} is already booked."}), 409
-                
             slots_to_book.append({
-                'slot_id': slot_id,
+                'slot_id': slot_ids_by_time[slot_start_time],
+                'start_time': slot_start_time,
                 'price': hourly_price
             })
-            
-            # Increment by 1 hour
-            current_time_iter += datetime.timedelta(hours=1)
 
-        # 5. Handle File Upload
-        if 'payment_screenshot' not in request.files:
+        slot_ids = [slot_info['slot_id'] for slot_info in slots_to_book]
+        cursor.execute(queries.BOOK_CONFLICT_CHECK.format(ids=in_clause(slot_ids)), slot_ids)
+        conflict = cursor.fetchone()
+        if conflict:
             conn.rollback()
-            return jsonify({"error": "Payment screenshot is mandatory"}), 400
-        
-        # [NEW] Validate Locks
-        user_identifier = request.form.get('user_identifier')
-        if not user_identifier:
-             conn.rollback()
-             return jsonify({"error": "Session identifier missing."}), 400
+            return jsonify({"error": f"Slot at {to_time(conflict['start_time'])} is already booked."}), 409
+
+        # 5. Validate Locks
+        locks = lock_backend.owners(slot_ids, cursor=cursor)
+        now = datetime.datetime.now()
+        for sid in slot_ids:
+            lock = locks.get(sid)
 
-        for slot_info in slots_to_book:
-            sid = slot_info['slot_id']
-            # Check lock
-            cursor.execute("SELECT user_identifier, lock_expiry FROM slot_locks WHERE slot_id = %s", (sid,))
-            lock = cursor.fetchone()
-            
             if not lock:
                 conn.rollback()
                 return jsonify({"error": "Session verification failed (Lock missing). Please re-select slot."}), 409
-            
-            if lock['user_identifier'] != user_identifier:
+
+            if lock[0] != user_identifier:
                 conn.rollback()
                 return jsonify({"error": "Slot is locked by another user."}), 409
-                
-            if lock['lock_expiry'] < datetime.datetime.now():
+
+            if lock[1] < now:
                 conn.rollback()
                 return jsonify({"error": "Time limit exceeded. Please re-select slot."}), 409
 
-        file = request.files['payment_screenshot']
-        if file.filename == '':
-            conn.rollback()
-            return jsonify({"error": "No selected file"}), 400
-            
-        if not (file and allowed_file(file.filename)):
+        # Payment proof is stored only once the booking has passed every check, so a
+        # refused booking leaves no file behind. The body is already spooled, so this
+        # is a local copy of at most PAYMENT_PROOF_MAX_BYTES. Stored by content hash:
+        # a retried booking with the same screenshot reuses the file.
+        try:
+            new_filename, proof_created = uploads.store_image(
+                file.stream, app.config['PAYMENT_UPLOAD_FOLDER'], Config.PAYMENT_PROOF_MAX_BYTES, prefix='PAY_')
+        except uploads.UploadRejected as e:
             conn.rollback()
-            return jsonify({"error": "Invalid file type. Only images allowed."}), 400
-            
-        # File Size Check
-        file.seek(0, os.SEEK_END)
-        size = file.tell()
-        file.seek(0)
-        if size > 2 * 1024 * 1024: # 2MB limit
-             conn.rollback()
-             return jsonify({"error": "File too large. Max 2MB allowed."}), 400
-
-        # Strict MIME Type Check
-        # allowed_file checks extension, but let's be sure
-        filename = secure_filename(file.filename)
-        if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-             conn.rollback()
-             return jsonify({"error": "Invalid file type. Only PNG/JPEG allowed."}), 400
-
-        filename = secure_filename(file.filename)
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        new_filename = f"PAY_{timestamp}_{filename}"
-
-        if not os.path.exists(app.config['PAYMENT_UPLOAD_FOLDER']):
-            os.makedirs(app.config['PAYMENT_UPLOAD_FOLDER'])
-            
-        filepath = os.path.join(app.config['PAYMENT_UPLOAD_FOLDER'], new_filename)
-        file.save(filepath)
+            return jsonify({"error": str(e)}), 400
 
         # 6. Insert Bookings
         total_paid_declared = float(request.form.get('paid_amount', 0.0) or (hourly_price * len(slots_to_book)))
@@ -1166,30 +1762,36 @@ def book_slot():
         # Let's split it evenly.
         paid_per_slot = total_paid_declared / len(slots_to_book) if slots_to_book else 0
 
-        for slot_info in slots_to_book:
-            insert_query = """
-                INSERT INTO bookings (
-                    user_id, slot_id, booking_date, pricing_id, total_price, paid_amount, 
-                    payment_proof, payment_status, booking_status, verified_by, created_at
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, 'paid_manual_verification', 'pending', NULL, NOW())
-            """
-            cursor.execute(insert_query, (
-                user_id, 
-                slot_info['slot_id'], 
-                date, 
-                pricing_id, 
-                slot_info['price'], 
-                paid_per_slot, 
-                new_filename
-            ))
-            
-            # Remove Lock
-            cursor.execute("DELETE FROM slot_locks WHERE slot_id = %s", (slot_info['slot_id'],))
-            
-        conn.commit()
-        
-        # 7. Notifications
+        # The group holds the customer, time range, totals and proof; one booking row per slot points at it
+        cursor.execute("""
+            INSERT INTO booking_groups (
+                user_id, booking_date, start_time, end_time, slot_count, total_price, paid_amount,
+                payment_proof, payment_status, booking_status
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'paid_manual_verification', 'pending')
+        """, (
+            user_id, date, start_full.time(), end_full.time(), len(slots_to_book),
+            sum(slot_info['price'] for slot_info in slots_to_book), total_paid_declared, new_filename
+        ))
+        group_id = cursor.lastrowid
+
+        cursor.executemany("""
+            INSERT INTO bookings (
+                group_id, user_id, slot_id, booking_date, pricing_id, total_price, paid_amount, 
+                payment_proof, payment_status, booking_status, verified_by, created_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'paid_manual_verification', 'pending', NULL, NOW())
+        """, [
+            (group_id, user_id, slot_info['slot_id'], date, pricing_id, slot_info['price'], paid_per_slot, new_filename)
+            for slot_info in slots_to_book
+        ])
+
+        # Remove Locks
+        lock_backend.release(slot_ids, cursor=cursor)
+
+        stats.refresh_cells(cursor, [(date, slot_info['start_time']) for slot_info in slots_to_book])
+
+        # 7. Notifications (queued with the booking; sent by notification_worker.py after commit)
         booking_details = {
             'name': name,
             'phone': phone,
@@ -1199,21 +1801,26 @@ def book_slot():
             'end_time': end_time_str,
             'paid_amount': total_paid_declared
         }
-        
-        # Non-blocking notifications
-        try:
-            send_notification_email(booking_details)
-            send_whatsapp_notification(booking_details)
-        except:
-            pass # Don't fail booking if notification fails
+        queue_admin_booking_email(cursor, booking_details)
+        queue_admin_booking_whatsapp(cursor, booking_details)
+        changes.record(cursor, 'booking_group', group_id)
+
+        conn.commit()
+        proof_created = False # the booking owns the file now
+        occupancy.mark_booked(date, requested_times)
+        invalidate_availability(date)
 
         return jsonify({"message": "Booking request submitted. Waiting for verification."})
 
+    except RequestEntityTooLarge:
+        raise # answered by the 413 handler
     except mysql.connector.Error as err:
         if conn: conn.rollback()
+        if proof_created: discard_payment_proof(new_filename)
         return jsonify({"error": str(err)}), 500
     except Exception as e:
         if conn: conn.rollback()
+        if proof_created: discard_payment_proof(new_filename)
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
@@ -1249,6 +1856,7 @@ def register_tournament():
                 VALUES (%s, %s, %s, %s, 'PENDING', NOW())
             """
             cursor.execute(query, (tournament_id, team_name, captain_name, captain_phone))
+            changes.record(cursor, 'tournament', tournament_id)
             conn.commit()
             
             cursor.close()
@@ -1261,5 +1869,25 @@ def register_tournament():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+with app.app_context():
+    rebuild_occupancy()
+
+_lock_reaper = None
+
+@app.before_request
+def ensure_lock_reaper():
+    """Start this worker's lock reaper thread (once per process; one per node actually reaps)."""
+    global _lock_reaper
+    if Config.LOCK_REAPER_INTERVAL <= 0 or not lock_backend.in_database:
+        return
+    if _lock_reaper is None or _lock_reaper.pid != os.getpid():
+        _lock_reaper = lock_reaper.build_reaper(occupancy).start()
+
 if __name__ == '__main__':
+    # Local development: deliver queued notifications from a background thread
+    # (in production notification_worker.py runs as its own process, see Procfile)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        import threading
+        from notification_worker import build_dispatcher
+        threading.Thread(target=build_dispatcher().run_forever, args=(Config.OUTBOX_POLL_INTERVAL,), daemon=True).start()
     app.run(debug=True, port=5000)
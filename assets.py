@@ -0,0 +1,109 @@
+"""
+Fingerprinted, precompressed CSS and JS.
+
+build() copies every static/css/*.css and static/js/*.js to a sibling
+named after its content hash (`style.css` -> `style.<sha256[:12]>.css`,
+next to the original so relative url()s in stylesheets still resolve) and
+writes `.gz` and, if the brotli package is installed, `.br` copies of it.
+The app runs it at startup and templates link assets through
+asset_url(), which returns the hashed name; those files are served with
+the best precompressed copy the client accepts and cached for a year.
+
+Build ahead of a deploy (optional, the app builds at startup anyway):
+    python assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+PATTERNS = (('css', '.css'), ('js', '.js'))
+MANIFEST = 'assets.json'
+HASHED = re.compile(r'\.[0-9a-f]{12}\.(css|js)$')
+
+# Precompressed copies in order of preference: (Content-Encoding, suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _write(path, data):
+    if os.path.exists(path):
+        return # same name means same content
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def sources(static_folder=STATIC_FOLDER):
+    for subdir, ext in PATTERNS:
+        folder = os.path.join(static_folder, subdir)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(ext) and not HASHED.search(name):
+                yield f"{subdir}/{name}"
+
+
+def build(static_folder=STATIC_FOLDER):
+    """Write the hashed and compressed copies, remove outdated ones; returns {logical path: hashed path}."""
+    manifest = {}
+    for logical in sources(static_folder):
+        with open(os.path.join(static_folder, logical), 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(logical)
+        hashed = f"{stem}.{fingerprint(data)}{ext}"
+        path = os.path.join(static_folder, hashed)
+        _write(path, data)
+        _write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli:
+            _write(path + '.br', brotli.compress(data, quality=11))
+        manifest[logical] = hashed
+
+    # Drop copies of earlier versions
+    current = set(manifest.values())
+    for subdir, ext in PATTERNS:
+        folder = os.path.join(static_folder, subdir)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            base = name[:-3] if name.endswith(('.gz', '.br')) else name
+            if HASHED.search(base) and f"{subdir}/{base}" not in current:
+                try:
+                    os.remove(os.path.join(folder, name))
+                except FileNotFoundError:
+                    pass # another worker got there first
+
+    tmp = os.path.join(static_folder, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(static_folder, MANIFEST))
+    return manifest
+
+
+def precompressed(static_folder, hashed, accept_encodings):
+    """(file name, Content-Encoding) of the best stored copy of `hashed` the client accepts, or (hashed, None)."""
+    for encoding, suffix in ENCODINGS:
+        if encoding in accept_encodings and os.path.exists(os.path.join(static_folder, hashed + suffix)):
+            return hashed + suffix, encoding
+    return hashed, None
+
+
+if __name__ == "__main__":
+    manifest = build()
+    for logical, hashed in manifest.items():
+        sizes = [os.path.getsize(os.path.join(STATIC_FOLDER, hashed + s)) for s in ('', '.gz', '.br')
+                 if os.path.exists(os.path.join(STATIC_FOLDER, hashed + s))]
+        print(f"{logical:<24} -> {hashed:<36} " + " / ".join(f"{n / 1024:.1f} KB" for n in sizes))
+    if not brotli:
+        print("\nbrotli is not installed (pip install brotli); only gzip copies were written.")
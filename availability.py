@@ -0,0 +1,106 @@
+import datetime
+import threading
+import time
+
+
+def to_time(value):
+    """mysql-connector returns TIME columns as timedelta; normalise to datetime.time."""
+    if isinstance(value, datetime.timedelta):
+        return (datetime.datetime.min + value).time()
+    return value
+
+
+class AvailabilityCache:
+    """
+    In-process cache of slot rows per date (one entry per 'YYYY-MM-DD').
+
+    When the date has a shared version (see occupancy.py), an entry stays
+    valid for up to `max_age` seconds as long as that version is unchanged.
+    Otherwise entries expire after `ttl` seconds, or earlier when a slot lock
+    held in the entry runs out, so another worker's writes are picked up
+    quickly. Write routes also call invalidate() for the dates they touch.
+    """
+
+    def __init__(self, ttl=5.0, max_age=300.0, max_entries=256):
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.enabled = True
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, date_str, loader, version=None):
+        """
+        Return cached rows for date_str, calling loader(date_str) on a miss.
+        `version` is an optional callable returning the date's shared version.
+        """
+        now = time.time()
+        current = version() if version else None
+        with self._lock:
+            entry = self._entries.get(date_str)
+            if self.enabled and entry and entry[0] > now and entry[1] == current:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        rows = loader(date_str)
+        if rows is None:
+            return None
+
+        # The loader may have just published the date's state
+        current = version() if version else None
+        if current is not None:
+            expires = now + self.max_age
+        else:
+            expires = now + self.ttl
+            for r in rows:
+                if r['locked_until']:
+                    expires = min(expires, time.mktime(r['locked_until'].timetuple()))
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                while len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[date_str] = (expires, current, rows)
+        return rows
+
+    def invalidate(self, date_str):
+        with self._lock:
+            self._entries.pop(date_str, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def build_slot_views(rows, date_str, now=None):
+    """Turn cached slot rows into the JSON shape used by the booking page."""
+    now = now or datetime.datetime.now()
+    today_str = now.strftime('%Y-%m-%d')
+    is_today = (date_str == today_str)
+    is_past_date = (date_str < today_str)
+
+    slots = []
+    for r in rows:
+        start_t = to_time(r['start_time'])
+        end_t = to_time(r['end_time'])
+
+        # If date is in past, all slots are past. If today, check time
+        slot_is_past = is_past_date or (is_today and datetime.datetime.combine(now.date(), start_t) < now)
+        is_locked = bool(r['locked_until'] and r['locked_until'] > now)
+
+        slots.append({
+            "id": r['id'],
+            "display": start_t.strftime("%I:%M %p"),
+            "start_time": str(start_t), # HH:MM:SS
+            "end_time": str(end_t),
+            "is_active": bool(r['is_active']),
+            "is_past": slot_is_past,
+            "is_booked": bool(r['is_booked']),
+            "is_locked": is_locked,
+            "available": bool(r['is_active']) and not (slot_is_past or r['is_booked'] or is_locked)
+        })
+    return slots
@@ -0,0 +1,81 @@
+"""
+Benchmark JSON encoding of the API payloads: Flask's default provider
+against FastJSONProvider (fast_json.py), plus what the compression layer
+makes of each payload. The outputs must be identical (both compact), and
+the script fails if they are not. Runs without the database on rows
+shaped like the tournaments table and /api/slots.
+
+    python bench_json.py [iterations]
+"""
+import datetime
+import decimal
+import gzip
+import sys
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import compression
+from availability import build_slot_views
+from fast_json import FastJSONProvider
+
+
+def tournament_rows(n=40):
+    start = datetime.date.today()
+    return [{
+        'id': i,
+        'title': f"Weekend League {i} – Box Cricket",
+        'description': "Six-a-side tournament with knockout finals. Teams of 8, all equipment provided." * 2,
+        'event_date': start + datetime.timedelta(days=7 * i),
+        'entry_fee': decimal.Decimal('1500.00') + i,
+        'image_url': f"{i:064x}.png",
+        'created_at': datetime.datetime(2026, 1, 1, 12, 0) + datetime.timedelta(hours=i),
+    } for i in range(n)]
+
+
+def slot_rows():
+    date = datetime.date.today() + datetime.timedelta(days=1)
+    rows = [{
+        'id': 1000 + h,
+        'start_time': datetime.timedelta(hours=h),
+        'end_time': datetime.timedelta(hours=h + 1),
+        'is_active': 1,
+        'is_booked': h % 3 == 0,
+        'locked_until': None,
+    } for h in range(6, 24)]
+    return build_slot_views(rows, date.isoformat())
+
+
+def timeit(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench(iterations):
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    ok = True
+    print(f"{'payload':<14}{'default us':>12}{'fast us':>10}{'speedup':>9}{'bytes':>8}{'gzip':>7}{'br':>7}")
+    for name, payload in (('tournaments', tournament_rows()), ('slots', slot_rows())):
+        expected = default.dumps(payload, separators=(',', ':'))
+        actual = fast.dumps(payload, separators=(',', ':'))
+        if actual != expected:
+            ok = False
+            print(f"{name}: output differs from the default provider")
+            continue
+        t_default = timeit(lambda: default.dumps(payload, separators=(',', ':')), iterations)
+        t_fast = timeit(lambda: fast.dumps(payload, separators=(',', ':')), iterations)
+        data = expected.encode()
+        gz = len(gzip.compress(data, compresslevel=6))
+        br = len(compression.brotli.compress(data, quality=4)) if compression.brotli else '-'
+        print(f"{name:<14}{t_default:>12.1f}{t_fast:>10.1f}{t_default / t_fast:>8.2f}x{len(data):>8}{gz:>7}{br:>7}")
+    print("\n" + ("✅ Output identical to Flask's default provider." if ok else "❌ Output mismatch."))
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2000) else 1)
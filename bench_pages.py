@@ -0,0 +1,57 @@
+"""
+Time anonymous loads of the public pages (/, /booking, /pricing,
+/tournaments) through the Flask test client, with the rendered-page cache
+on and off (see page_cache.py). Needs the MySQL database for the pricing
+and tournament rows; uses its own occupancy/version files so a running
+server is left alone.
+
+    python bench_pages.py [requests_per_page]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+scratch = tempfile.mkdtemp(prefix='dmax_bench_')
+os.environ.update({
+    'OCCUPANCY_FILE': os.path.join(scratch, 'occupancy.bin'),
+    'VERSIONS_FILE': os.path.join(scratch, 'versions.bin'),
+    'LOCK_REAPER_INTERVAL': '0',
+})
+
+import app as web
+
+PAGES = ['/', '/booking', '/pricing', '/tournaments']
+
+
+def run(client, url, n):
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        res = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        timings.append((time.perf_counter() - start) * 1000)
+        if res.status_code != 200:
+            raise SystemExit(f"{url} -> {res.status_code}")
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1], len(res.data)
+
+
+def bench(n):
+    client = web.app.test_client()
+    print(f"{n} requests per page\n")
+    print(f"{'page':<14}{'cache':<7}{'p50 ms':>8}{'p99 ms':>8}{'bytes':>8}")
+    for enabled in (False, True):
+        web.page_cache.enabled = enabled
+        web.reference_cache.enabled = enabled
+        web.page_cache.clear()
+        web.reference_cache.clear()
+        for url in PAGES:
+            client.get(url) # warm templates (and the cache, when on)
+            p50, p99, size = run(client, url, n)
+            print(f"{url:<14}{'on' if enabled else 'off':<7}{p50:>8.2f}{p99:>8.2f}{size:>8}")
+    print(f"\n{web.page_cache.stats()}")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
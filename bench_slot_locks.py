@@ -0,0 +1,126 @@
+"""
+Benchmark the slot lock backends (see slot_locks.py): acquire throughput and
+latency percentiles with several threads competing for the same slots.
+
+Each thread repeatedly picks a random slot, acquires it, and releases it
+again half of the time, so there is a steady mix of new holds, refreshes
+and conflicts. The 'table' and 'named' backends need the MySQL database
+(they use real slot ids and remove their own holds afterwards); 'memory'
+runs anywhere.
+
+    python bench_slot_locks.py [ops_per_thread] [threads] [backend ...]
+"""
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+import mysql.connector
+from config import Config
+import slot_locks
+
+
+def connect():
+    return mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DB
+    )
+
+
+def thread_connections():
+    """Provider handing each thread its own long-lived connection."""
+    local = threading.local()
+    opened = []
+
+    def provider():
+        if getattr(local, 'conn', None) is None:
+            local.conn = connect()
+            opened.append(local.conn)
+        return local.conn
+    return provider, opened
+
+
+def slot_ids(count=200):
+    try:
+        conn = connect()
+    except mysql.connector.Error:
+        return list(range(1, count + 1)), False
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM slots ORDER BY slot_date DESC, start_time LIMIT %s", (count,))
+    ids = [r[0] for r in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return ids, True
+
+
+def run(backend, ids, ops, threads):
+    latencies = []
+    outcomes = {slot_locks.LOCKED: 0, slot_locks.REFRESHED: 0, slot_locks.TAKEN: 0}
+    owners = [f"bench-{uuid.uuid4().hex[:12]}" for _ in range(threads)]
+    merge = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    def worker(owner):
+        rng = random.Random(owner)
+        local_lat, local_out = [], dict.fromkeys(outcomes, 0)
+        start.wait()
+        for _ in range(ops):
+            slot_id = rng.choice(ids)
+            t = time.perf_counter()
+            status, _ = backend.acquire(slot_id, owner, 60)
+            local_lat.append((time.perf_counter() - t) * 1000)
+            local_out[status] += 1
+            if status != slot_locks.TAKEN and rng.random() < 0.5:
+                backend.release([slot_id], owner=owner)
+        with merge:
+            latencies.extend(local_lat)
+            for k, v in local_out.items():
+                outcomes[k] += v
+
+    pool = [threading.Thread(target=worker, args=(o,)) for o in owners]
+    for t in pool:
+        t.start()
+    start.wait()
+    began = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - began
+
+    for owner in owners:
+        backend.release(ids, owner=owner)
+    return latencies, outcomes, elapsed
+
+
+def report(name, latencies, outcomes, elapsed):
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"{name:<7} {len(latencies) / elapsed:10.0f} acquires/s   "
+          f"p50 {statistics.median(latencies):7.3f} ms   p99 {p99:7.3f} ms   "
+          f"locked {outcomes[slot_locks.LOCKED]}  refreshed {outcomes[slot_locks.REFRESHED]}  taken {outcomes[slot_locks.TAKEN]}")
+
+
+def bench(ops=500, threads=8, names=slot_locks.BACKENDS):
+    ids, have_db = slot_ids()
+    print(f"{threads} threads x {ops} acquires over {len(ids)} slots\n")
+    for name in names:
+        if name != 'memory' and not have_db:
+            print(f"{name:<7} skipped (no MySQL connection)")
+            continue
+        provider, opened = thread_connections()
+        backend = slot_locks.create_backend(name, provider, wait=Config.SLOT_LOCK_WAIT)
+        try:
+            report(name, *run(backend, ids, ops, threads))
+        finally:
+            for conn in opened:
+                conn.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    bench(int(args[0]) if len(args) > 0 else 500,
+          int(args[1]) if len(args) > 1 else 8,
+          args[2:] or slot_locks.BACKENDS)
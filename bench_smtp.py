@@ -0,0 +1,91 @@
+"""
+Benchmark: one SMTP connection per email (the old send_email_core) versus
+the shared SMTPSession, against a local server.
+
+Uses aiosmtpd as the stand-in when it is installed (pip install aiosmtpd),
+otherwise the minimal FakeSMTPServer from local_stubs.py. Both run without
+TLS, so the real-world gap (a TLS handshake per Gmail connection) is larger.
+
+    python bench_smtp.py [count]
+"""
+import smtplib
+import socket
+import statistics
+import sys
+import time
+import warnings
+
+from local_stubs import FakeSMTPServer
+from notifications import SMTPSession, build_email
+
+USERNAME = 'bench@example.com'
+PASSWORD = 'secret'
+
+
+def start_server():
+    try:
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.smtp import AuthResult
+    except ImportError:
+        server = FakeSMTPServer().start()
+        return 'local_stubs.FakeSMTPServer', server.port, server.stop
+
+    warnings.filterwarnings('ignore', message='Session.login_data')
+
+    class Sink:
+        async def handle_DATA(self, server, session, envelope):
+            return '250 OK'
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    controller = Controller(
+        Sink(), hostname='127.0.0.1', port=port,
+        auth_require_tls=False,
+        authenticator=lambda *args: AuthResult(success=True)
+    )
+    controller.start()
+    return 'aiosmtpd', port, controller.stop
+
+
+def per_message(port, messages):
+    latencies = []
+    for msg in messages:
+        started = time.perf_counter()
+        server = smtplib.SMTP('127.0.0.1', port)
+        server.login(USERNAME, PASSWORD)
+        server.send_message(msg)
+        server.quit()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def shared_session(port, messages):
+    session = SMTPSession('127.0.0.1', port, USERNAME, PASSWORD, use_tls=False)
+    results = session.send_many(messages)
+    session.close()
+    failed = [r for r in results if not r['ok']]
+    if failed:
+        print(f"   {len(failed)} failed, e.g. {failed[0]['error']}")
+    return [r['latency_ms'] for r in results]
+
+
+def report(label, latencies):
+    total = sum(latencies)
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<22} total {total:8.1f} ms   mean {statistics.mean(latencies):6.2f} ms   p95 {p95:6.2f} ms")
+
+
+def bench(count=200):
+    name, port, stop = start_server()
+    print(f"Sending {count} emails to {name} on port {port}\n")
+    messages = [build_email(USERNAME, f"player{i}@example.com", "Booking Confirmed", "Your slot is confirmed.") for i in range(count)]
+    try:
+        report("connect per message", per_message(port, messages))
+        report("shared SMTPSession", shared_session(port, messages))
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
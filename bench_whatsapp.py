@@ -0,0 +1,86 @@
+"""
+Benchmark: a new Twilio Client per WhatsApp message (the old
+send_whatsapp_core) versus the shared, pooled WhatsAppSender, against the
+local FakeTwilioServer. Also checks that send_many keeps to the rate limit.
+
+    python bench_whatsapp.py [count] [messages_per_second]
+"""
+import statistics
+import sys
+import time
+
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from local_stubs import FakeTwilioServer
+from notifications import WhatsAppSender
+
+SID = 'AC' + '0' * 32
+TOKEN = 'secret'
+FROM = 'whatsapp:+14155238886'
+
+
+class StubHttpClient(TwilioHttpClient):
+    """Unpooled client (a fresh connection per request) redirected to the stub."""
+
+    def __init__(self, base):
+        super().__init__(pool_connections=False)
+        self.base = base
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, url.replace('https://api.twilio.com', self.base), *args, **kwargs)
+
+
+def client_per_message(server, messages):
+    latencies = []
+    for to, body in messages:
+        started = time.perf_counter()
+        Client(SID, TOKEN, http_client=StubHttpClient(server.url)).messages.create(from_=FROM, body=body, to=to)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(label, latencies, connections):
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<26} total {sum(latencies):8.1f} ms   mean {statistics.mean(latencies):6.2f} ms   p95 {p95:6.2f} ms   connections {connections}")
+
+
+def bench(count=100, rate=20.0):
+    server = FakeTwilioServer(latency=0.02).start()
+    messages = [(f"whatsapp:+9199999{i:05d}", "Booking confirmed!") for i in range(count)]
+    print(f"Sending {count} WhatsApp messages to FakeTwilioServer on port {server.port}\n")
+    try:
+        report("new Client per message", client_per_message(server, messages), len(server.connections))
+
+        server.connections.clear()
+        sender = WhatsAppSender(SID, TOKEN, FROM, rate=1e9, burst=count, api_base=server.url)
+        latencies = []
+        for to, body in messages:
+            t = time.perf_counter()
+            sender.send(to, body)
+            latencies.append((time.perf_counter() - t) * 1000)
+        report("shared WhatsAppSender", latencies, len(server.connections))
+
+        server.connections.clear()
+        sender = WhatsAppSender(SID, TOKEN, FROM, rate=1e9, burst=count, max_workers=8, api_base=server.url)
+        started = time.perf_counter()
+        results = sender.send_many(messages)
+        elapsed = time.perf_counter() - started
+        failed = [r for r in results if not r['ok']]
+        print(f"{'send_many (8 workers)':<26} total {elapsed * 1000:8.1f} ms   failed {len(failed)}   connections {len(server.connections)}")
+
+        print(f"\nRate limit check: {count} messages at {rate}/s, burst 5")
+        sender = WhatsAppSender(SID, TOKEN, FROM, rate=rate, burst=5, max_workers=8, api_base=server.url)
+        started = time.perf_counter()
+        sender.send_many(messages)
+        elapsed = time.perf_counter() - started
+        expected = (count - 5) / rate
+        print(f"   took {elapsed:.2f} s (limit allows no less than {expected:.2f} s); {sender.stats}")
+        print("✅ Rate limit respected." if elapsed >= expected * 0.95 else "❌ Sent faster than the limit.")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+          float(sys.argv[2]) if len(sys.argv) > 2 else 20.0)
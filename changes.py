@@ -0,0 +1,70 @@
+"""
+Change log behind the admin dashboard's delta sync (/admin/api/changes).
+
+Every write to a booking group, tournament (including its registrations)
+or contact message calls record() on the writing transaction, adding a
+change_log row. The row's AUTO_INCREMENT id is the version a client syncs
+from: since() returns which entities changed after a version, and the
+dashboard re-reads just those rows. Deleted entities are simply absent
+when re-read.
+
+Ids are assigned at insert but become visible at commit, so a slow
+transaction can commit an id below a version a client already holds.
+since() therefore also returns everything logged in the last
+OVERLAP_SECONDS; re-applying a row is harmless.
+"""
+
+ENTITIES = ('booking_group', 'tournament', 'contact_message')
+OVERLAP_SECONDS = 30
+
+CHANGED_SINCE = """
+    SELECT entity, entity_id FROM change_log
+    WHERE id > %s OR changed_at >= NOW() - INTERVAL %s SECOND
+    GROUP BY entity, entity_id
+    LIMIT %s
+"""
+
+
+def record(cursor, entity, *ids):
+    """Log a change to the given rows on the caller's transaction."""
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown change log entity: {entity}")
+    ids = [i for i in ids if i is not None]
+    if ids:
+        cursor.executemany("INSERT INTO change_log (entity, entity_id) VALUES (%s, %s)",
+                           [(entity, i) for i in ids])
+
+
+def latest(cursor):
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS version FROM change_log")
+    row = cursor.fetchone()
+    return int(row['version'] if isinstance(row, dict) else row[0])
+
+
+def since(cursor, version, limit=500):
+    """
+    ({entity: set of ids}, new version), or (None, new version) when the log
+    no longer reaches back to `version` (pruned) or more than `limit` rows
+    changed; the client should then reload everything.
+    """
+    current = latest(cursor)
+    cursor.execute("SELECT MIN(id) AS oldest FROM change_log")
+    row = cursor.fetchone()
+    oldest = row['oldest'] if isinstance(row, dict) else row[0]
+    if oldest is not None and version < oldest - 1:
+        return None, current
+
+    cursor.execute(CHANGED_SINCE, (version, OVERLAP_SECONDS, limit + 1))
+    rows = cursor.fetchall()
+    if len(rows) > limit:
+        return None, current
+    changed = {entity: set() for entity in ENTITIES}
+    for r in rows:
+        entity, entity_id = (r['entity'], r['entity_id']) if isinstance(r, dict) else r
+        changed[entity].add(entity_id)
+    return changed, current
+
+
+def prune(cursor, keep_days=7):
+    cursor.execute("DELETE FROM change_log WHERE changed_at < NOW() - INTERVAL %s DAY", (keep_days,))
+    return cursor.rowcount
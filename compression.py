@@ -0,0 +1,53 @@
+"""
+On-the-fly response compression (an after_request hook in app.py).
+
+Only complete 200 responses of a compressible type above a size
+threshold are compressed; responses that are already encoded (the page
+cache, precompressed static assets), streamed or sent from files are left
+alone. Brotli is preferred when the client accepts it and the brotli
+package is installed, otherwise gzip.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = frozenset((
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+))
+
+
+def choose_encoding(accept_encodings):
+    if brotli and 'br' in accept_encodings:
+        return 'br'
+    if 'gzip' in accept_encodings:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, accept_encodings, min_size=500, gzip_level=6, brotli_quality=4):
+    """Compress response in place if it qualifies; returns it."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=brotli_quality))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=gzip_level))
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes are a different representation of the same resource
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
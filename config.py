@@ -1,4 +1,8 @@
 import os
+from dotenv import load_dotenv
+
+# Load .env before the class body reads os.environ
+load_dotenv()
 
 class Config:
     # MySQL Configuration
@@ -8,15 +12,102 @@ class Config:
     MYSQL_PASSWORD = 'root'       # Default empty password (common for XAMPP/WAMP or fresh installs). CHANGE THIS if you have a password!
     MYSQL_DB = 'box_cricket_db'
 
+    # Connection pool (one pool per gunicorn worker)
+    MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 5))
+    MYSQL_POOL_TIMEOUT = float(os.environ.get('MYSQL_POOL_TIMEOUT', 5))       # seconds to wait for a free connection
+    MYSQL_POOL_PING_AFTER = float(os.environ.get('MYSQL_POOL_PING_AFTER', 10)) # ping connections idle longer than this
+
+    # Per-date availability cache (seconds). Bounds how stale another worker's view can be.
+    AVAILABILITY_CACHE_TTL = float(os.environ.get('AVAILABILITY_CACHE_TTL', 5))
+    # Dates tracked in the shared occupancy map are validated by version instead, up to this age.
+    AVAILABILITY_CACHE_MAX_AGE = float(os.environ.get('AVAILABILITY_CACHE_MAX_AGE', 300))
+
+    # Memory-mapped slot occupancy file shared by all workers on a node (default: /dev/shm)
+    OCCUPANCY_FILE = os.environ.get('OCCUPANCY_FILE')
+    # Pricing/tournament rows cached per worker (seconds; admin edits invalidate immediately).
+    # REFERENCE_CACHE=off reads the tables on every request, for debugging.
+    REFERENCE_CACHE_ENABLED = os.environ.get('REFERENCE_CACHE', 'on').lower() not in ('off', 'false', '0')
+    REFERENCE_CACHE_TTL = float(os.environ.get('REFERENCE_CACHE_TTL', 300))
+    REFERENCE_CACHE_MAX_ENTRIES = int(os.environ.get('REFERENCE_CACHE_MAX_ENTRIES', 64))
+
+    # Rendered public pages (home, booking, pricing, tournaments), kept per worker until their data changes.
+    # PAGE_CACHE=off renders on every request.
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE', 'on').lower() not in ('off', 'false', '0')
+    PAGE_CACHE_TTL = float(os.environ.get('PAGE_CACHE_TTL', 300))
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 128))
+
+    # Version counters behind the ETags of tournament and pricing pages (default: next to the occupancy file)
+    VERSIONS_FILE = os.environ.get('VERSIONS_FILE')
+
+    # Live availability stream (/api/availability/stream). Each open stream holds a worker thread or greenlet,
+    # so serve it with gthread or gevent workers (see README).
+    SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', 0.5))       # seconds between occupancy map checks
+    SSE_KEEPALIVE_SECONDS = float(os.environ.get('SSE_KEEPALIVE_SECONDS', 15))
+    SSE_MAX_SECONDS = float(os.environ.get('SSE_MAX_SECONDS', 300))           # then the browser reconnects
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 32))              # per worker; keep below gunicorn --threads
+
+    # Slot holds while a customer pays: 'table' (slot_locks rows), 'named' (GET_LOCK + lease rows)
+    # or 'memory' (in-process; only for a single worker process). See slot_locks.py.
+    SLOT_LOCK_BACKEND = os.environ.get('SLOT_LOCK_BACKEND', 'table')
+    SLOT_LOCK_TTL = int(os.environ.get('SLOT_LOCK_TTL', 300))
+    SLOT_LOCK_WAIT = float(os.environ.get('SLOT_LOCK_WAIT', 2))   # 'named': seconds to queue for a slot's GET_LOCK
+    LOCK_REAPER_INTERVAL = float(os.environ.get('LOCK_REAPER_INTERVAL', 5))   # seconds between expired-hold cleanups; 0 = not in web workers
+    LOCK_REAPER_LOCKFILE = os.environ.get('LOCK_REAPER_LOCKFILE')   # flock'd to elect one reaper per node (default: next to OCCUPANCY_FILE)
+
+    # Weeks of slots slot_schedule.py keeps generated ahead from the weekly templates
+    SLOT_HORIZON_WEEKS = int(os.environ.get('SLOT_HORIZON_WEEKS', 26))
+
+    # CSS/JS are content-hashed and precompressed at startup (assets.py); ASSET_FINGERPRINTS=off links the plain files
+    ASSET_FINGERPRINTS = os.environ.get('ASSET_FINGERPRINTS', 'on').lower() not in ('off', 'false', '0')
+
+    # Compression of HTML/JSON/text responses above COMPRESS_MIN_BYTES (brotli if installed, else gzip)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION', 'on').lower() not in ('off', 'false', '0')
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 500))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+    # Uploads: Werkzeug parses (and spools) the whole multipart body before a view runs, so
+    # MAX_REQUEST_BYTES (413 from the Content-Length / while reading) is the real bound on what
+    # is received. It defaults to the largest image allowed plus room for the other form fields.
+    PAYMENT_PROOF_MAX_BYTES = int(os.environ.get('PAYMENT_PROOF_MAX_BYTES', 2 * 1024 * 1024))
+    POSTER_MAX_BYTES = int(os.environ.get('POSTER_MAX_BYTES', 2 * 1024 * 1024))
+    MAX_REQUEST_BYTES = int(os.environ.get('MAX_REQUEST_BYTES', max(PAYMENT_PROOF_MAX_BYTES, POSTER_MAX_BYTES) + 64 * 1024))
+
+    # Payment screenshot thumbnails for the admin dashboard (needs Pillow; see thumbnail_worker.py)
+    THUMBNAIL_SIZE = int(os.environ.get('THUMBNAIL_SIZE', 240))            # longest side, px
+    THUMBNAIL_QUALITY = int(os.environ.get('THUMBNAIL_QUALITY', 70))
+    THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))        # processes in thumbnail_worker.py
+    THUMBNAIL_POLL_INTERVAL = float(os.environ.get('THUMBNAIL_POLL_INTERVAL', 2))
+
     # Security
     SECRET_KEY = 'dev-secret-key-change-in-production'
 
     # Notification Credentials (Env vars preferred, fallbacks here)
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() != 'false'
+    MAIL_KEEPALIVE = float(os.environ.get('MAIL_KEEPALIVE', 60))   # NOOP-check the SMTP session after this many idle seconds
     
     
     TWILIO_SID = os.environ.get('TWILIO_SID')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
     TWILIO_WHATSAPP_NUM = os.environ.get('TWILIO_WHATSAPP_NUM')
     ADMIN_PHONE = os.environ.get('ADMIN_PHONE')
+    TWILIO_API_BASE = os.environ.get('TWILIO_API_BASE')   # e.g. http://127.0.0.1:8099 to send to a local stub
+    TWILIO_TIMEOUT = float(os.environ.get('TWILIO_TIMEOUT', 10))
+    TWILIO_MESSAGES_PER_SECOND = float(os.environ.get('TWILIO_MESSAGES_PER_SECOND', 1))   # match the sender's Twilio throughput
+    TWILIO_BURST = int(os.environ.get('TWILIO_BURST', 5))
+    TWILIO_MAX_WORKERS = int(os.environ.get('TWILIO_MAX_WORKERS', 4))   # threads used by WhatsAppSender.send_many
+
+    # Notification outbox (drained by notification_worker.py)
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 2))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+    OUTBOX_BACKOFF_SECONDS = int(os.environ.get('OUTBOX_BACKOFF_SECONDS', 30))   # doubles on every retry
+    OUTBOX_EMAIL_CONCURRENCY = int(os.environ.get('OUTBOX_EMAIL_CONCURRENCY', 1))   # emails share one SMTP session
+    OUTBOX_WHATSAPP_CONCURRENCY = int(os.environ.get('OUTBOX_WHATSAPP_CONCURRENCY', 4))
+
+    # Admin dashboard delta sync (/admin/api/changes)
+    CHANGE_LOG_KEEP_DAYS = int(os.environ.get('CHANGE_LOG_KEEP_DAYS', 7))   # older dashboards reload in full
+    DASHBOARD_SYNC_SECONDS = float(os.environ.get('DASHBOARD_SYNC_SECONDS', 10))   # how often an open dashboard polls for changes
@@ -0,0 +1,158 @@
+import os
+import queue
+import threading
+import time
+
+import mysql.connector
+
+# Fix for Error 1055 (ONLY_FULL_GROUP_BY) - Allow non-aggregated columns.
+# Applied once per physical connection, not once per request.
+SESSION_INIT_SQL = "SET SESSION sql_mode=(SELECT REPLACE(@@sql_mode,'ONLY_FULL_GROUP_BY',''))"
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+class PooledConnection:
+    """
+    Request-scoped handle around a pooled connection.
+
+    Routes still call conn.close() when they are done; that is a no-op here
+    because the connection goes back to the pool on app-context teardown.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class ConnectionPool:
+    """
+    Fixed-size MySQL connection pool for a single process.
+
+    Connections are opened lazily up to `size`. A connection that has been
+    idle for more than `ping_after` seconds is pinged before reuse and
+    replaced if the server has dropped it.
+    """
+
+    def __init__(self, size=5, timeout=5.0, ping_after=10.0, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.connect_args = connect_args
+        self.pid = os.getpid()
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.connect_args)
+        cursor = conn.cursor()
+        cursor.execute(SESSION_INIT_SQL)
+        cursor.close()
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+        with self._lock:
+            self._opened -= 1
+            self._discarded += 1
+
+    def _open_new(self):
+        try:
+            return self._connect()
+        except mysql.connector.Error:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds for one to free up."""
+        started = time.monotonic()
+        conn = None
+        idle_since = None
+        waited = False
+
+        try:
+            conn, idle_since = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                conn = self._open_new()
+            else:
+                waited = True
+                try:
+                    conn, idle_since = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolExhausted(f"No database connection free after {self.timeout}s")
+
+        # Validate connections that have been sitting idle
+        if idle_since is not None and time.monotonic() - idle_since > self.ping_after:
+            try:
+                conn.ping(reconnect=False)
+            except mysql.connector.Error:
+                self._discard(conn)
+                with self._lock:
+                    self._opened += 1
+                conn = self._open_new()
+
+        wait = time.monotonic() - started
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left uncommitted."""
+        with self._lock:
+            self._in_use -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql.connector.Error:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pid': self.pid,
+                'size': self.size,
+                'open': self._opened,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'wait_avg_ms': round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'wait_max_ms': round(self._wait_max * 1000, 3),
+            }
@@ -0,0 +1,71 @@
+"""
+Faster JSON for API responses.
+
+FastJSONProvider produces the same output as Flask's default provider
+(sorted keys, ASCII-escaped, Decimal as a string, dates as RFC 822 HTTP
+dates) but reuses one compact encoder instead of building a new one per
+call, and converts Decimal/date/datetime values through a per-type table
+with the date strings memoised, instead of an isinstance chain per value.
+datetime.time and timedelta (MySQL TIME columns), which the default
+provider rejects, are encoded as 'HH:MM:SS'.
+
+Payloads that only change with a table (e.g. the tournament list) can be
+encoded once with encode() and sent with json_response().
+"""
+import datetime
+import decimal
+import functools
+import json
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+
+@functools.lru_cache(maxsize=4096)
+def _http_date(value):
+    return http_date(value)
+
+
+def _timedelta(value):
+    seconds = int(value.total_seconds())
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+CONVERTERS = {
+    decimal.Decimal: str,
+    datetime.date: _http_date,
+    datetime.datetime: _http_date,
+    datetime.time: lambda t: t.isoformat(),
+    datetime.timedelta: _timedelta,
+    uuid.UUID: str,
+}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._compact = json.JSONEncoder(
+            default=self.default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+            separators=(',', ':'), check_circular=False
+        )
+
+    def default(self, o):
+        convert = CONVERTERS.get(type(o))
+        if convert is not None:
+            return convert(o)
+        return DefaultJSONProvider.default(o) # subclasses, dataclasses, Markup
+
+    def encode(self, obj):
+        """Compact encoding, as used by jsonify() outside debug mode."""
+        return self._compact.encode(obj)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs == {'separators': (',', ':')}:
+            return self._compact.encode(obj)
+        return super().dumps(obj, **kwargs)
+
+    def json_response(self, payload, status=200):
+        """Response for an already encoded JSON string, shaped like jsonify()'s."""
+        return self._app.response_class(f"{payload}\n", status=status, mimetype=self.mimetype)
@@ -0,0 +1,163 @@
+"""
+Live slot events for the booking page's Server-Sent Events stream.
+
+One AvailabilityHub per worker process watches the dates its clients are
+looking at in the shared occupancy map (occupancy.py), which every worker
+updates when a slot is held, booked or released. A single poller thread
+diffs each watched date against its last snapshot and appends events to
+one shared log; every open stream waits on the same condition variable
+and picks its date's events from the log. A change therefore costs one
+memory read per process, however many clients are connected, and never
+touches MySQL.
+
+Events: lock, unlock (hold released or run out), book, reject (a booking
+rejected or deleted, slot free again) and reload (the date's slots were
+changed by an admin; the client refetches /api/availability).
+
+An open stream holds a worker thread, so a hub takes at most max_streams
+subscribers; past that subscribe() returns None and the page polls instead.
+"""
+import collections
+import os
+import threading
+import time
+
+from occupancy import SLOTS_PER_DAY
+
+
+def slot_time(idx):
+    return f"{idx // 2:02d}:{idx % 2 * 30:02d}:00"
+
+
+def diff(old, new):
+    """Events turning snapshot old into new; each is (type, slot index, lock expiry or None)."""
+    events = []
+    _, old_booked, old_locked, _ = old
+    _, booked, locked, expiry = new
+    for idx in range(SLOTS_PER_DAY):
+        bit = 1 << idx
+        was_booked, is_booked = old_booked & bit, booked & bit
+        was_locked, is_locked = old_locked & bit, locked & bit
+        if is_booked and not was_booked:
+            events.append(('book', idx, None)) # booking also drops the hold
+        elif was_booked and not is_booked:
+            events.append(('reject', idx, None))
+        if is_locked and (not was_locked or old[3][idx] != expiry[idx]):
+            events.append(('lock', idx, expiry[idx]))
+        elif was_locked and not is_locked and not is_booked:
+            events.append(('unlock', idx, None))
+    return events
+
+
+class AvailabilityHub:
+    """
+    subscribe(date) -> cursor, or None when max_streams are open;
+    wait(date, cursor, timeout) -> (events, cursor); unsubscribe(date).
+    Events are dicts ready to be sent as JSON.
+    """
+
+    def __init__(self, occupancy, interval=0.5, history=1024, max_streams=None):
+        self.occupancy = occupancy
+        self.interval = interval
+        self.max_streams = max_streams
+        self._streams = 0
+        self._turned_away = 0
+        self._cond = threading.Condition()
+        self._log = collections.deque(maxlen=history)   # (seq, date, event)
+        self._seq = 0
+        self._watched = {}   # date -> [subscribers, snapshot or None]
+        self._thread = None
+        self._pid = None
+
+    def subscribe(self, date):
+        with self._cond:
+            if self.max_streams is not None and self._streams >= self.max_streams:
+                self._turned_away += 1
+                return None
+            self._streams += 1
+            if date in self._watched:
+                self._watched[date][0] += 1
+            else:
+                self._watched[date] = [1, self.occupancy.live_state(date)]
+            self._ensure_thread()
+            return self._seq
+
+    def unsubscribe(self, date):
+        with self._cond:
+            self._streams -= 1
+            entry = self._watched.get(date)
+            if entry:
+                entry[0] -= 1
+                if entry[0] <= 0:
+                    del self._watched[date]
+
+    def wait(self, date, cursor, timeout):
+        """Events for date after cursor, waiting up to timeout for some; a client that fell behind the log gets reload."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._log and cursor < self._log[0][0] - 1:
+                    return [{'type': 'reload', 'date': date}], self._seq
+                events = [event for seq, d, event in self._log if seq > cursor and d == date]
+                cursor = self._seq
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events, cursor
+                self._cond.wait(remaining)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'dates': len(self._watched),
+                'subscribers': self._streams,
+                'max_streams': self.max_streams,
+                'turned_away': self._turned_away,
+                'events': self._seq,
+            }
+
+    def _ensure_thread(self):
+        # After a fork (gunicorn preload) the parent's thread doesn't exist here
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='availability-hub', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Availability hub poll failed: {e}")
+
+    def poll(self):
+        """Diff every watched date against its snapshot and publish the changes."""
+        now = time.time()
+        with self._cond:
+            dates = list(self._watched)
+        published = []
+        for date in dates:
+            state = self.occupancy.live_state(date, now)
+            with self._cond:
+                entry = self._watched.get(date)
+                if entry is None:
+                    continue
+                old, entry[1] = entry[1], state
+            if old is None:
+                continue # (re)appeared: the client's own refetch has this state
+            if state is None:
+                published.append((date, {'type': 'reload', 'date': date}))
+                continue
+            for kind, idx, expiry in diff(old, state):
+                event = {'type': kind, 'date': date, 'start_time': slot_time(idx)}
+                if expiry:
+                    event['until'] = expiry
+                published.append((date, event))
+            if state[0] != old[0]:
+                published.append((date, {'type': 'reload', 'date': date}))
+        if published:
+            with self._cond:
+                for date, event in published:
+                    self._seq += 1
+                    self._log.append((self._seq, date, event))
+                self._cond.notify_all()
@@ -0,0 +1,157 @@
+"""
+Local stand-ins for external services, for verify/benchmark scripts.
+
+FakeSMTPServer speaks just enough SMTP (EHLO, AUTH PLAIN, MAIL, RCPT, DATA,
+NOOP, RSET, QUIT) for smtplib, without TLS. Point the app at it with
+MAIL_SERVER=127.0.0.1, MAIL_PORT=<port>, MAIL_USE_TLS=false.
+
+FakeTwilioServer answers POST /2010-04-01/Accounts/<sid>/Messages.json like
+the Twilio Messages endpoint. Point the app at it with
+TWILIO_API_BASE=http://127.0.0.1:<port>.
+"""
+import json
+import re
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        self.reply("220 fake-smtp ready")
+        envelope = {'from': None, 'to': []}
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode(errors='replace').rstrip("\r\n")
+            verb = line.split(' ', 1)[0].upper()
+
+            if verb in ('EHLO', 'HELO'):
+                self.wfile.write(b"250-fake-smtp\r\n250-AUTH PLAIN\r\n250 OK\r\n")
+            elif verb == 'AUTH':
+                self.reply("235 Authentication successful")
+            elif verb == 'MAIL':
+                envelope = {'from': line[10:], 'to': []}
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                envelope['to'].append(line[8:])
+                self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(chunk)
+                with server.lock:
+                    server.messages.append(dict(envelope, data=b"".join(data)))
+                self.reply("250 OK: queued")
+            elif verb in ('NOOP', 'RSET'):
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _SMTPHandler)
+        self.messages = []
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _TwilioHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, so connection reuse is visible
+    disable_nagle_algorithm = True
+    path_re = re.compile(r'^/2010-04-01/Accounts/(\w+)/Messages\.json$')
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+        match = self.path_re.match(self.path)
+        if not match:
+            return self.reply(404, {'code': 20404, 'message': 'The requested resource was not found', 'status': 404})
+        if server.latency:
+            time.sleep(server.latency)
+
+        message = {
+            'sid': 'SM' + uuid.uuid4().hex,
+            'account_sid': match.group(1),
+            'from': form.get('From', [''])[0],
+            'to': form.get('To', [''])[0],
+            'body': form.get('Body', [''])[0],
+            'status': 'queued',
+            'direction': 'outbound-api',
+            'num_segments': '1',
+            'api_version': '2010-04-01',
+        }
+        with server.lock:
+            server.messages.append(dict(message, received_at=time.monotonic()))
+            server.connections.add(self.client_address)
+        self.reply(201, message)
+
+
+class FakeTwilioServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        super().__init__((host, port), _TwilioHandler)
+        self.latency = latency   # seconds added to every response, to mimic the real API
+        self.messages = []
+        self.connections = set()   # distinct client sockets seen
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
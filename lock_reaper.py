@@ -0,0 +1,149 @@
+"""
+Clears expired slot holds in the background.
+
+Request paths ignore expired slot_locks rows in their predicates, so the
+rows only need deleting eventually. One reaper per node does it: every web
+worker starts a LockReaper thread, and the thread that holds an exclusive
+flock on the reaper lock file is the leader; the others keep trying in
+case the leader's process exits. Each pass deletes expired holds (using
+the lock_expiry index) and clears their lock bits in the shared occupancy
+map, so every worker sees the freed slots straight away.
+
+It can also run as its own process instead (set LOCK_REAPER_INTERVAL=0 for
+the web workers):
+    python lock_reaper.py
+"""
+import os
+import threading
+import time
+
+import mysql.connector
+from config import Config
+from occupancy import OccupancyMap, default_path
+import slot_locks
+
+try:
+    import fcntl
+except ImportError: # Windows dev server: single process, no election needed
+    fcntl = None
+
+
+def connect():
+    return mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DB
+    )
+
+
+def default_lock_path():
+    return os.path.join(os.path.dirname(default_path()), 'dmax_lock_reaper.lock')
+
+
+class LockReaper:
+
+    def __init__(self, backend, occupancy=None, interval=5, lock_path=None, batch_size=500):
+        self.backend = backend
+        self.occupancy = occupancy
+        self.interval = interval
+        self.lock_path = lock_path or default_lock_path()
+        self.batch_size = batch_size
+        self.pid = os.getpid()
+        self.stats = {'passes': 0, 'reaped': 0, 'errors': 0}
+
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self):
+        return self._lock_file is not None
+
+    def try_lead(self):
+        """Take the node-wide reaper lock if it's free. True if this reaper is the leader."""
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            self._lock_file = True
+            return True
+        f = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    def run_once(self):
+        """
+        Delete expired holds and publish the change.
+        Returns {slot_date: [start_time, ...]} for the dates that changed.
+        """
+        changed = {}
+        while True:
+            rows = self.backend.reap(self.batch_size)
+            for slot_id, slot_date, start_time in rows:
+                changed.setdefault(slot_date, []).append(start_time)
+            if len(rows) < self.batch_size:
+                break
+        if self.occupancy is not None:
+            for slot_date, start_times in changed.items():
+                self.occupancy.clear_expired_locks(slot_date, start_times)
+        self.stats['passes'] += 1
+        self.stats['reaped'] += sum(len(t) for t in changed.values())
+        return changed
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            if self.try_lead():
+                try:
+                    changed = self.run_once()
+                    if changed:
+                        print(f"Lock reaper: cleared {sum(len(t) for t in changed.values())} expired hold(s) on "
+                              f"{', '.join(str(d) for d in sorted(changed))}")
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"Lock reaper error: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name='lock-reaper', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._lock_file not in (None, True):
+            self._lock_file.close()
+        self._lock_file = None
+
+
+def thread_connection():
+    """Connection provider for a reaper thread: one connection, reopened if it drops."""
+    state = {'conn': None}
+
+    def provider():
+        conn = state['conn']
+        if conn is None or not conn.is_connected():
+            state['conn'] = conn = connect()
+        return conn
+    return provider
+
+
+def build_reaper(occupancy=None, interval=None):
+    backend = slot_locks.create_backend(Config.SLOT_LOCK_BACKEND, thread_connection(), wait=Config.SLOT_LOCK_WAIT)
+    return LockReaper(backend, occupancy, interval or Config.LOCK_REAPER_INTERVAL or 5,
+                      lock_path=Config.LOCK_REAPER_LOCKFILE)
+
+
+if __name__ == "__main__":
+    reaper = build_reaper(OccupancyMap(Config.OCCUPANCY_FILE))
+    print("Lock reaper started; waiting to become leader..." if not reaper.try_lead() else "Lock reaper started.")
+    try:
+        reaper.run_forever()
+    except KeyboardInterrupt:
+        reaper.stop()
@@ -0,0 +1,447 @@
+"""
+Versioned schema migrations.
+
+Each migration has a version number and a list of steps. A step checks
+the live schema before changing it (index already there, column already
+added, ...), so a migration can be re-run safely and a database built
+from the current schema.sql simply records every version as applied.
+Applied versions are stored in schema_migrations; MySQL commits DDL
+straight away, so a migration is recorded only after all of its steps
+have succeeded and an interrupted one is re-run from the start.
+
+Indexes are matched by their columns, not their names, so databases
+that got an index from one of the older one-off scripts under another
+name aren't given a duplicate.
+
+    python migrate.py            apply pending migrations
+    python migrate.py --status   list migrations and whether they're applied
+    python migrate.py --check    EXPLAIN the hot queries; exit 1 if any has to scan a whole table
+"""
+import sys
+
+import mysql.connector
+from config import Config
+from slot_schedule import DEFAULT_SCHEDULES
+import changes
+import outbox
+import queries
+import slot_locks
+import stats
+
+LOCK_NAME = 'dmax_migrate'
+
+
+def connect():
+    return mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DB
+    )
+
+
+# --- schema inspection -----------------------------------------------------
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return bool(cursor.fetchall())
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return bool(cursor.fetchall())
+
+
+def find_index(cursor, table, columns, unique=False):
+    """
+    Name of an index on `table` whose leading columns are `columns`, or None.
+    With unique, only a unique key on exactly `columns` counts.
+    """
+    cursor.execute("""
+        SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX), MAX(NON_UNIQUE)
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        GROUP BY INDEX_NAME
+    """, (table,))
+    for name, index_columns, non_unique in cursor.fetchall():
+        index_columns = index_columns.split(',')
+        if unique:
+            if index_columns == list(columns) and not non_unique:
+                return name
+        elif index_columns[:len(columns)] == list(columns):
+            return name
+    return None
+
+
+def add_index(cursor, table, name, columns, unique=False):
+    existing = find_index(cursor, table, columns, unique)
+    if existing:
+        print(f"  {table} ({', '.join(columns)}) already indexed by {existing}.")
+        return
+    print(f"  Adding {'unique key' if unique else 'index'} {name} on {table} ({', '.join(columns)})...")
+    cursor.execute(f"ALTER TABLE {table} ADD {'UNIQUE KEY' if unique else 'INDEX'} {name} ({', '.join(columns)})")
+
+
+def drop_index(cursor, table, name):
+    cursor.execute("SHOW INDEX FROM " + table + " WHERE Key_name = %s", (name,))
+    if cursor.fetchall():
+        print(f"  Dropping index {name} on {table}...")
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+
+
+def create_table(cursor, table, ddl):
+    if table_exists(cursor, table):
+        print(f"  Table {table} already exists.")
+        return
+    print(f"  Creating table {table}...")
+    cursor.execute(ddl)
+
+
+# --- migrations ------------------------------------------------------------
+
+# One group per existing booking request: the rows the admin dashboard used to group together
+BACKFILL_GROUPS = """
+    INSERT INTO booking_groups (
+        user_id, booking_date, start_time, end_time, slot_count, total_price, paid_amount,
+        payment_proof, payment_status, booking_status, verified_by, created_at
+    )
+    SELECT b.user_id, b.booking_date, MIN(s.start_time), MAX(s.end_time), COUNT(b.id),
+           SUM(b.total_price), SUM(b.paid_amount),
+           b.payment_proof, b.payment_status, b.booking_status, MAX(b.verified_by), MIN(b.created_at)
+    FROM bookings b
+    LEFT JOIN slots s ON b.slot_id = s.id
+    WHERE b.group_id IS NULL
+    GROUP BY b.payment_proof, b.booking_date, b.user_id, b.booking_status, b.payment_status
+    ORDER BY MIN(b.id)
+"""
+
+LINK_BOOKINGS = """
+    UPDATE bookings b
+    JOIN booking_groups g
+      ON g.payment_proof <=> b.payment_proof
+     AND g.booking_date = b.booking_date
+     AND g.user_id = b.user_id
+     AND g.booking_status = b.booking_status
+     AND g.payment_status = b.payment_status
+    SET b.group_id = g.id
+    WHERE b.group_id IS NULL AND g.id > %s
+"""
+
+
+DUPLICATE_SLOTS = """
+    SELECT slot_date, start_time, GROUP_CONCAT(id ORDER BY id) AS slot_ids
+    FROM slots GROUP BY slot_date, start_time HAVING COUNT(*) > 1
+"""
+
+
+def slots_date_start_index(cursor):
+    # Every availability and booking query finds slots by date and start time, and
+    # slot_schedule.INSERT_SLOT (INSERT IGNORE) relies on the key being unique
+    if find_index(cursor, 'slots', ['slot_date', 'start_time'], unique=True):
+        print("  slots (slot_date, start_time) already has a unique key.")
+    else:
+        cursor.execute(DUPLICATE_SLOTS + " LIMIT 5")
+        duplicates = cursor.fetchall()
+        if duplicates:
+            examples = '; '.join(f"{d} {t} (ids {ids})" for d, t, ids in duplicates)
+            raise RuntimeError(
+                f"Duplicate (slot_date, start_time) slots exist, e.g. {examples}. Keep one slot per pair: "
+                "point bookings.slot_id and slot_locks.slot_id at it and delete the others, then re-run "
+                "`python migrate.py`. List them all with:" + DUPLICATE_SLOTS
+            )
+        add_index(cursor, 'slots', 'unique_slot_start', ['slot_date', 'start_time'], unique=True)
+    # Left by earlier runs that fell back to a plain index
+    drop_index(cursor, 'slots', 'idx_slots_date_start')
+
+
+def bookings_payment_proof_index(cursor):
+    add_index(cursor, 'bookings', 'idx_bookings_payment_proof', ['payment_proof'])
+
+
+def bookings_slot_status_index(cursor):
+    # The "is this slot booked" EXISTS subqueries probe bookings by slot and status
+    add_index(cursor, 'bookings', 'idx_bookings_slot_status', ['slot_id', 'booking_status'])
+
+
+def slot_locks_expiry_index(cursor):
+    # Used by the lock reaper and the lock_expiry > NOW() join
+    add_index(cursor, 'slot_locks', 'idx_lock_expiry', ['lock_expiry'])
+
+
+def slot_schedules_table(cursor):
+    create_table(cursor, 'slot_schedules', """
+        CREATE TABLE slot_schedules (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            weekday TINYINT NOT NULL,
+            open_time TIME NOT NULL,
+            close_time TIME NOT NULL,
+            slot_minutes INT NOT NULL DEFAULT 60,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_schedule_weekday (weekday)
+        )
+    """)
+    cursor.execute("SELECT COUNT(*) FROM slot_schedules")
+    if cursor.fetchone()[0] == 0:
+        print("  Seeding default weekly schedule...")
+        cursor.executemany("INSERT INTO slot_schedules (weekday, open_time, close_time) VALUES (%s, %s, %s)", DEFAULT_SCHEDULES)
+
+
+def notification_outbox_table(cursor):
+    create_table(cursor, 'notification_outbox', """
+        CREATE TABLE notification_outbox (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            channel ENUM('email', 'whatsapp') NOT NULL,
+            recipient VARCHAR(255) NOT NULL,
+            subject VARCHAR(255),
+            body TEXT NOT NULL,
+            status ENUM('pending', 'sending', 'sent', 'failed') DEFAULT 'pending',
+            attempts INT DEFAULT 0,
+            next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            last_error VARCHAR(500),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME,
+            INDEX idx_outbox_due (status, next_attempt_at)
+        )
+    """)
+    add_index(cursor, 'notification_outbox', 'idx_outbox_due', ['status', 'next_attempt_at'])
+
+
+def booking_groups_table(cursor):
+    create_table(cursor, 'booking_groups', """
+        CREATE TABLE booking_groups (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            booking_date DATE NOT NULL,
+            start_time TIME,
+            end_time TIME,
+            slot_count INT NOT NULL DEFAULT 1,
+            total_price DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+            paid_amount DECIMAL(10,2) DEFAULT 0.00,
+            payment_proof VARCHAR(255),
+            payment_status ENUM('pending', 'paid_manual_verification', 'paid_verified', 'rejected') DEFAULT 'pending',
+            booking_status ENUM('pending', 'confirmed', 'rejected') DEFAULT 'pending',
+            verified_by INT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_groups_date (booking_date),
+            INDEX idx_groups_status (booking_status),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE,
+            FOREIGN KEY (verified_by) REFERENCES admins(id) ON DELETE SET NULL ON UPDATE CASCADE
+        )
+    """)
+    if column_exists(cursor, 'bookings', 'group_id'):
+        print("  bookings.group_id already exists.")
+    else:
+        print("  Adding bookings.group_id...")
+        cursor.execute("""
+            ALTER TABLE bookings
+            ADD COLUMN group_id INT AFTER id,
+            ADD INDEX idx_bookings_group (group_id),
+            ADD CONSTRAINT fk_bookings_group FOREIGN KEY (group_id) REFERENCES booking_groups(id)
+                ON DELETE CASCADE ON UPDATE CASCADE
+        """)
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM booking_groups")
+    last_group_id = cursor.fetchone()[0]
+    cursor.execute(BACKFILL_GROUPS)
+    if cursor.rowcount:
+        print(f"  {cursor.rowcount} groups created for existing bookings.")
+        cursor.execute(LINK_BOOKINGS, (last_group_id,))
+        print(f"  {cursor.rowcount} bookings linked.")
+
+
+def daily_stats_table(cursor):
+    create_table(cursor, 'daily_stats', """
+        CREATE TABLE daily_stats (
+            stat_date DATE NOT NULL,
+            stat_hour TINYINT NOT NULL,
+            slots_total INT NOT NULL DEFAULT 0,
+            slots_booked INT NOT NULL DEFAULT 0,
+            slots_confirmed INT NOT NULL DEFAULT 0,
+            bookings INT NOT NULL DEFAULT 0,
+            booked_minutes INT NOT NULL DEFAULT 0,
+            booked_value DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+            declared_amount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+            collected_amount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (stat_date, stat_hour)
+        )
+    """)
+    cursor.execute("SELECT MIN(slot_date), MAX(slot_date) FROM slots")
+    first, last = cursor.fetchone()
+    if first:
+        print(f"  Filling daily_stats from {first} to {last}...")
+        stats.refresh_days(cursor, first, last)
+
+
+def change_log_table(cursor):
+    create_table(cursor, 'change_log', """
+        CREATE TABLE change_log (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            entity VARCHAR(32) NOT NULL,
+            entity_id INT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_change_log_changed_at (changed_at)
+        )
+    """)
+
+
+MIGRATIONS = [
+    (1, 'Index slots (slot_date, start_time)', [slots_date_start_index]),
+    (2, 'Index bookings (payment_proof)', [bookings_payment_proof_index]),
+    (3, 'Index bookings (slot_id, booking_status)', [bookings_slot_status_index]),
+    (4, 'Index slot_locks (lock_expiry)', [slot_locks_expiry_index]),
+    (5, 'Weekly slot schedules', [slot_schedules_table]),
+    (6, 'Notification outbox', [notification_outbox_table]),
+    (7, 'Booking groups', [booking_groups_table]),
+    (8, 'Daily stats rollup', [daily_stats_table]),
+    (9, 'Change log for dashboard sync', [change_log_table]),
+    (10, 'Unique key on slots (slot_date, start_time)', [slots_date_start_index]),
+]
+
+
+# --- runner ----------------------------------------------------------------
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(conn):
+    """Apply pending migrations in version order. Returns the versions applied."""
+    cursor = conn.cursor(buffered=True)
+    # Two deploys running migrations at once would race on the same ALTERs
+    cursor.execute("SELECT GET_LOCK(%s, 60)", (LOCK_NAME,))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise RuntimeError("Another migration run holds the migration lock")
+    applied = []
+    try:
+        ensure_migrations_table(cursor)
+        done = applied_versions(cursor)
+        for version, name, steps in MIGRATIONS:
+            if version in done:
+                continue
+            print(f"Applying {version}: {name}")
+            for step in steps:
+                step(cursor)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+            applied.append(version)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+    return applied
+
+
+def status(conn):
+    cursor = conn.cursor(buffered=True)
+    ensure_migrations_table(cursor)
+    cursor.execute("SELECT version, applied_at FROM schema_migrations")
+    done = dict(cursor.fetchall())
+    cursor.close()
+    for version, name, _ in MIGRATIONS:
+        print(f"{version:>3}  {'applied ' + str(done[version]) if version in done else 'pending':<28}  {name}")
+    return [v for v, _, _ in MIGRATIONS if v not in done]
+
+
+# --- query plan check ------------------------------------------------------
+
+def _ids(n):
+    return ', '.join(['%s'] * n)
+
+
+# The queries on the booking path, the admin list and the background workers,
+# taken from the modules that run them, with representative parameters.
+HOT_QUERIES = [
+    ('availability for a date', queries.AVAILABILITY_FOR_DATE, ('2030-01-01',)),
+    ('lock_slot booked check', queries.SLOT_BOOKED_CHECK, (1,)),
+    ('book_slot range read', queries.BOOK_RANGE_SELECT, ('2030-01-01', '18:00:00', '20:00:00')),
+    ('book_slot conflict check', queries.BOOK_CONFLICT_CHECK.format(ids=_ids(2)), (1, 2)),
+    ('slot hold owners', slot_locks.HOLD_OWNERS.format(ids=_ids(2)), (1, 2)),
+    ('lock reaper', slot_locks.REAP_EXPIRED, (500,)),
+    ('admin bookings page',
+     queries.BOOKING_PAGE.format(where=queries.BOOKING_PAGE_AFTER + " AND g.booking_status = %s"),
+     ('2030-01-01', '2030-01-01', 1000000, 'pending', 51)),
+    ('pending count', queries.PENDING_COUNT, ()),
+    ('group status update', queries.SET_GROUP_BOOKINGS_STATUS.format(ids=_ids(2)), ('confirmed', 'paid_verified', 1, 2)),
+    ('stats cells refresh', stats.ROLLUP_SELECT.format(hours=" AND HOUR(s.start_time) IN (%s, %s)"),
+     ('2030-01-01', '2030-01-01', 18, 19)),
+    ('stats report', stats.REPORT_BY_HOUR, ('2030-01-01', '2030-12-31')),
+    ('dashboard change sync', changes.CHANGED_SINCE, (1000000, changes.OVERLAP_SECONDS, 501)),
+    ('outbox claim', outbox.CLAIM_DUE, (50,)),
+]
+
+
+def check(conn):
+    """
+    EXPLAIN every hot query; any table read with access type ALL fails the
+    check, whether or not the optimiser had an index it could have used.
+    Tiny tables can be scanned by choice, so run this against a database
+    with realistic data. Returns the names of the failing queries.
+    """
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    failures = []
+    try:
+        for name, query, params in HOT_QUERIES:
+            cursor.execute("EXPLAIN " + query, params)
+            plan = cursor.fetchall()
+            scans = [r['table'] for r in plan
+                     if r.get('type') == 'ALL' and r.get('table') and not r['table'].startswith('<')]
+            if scans:
+                failures.append(name)
+                print(f"FAIL  {name}: full scan of {', '.join(scans)}")
+            else:
+                print(f"ok    {name}: " + ', '.join(f"{r['table']} via {r.get('key') or r.get('type')}" for r in plan if r.get('table')))
+    finally:
+        cursor.close()
+    return failures
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    try:
+        conn = connect()
+    except mysql.connector.Error as err:
+        print(f"Database Error: {err}")
+        sys.exit(1)
+    try:
+        if '--status' in args:
+            status(conn)
+        elif '--check' in args:
+            failures = check(conn)
+            if failures:
+                print(f"{len(failures)} hot queries need an index; run `python migrate.py`.")
+                sys.exit(1)
+            print("All hot queries use an index.")
+        else:
+            applied = migrate(conn)
+            print(f"Applied {len(applied)} migration(s)." if applied else "Schema is up to date.")
+    except mysql.connector.Error as err:
+        print(f"Database Error: {err}")
+        sys.exit(1)
+    except RuntimeError as err:
+        print(f"Migration stopped: {err}")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,45 @@
+"""
+Sends queued email/WhatsApp notifications from notification_outbox.
+
+Run alongside the web app (see Procfile):
+    python notification_worker.py
+"""
+import mysql.connector
+from config import Config
+from notifications import send_email_core, send_whatsapp_core
+from outbox import OutboxDispatcher
+
+
+def connect():
+    return mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DB
+    )
+
+
+def build_dispatcher(senders=None):
+    senders = senders or {
+        'email': lambda row: send_email_core(row['recipient'], row['subject'], row['body']),
+        'whatsapp': lambda row: send_whatsapp_core(row['recipient'], row['body']),
+    }
+    return OutboxDispatcher(
+        connect,
+        senders,
+        channel_limits={
+            'email': Config.OUTBOX_EMAIL_CONCURRENCY,
+            'whatsapp': Config.OUTBOX_WHATSAPP_CONCURRENCY,
+        },
+        max_attempts=Config.OUTBOX_MAX_ATTEMPTS,
+        backoff_base=Config.OUTBOX_BACKOFF_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    print("Notification worker started.")
+    dispatcher = build_dispatcher()
+    try:
+        dispatcher.run_forever(poll_interval=Config.OUTBOX_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        dispatcher.shutdown()
@@ -0,0 +1,361 @@
+import os
+import re
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from config import Config
+
+# --- Delivery transports (called by the outbox dispatcher, not by request handlers) ---
+
+
+class SMTPSession:
+    """
+    Long-lived, thread-safe SMTP session shared by every email sent from this process.
+
+    The connection is opened (STARTTLS + login) on first use and kept open.
+    If it has been idle for more than `keepalive` seconds it is checked with
+    NOOP before the next send, and a dropped connection is re-established and
+    the message retried once.
+    """
+
+    def __init__(self, host, port, username, password, use_tls=True, keepalive=60, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.pid = os.getpid()
+
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.RLock()
+        self.stats = {'sent': 0, 'failed': 0, 'connects': 0, 'reconnects': 0}
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        server.login(self.username, self.password)
+        self._server = server
+        self.stats['connects'] += 1
+
+    def _disconnect(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _ensure(self):
+        if self._server is None:
+            self._connect()
+        elif time.monotonic() - self._last_used > self.keepalive:
+            try:
+                alive = self._server.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                alive = False
+            if not alive:
+                self._server = None
+                self.stats['reconnects'] += 1
+                self._connect()
+
+    def _send(self, msg):
+        self._ensure()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._server = None
+            self.stats['reconnects'] += 1
+            self._connect()
+            self._server.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def _send_counted(self, msg):
+        try:
+            self._send(msg)
+            self.stats['sent'] += 1
+        except Exception as e:
+            self.stats['failed'] += 1
+            # A refused recipient leaves the session usable; anything else starts afresh next time
+            if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                self._disconnect()
+            raise
+
+    def send(self, msg):
+        """Send one message; raises on failure."""
+        with self._lock:
+            self._send_counted(msg)
+
+    def send_many(self, messages):
+        """
+        Send messages back to back over one session.
+        Returns one {'to', 'ok', 'error', 'latency_ms'} result per message.
+        """
+        results = []
+        with self._lock:
+            for msg in messages:
+                started = time.monotonic()
+                error = None
+                try:
+                    self._send_counted(msg)
+                except Exception as e:
+                    error = str(e)
+                results.append({
+                    'to': msg['To'],
+                    'ok': error is None,
+                    'error': error,
+                    'latency_ms': round((time.monotonic() - started) * 1000, 2)
+                })
+        return results
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+_smtp_session = None
+_smtp_session_lock = threading.Lock()
+
+
+def get_smtp_session():
+    """This process's shared SMTP session, or None if mail credentials are missing."""
+    global _smtp_session
+    sender_email = os.environ.get('MAIL_USERNAME') or Config.MAIL_USERNAME
+    sender_password = os.environ.get('MAIL_PASSWORD') or Config.MAIL_PASSWORD
+    if not sender_email or not sender_password:
+        return None
+    with _smtp_session_lock:
+        if (_smtp_session is None or _smtp_session.pid != os.getpid()
+                or _smtp_session.username != sender_email):
+            _smtp_session = SMTPSession(
+                Config.MAIL_SERVER, Config.MAIL_PORT, sender_email, sender_password,
+                use_tls=Config.MAIL_USE_TLS, keepalive=Config.MAIL_KEEPALIVE
+            )
+        return _smtp_session
+
+
+def build_email(sender_email, to_email, subject, body):
+    msg = MIMEMultipart()
+    msg['From'] = sender_email
+    msg['To'] = to_email
+    msg['Subject'] = subject
+
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+def send_email_core(to_email, subject, body):
+    """
+    Reusable secure email sending function (over the shared SMTP session).
+    """
+    try:
+        session = get_smtp_session()
+        if session is None:
+             print(f"Email Failed to {to_email}: Missing Credentials")
+             return False
+
+        session.send(build_email(session.username, to_email, subject, body))
+        print(f"Email sent successfully to {to_email}")
+        return True
+
+    except Exception as e:
+        print(f"Email Failed to {to_email}: {e}")
+        return False
+
+
+def send_emails(emails):
+    """
+    Send many (to_email, subject, body) messages over one SMTP session.
+    Returns per-message results with latency; see SMTPSession.send_many.
+    """
+    session = get_smtp_session()
+    if session is None:
+        return [{'to': to, 'ok': False, 'error': 'Missing Credentials', 'latency_ms': 0.0} for to, _, _ in emails]
+    results = session.send_many([build_email(session.username, to, subject, body) for to, subject, body in emails])
+    for r in results:
+        if r['ok']:
+            print(f"Email sent successfully to {r['to']} ({r['latency_ms']} ms)")
+        else:
+            print(f"Email Failed to {r['to']}: {r['error']}")
+    return results
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most
+    `capacity`. acquire() blocks until a token is free.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping as needed. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _PooledTwilioHttpClient(TwilioHttpClient):
+    """
+    TwilioHttpClient whose requests session keeps connections open across
+    messages. With `api_base` set, API calls go there instead of
+    https://api.twilio.com (see local_stubs.FakeTwilioServer).
+    """
+
+    def __init__(self, api_base=None, pool_size=10, timeout=None):
+        super().__init__(pool_connections=True, timeout=timeout)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.api_base = api_base.rstrip('/') if api_base else None
+
+    def request(self, method, url, *args, **kwargs):
+        if self.api_base:
+            url = re.sub(r'^https?://[^/]+', self.api_base, url)
+        return super().request(method, url, *args, **kwargs)
+
+
+class WhatsAppSender:
+    """
+    One Twilio client (and HTTP connection pool) shared by every WhatsApp
+    message sent from this process, throttled by a token bucket.
+    """
+
+    def __init__(self, sid, token, from_number, rate=1, burst=5, max_workers=4, api_base=None, timeout=10):
+        self.sid = sid
+        self.from_number = from_number
+        self.max_workers = max(1, max_workers)
+        self.pid = os.getpid()
+        self.client = Client(sid, token, http_client=_PooledTwilioHttpClient(
+            api_base=api_base, pool_size=self.max_workers, timeout=timeout
+        ))
+        self.limiter = TokenBucket(rate, burst)
+
+        self._stats_lock = threading.Lock()
+        self.stats = {'sent': 0, 'failed': 0, 'throttled_ms': 0.0}
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def send(self, to_number, body):
+        """Send one message; returns the Twilio message SID, raises on failure."""
+        waited = self.limiter.acquire()
+        if waited:
+            self._count('throttled_ms', waited * 1000)
+        try:
+            message = self.client.messages.create(from_=self.from_number, body=body, to=to_number)
+        except Exception:
+            self._count('failed')
+            raise
+        self._count('sent')
+        return message.sid
+
+    def _send_result(self, to_number, body):
+        started = time.monotonic()
+        sid, error = None, None
+        try:
+            sid = self.send(to_number, body)
+        except Exception as e:
+            error = str(e)
+        return {
+            'to': to_number,
+            'ok': error is None,
+            'sid': sid,
+            'error': error,
+            'latency_ms': round((time.monotonic() - started) * 1000, 2)
+        }
+
+    def send_many(self, messages, max_workers=None):
+        """
+        Fan (to_number, body) messages out over a bounded thread pool, still
+        within the rate limit. Returns one {'to', 'ok', 'sid', 'error',
+        'latency_ms'} result per message, in input order.
+        """
+        workers = min(max_workers or self.max_workers, len(messages)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='whatsapp') as pool:
+            return list(pool.map(lambda m: self._send_result(*m), messages))
+
+
+_whatsapp_sender = None
+_whatsapp_sender_lock = threading.Lock()
+
+
+def get_whatsapp_sender():
+    """This process's shared WhatsApp sender, or None if Twilio credentials are missing."""
+    global _whatsapp_sender
+    sid = os.environ.get('TWILIO_SID') or Config.TWILIO_SID
+    token = os.environ.get('TWILIO_AUTH_TOKEN') or Config.TWILIO_AUTH_TOKEN
+    wa_from = os.environ.get('TWILIO_WHATSAPP_NUM') or Config.TWILIO_WHATSAPP_NUM
+    if not all([sid, token, wa_from]):
+        return None
+    with _whatsapp_sender_lock:
+        if (_whatsapp_sender is None or _whatsapp_sender.pid != os.getpid()
+                or _whatsapp_sender.sid != sid or _whatsapp_sender.from_number != wa_from):
+            _whatsapp_sender = WhatsAppSender(
+                sid, token, wa_from,
+                rate=Config.TWILIO_MESSAGES_PER_SECOND, burst=Config.TWILIO_BURST,
+                max_workers=Config.TWILIO_MAX_WORKERS,
+                api_base=Config.TWILIO_API_BASE, timeout=Config.TWILIO_TIMEOUT
+            )
+        return _whatsapp_sender
+
+
+def send_whatsapp_core(to_number, body):
+    """
+    Reusable Twilio WhatsApp sending function (over the shared, rate-limited client).
+    """
+    try:
+        sender = get_whatsapp_sender()
+        if sender is None or not to_number:
+            print(f"WhatsApp Failed to {to_number}: Missing Credentials or Number")
+            return False
+
+        sid = sender.send(to_number, body)
+        print(f"WhatsApp sent to {to_number}: {sid}")
+        return True
+
+    except Exception as e:
+        print(f"WhatsApp Failed to {to_number}: {e}")
+        return False
+
+
+def send_whatsapp_many(messages):
+    """
+    Send many (to_number, body) WhatsApp messages concurrently.
+    Returns per-recipient results; see WhatsAppSender.send_many.
+    """
+    sender = get_whatsapp_sender()
+    if sender is None:
+        return [{'to': to, 'ok': False, 'sid': None, 'error': 'Missing Credentials', 'latency_ms': 0.0} for to, _ in messages]
+    results = sender.send_many(messages)
+    for r in results:
+        if r['ok']:
+            print(f"WhatsApp sent to {r['to']}: {r['sid']} ({r['latency_ms']} ms)")
+        else:
+            print(f"WhatsApp Failed to {r['to']}: {r['error']}")
+    return results
@@ -0,0 +1,302 @@
+"""
+Shared-memory slot occupancy map.
+
+A small memory-mapped file holds, for each date, a bitmap of booked slots
+and a bitmap of locked slots with each lock's expiry. Every gunicorn worker
+on the node maps the same file, so a booking made in one worker is visible
+to the others without asking MySQL.
+
+Slots are indexed by their start time in half-hour steps (48 per day).
+Dates are stored in a ring of `days` records keyed by date ordinal; a date
+that is not in the map (or whose slots don't fit the half-hour grid) is
+"unknown" and callers fall back to the database.
+
+Each record carries a seqlock counter (bumped on every write) and a
+generation (bumped only when the date is re-read from the database, e.g.
+after an admin changes its slots), which per-worker caches use to decide
+when their copy of the slot list is stale.
+"""
+import contextlib
+import datetime
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError: # Windows dev server: single process, thread lock is enough
+    fcntl = None
+
+MAGIC = b'DMXOCC01'
+HEADER = struct.Struct('<8sIId')             # magic, days, record size, built_at
+HEADER_SIZE = 64
+RECORD = struct.Struct('<IIIIQQ48I')         # ordinal, flags, seq, generation, booked, locked, expiry[48]
+RECORD_SIZE = 256
+SLOTS_PER_DAY = 48
+
+FLAG_KNOWN = 1
+FLAG_UNMAPPABLE = 2
+
+
+def default_path():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'dmax_occupancy.bin')
+
+
+def slot_index(start_time):
+    """Half-hour index of a slot start time, or None if it is off the grid."""
+    if isinstance(start_time, datetime.timedelta):
+        minutes = int(start_time.total_seconds()) // 60
+    elif isinstance(start_time, str):
+        parts = start_time.split(':')
+        minutes = int(parts[0]) * 60 + int(parts[1])
+    else:
+        minutes = start_time.hour * 60 + start_time.minute
+    if minutes % 30 or not 0 <= minutes < 24 * 60:
+        return None
+    return minutes // 30
+
+
+def _ordinal(date):
+    if isinstance(date, str):
+        try:
+            date = datetime.date.fromisoformat(date)
+        except ValueError:
+            return None
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    return date.toordinal()
+
+
+def _epoch(dt):
+    return int(time.mktime(dt.timetuple()))
+
+
+class OccupancyMap:
+
+    def __init__(self, path=None, days=512):
+        self.path = path or default_path()
+        self.days = days
+        self._thread_lock = threading.Lock()
+
+        size = HEADER_SIZE + days * RECORD_SIZE
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, 'r+b')
+        with self._write_lock():
+            if os.fstat(fd).st_size != size:
+                self._file.truncate(size)
+            self._mm = mmap.mmap(fd, size)
+            magic, stored_days, record_size, _ = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or stored_days != days or record_size != RECORD_SIZE:
+                self._mm[:] = bytes(size)
+                HEADER.pack_into(self._mm, 0, MAGIC, days, RECORD_SIZE, 0.0)
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        with self._thread_lock:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    # --- record access -----------------------------------------------------
+
+    def _offset(self, ordinal):
+        return HEADER_SIZE + (ordinal % self.days) * RECORD_SIZE
+
+    def _read(self, ordinal):
+        """Consistent snapshot of a date's record (seqlock: writers hold seq odd)."""
+        if ordinal is None:
+            return None
+        offset = self._offset(ordinal)
+        for _ in range(1000):
+            rec = RECORD.unpack_from(self._mm, offset)
+            if not rec[2] & 1 and struct.unpack_from('<I', self._mm, offset + 8)[0] == rec[2]:
+                break
+        else:
+            return None # writer died mid-update; treat as unknown
+        if rec[0] != ordinal or not rec[1] & FLAG_KNOWN:
+            return None
+        return rec
+
+    def _write(self, offset, ordinal, flags, booked, locked, expiry, new_generation=False):
+        """Replace the record at offset. Caller holds the write lock."""
+        seq, generation = struct.unpack_from('<II', self._mm, offset + 8)
+        if new_generation:
+            generation = (generation + 1) & 0xFFFFFFFF
+        struct.pack_into('<I', self._mm, offset + 8, (seq + 1) & 0xFFFFFFFF)
+        RECORD.pack_into(self._mm, offset, ordinal, flags, (seq + 1) & 0xFFFFFFFF, generation,
+                         booked, locked, *expiry)
+        struct.pack_into('<I', self._mm, offset + 8, (seq + 2) & 0xFFFFFFFF)
+
+    def _update(self, date, fn):
+        """Apply fn(booked, locked, expiry) -> (booked, locked) to a known, mappable date."""
+        ordinal = _ordinal(date)
+        with self._write_lock():
+            rec = self._read(ordinal)
+            if rec is None or rec[1] & FLAG_UNMAPPABLE:
+                return False
+            expiry = list(rec[6:])
+            booked, locked = fn(rec[4], rec[5], expiry)
+            self._write(self._offset(ordinal), ordinal, rec[1], booked, locked, expiry)
+            return True
+
+    # --- public API --------------------------------------------------------
+
+    def version(self, date):
+        """(ordinal, generation) of a date's record, or None if the date is unknown."""
+        ordinal = _ordinal(date)
+        rec = self._read(ordinal)
+        return (ordinal, rec[3]) if rec else None
+
+    @staticmethod
+    def _live_locks(rec, now):
+        live = 0
+        for idx, expiry in enumerate(rec[6:]):
+            if rec[5] >> idx & 1 and expiry > now:
+                live |= 1 << idx
+        return live
+
+    def stamp(self, date, now=None):
+        """
+        Validator for everything the map knows about a date: changes whenever
+        the date is re-read, booked or locked, and when a hold runs out (which
+        happens without a write). None if the date is unknown or unmappable.
+        """
+        ordinal = _ordinal(date)
+        rec = self._read(ordinal)
+        if rec is None or rec[1] & FLAG_UNMAPPABLE:
+            return None
+        live = self._live_locks(rec, time.time() if now is None else now)
+        built_at = HEADER.unpack_from(self._mm, 0)[3]
+        return f"{int(built_at * 1000):x}-{ordinal}-{rec[3]}-{rec[2]}-{live:x}"
+
+    def live_state(self, date, now=None):
+        """
+        (generation, booked mask, live lock mask, lock expiries) of a date, where
+        holds that have run out don't count. None if the date is unknown or unmappable.
+        """
+        rec = self._read(_ordinal(date))
+        if rec is None or rec[1] & FLAG_UNMAPPABLE:
+            return None
+        return rec[3], rec[4], self._live_locks(rec, time.time() if now is None else now), rec[6:]
+
+    def is_known(self, date):
+        return self._read(_ordinal(date)) is not None
+
+    def store(self, date, rows):
+        """Replace a date's record from DB rows with start_time, is_booked and locked_until."""
+        ordinal = _ordinal(date)
+        if ordinal is None:
+            return
+        booked = locked = 0
+        expiry = [0] * SLOTS_PER_DAY
+        flags = FLAG_KNOWN
+        seen = set()
+        for r in rows:
+            idx = slot_index(r['start_time'])
+            if idx is None or idx in seen:
+                flags |= FLAG_UNMAPPABLE
+                continue
+            seen.add(idx)
+            if r['is_booked']:
+                booked |= 1 << idx
+            if r['locked_until']:
+                locked |= 1 << idx
+                expiry[idx] = _epoch(r['locked_until'])
+        with self._write_lock():
+            self._write(self._offset(ordinal), ordinal, flags, booked, locked, expiry, new_generation=True)
+
+    def rebuild(self, rows_by_date):
+        """Forget every date, then store the given {date: rows} snapshot."""
+        with self._write_lock():
+            for i in range(self.days):
+                self._write(HEADER_SIZE + i * RECORD_SIZE, 0, 0, 0, 0, [0] * SLOTS_PER_DAY, new_generation=True)
+            HEADER.pack_into(self._mm, 0, MAGIC, self.days, RECORD_SIZE, time.time())
+        for date, rows in rows_by_date.items():
+            self.store(date, rows)
+
+    def forget(self, *dates):
+        """Mark dates unknown (new generation), so every worker re-reads them from the DB."""
+        with self._write_lock():
+            for date in dates:
+                ordinal = _ordinal(date)
+                if ordinal is not None and self._read(ordinal) is not None:
+                    self._write(self._offset(ordinal), 0, 0, 0, 0, [0] * SLOTS_PER_DAY, new_generation=True)
+
+    def any_booked(self, date, start_times):
+        """True if any of the slots is booked. Unknown dates answer False (check the DB)."""
+        rec = self._read(_ordinal(date))
+        if rec is None or rec[1] & FLAG_UNMAPPABLE:
+            return False
+        for t in start_times:
+            idx = slot_index(t)
+            if idx is not None and rec[4] >> idx & 1:
+                return True
+        return False
+
+    def mark_booked(self, date, start_times, booked=True):
+        """Set (or clear) booked bits; a booked slot's lock is released at the same time."""
+        mask = 0
+        for t in start_times:
+            idx = slot_index(t)
+            if idx is not None:
+                mask |= 1 << idx
+
+        def apply(b, l, expiry):
+            if booked:
+                return b | mask, l & ~mask
+            return b & ~mask, l
+        return self._update(date, apply)
+
+    def set_lock(self, date, start_time, expires_at):
+        idx = slot_index(start_time)
+        if idx is None:
+            return False
+
+        def apply(b, l, expiry):
+            expiry[idx] = _epoch(expires_at)
+            return b, l | 1 << idx
+        return self._update(date, apply)
+
+    def clear_expired_locks(self, date, start_times):
+        """Clear lock bits for slots whose hold has run out (a newer hold is left alone)."""
+        now = time.time()
+
+        def apply(b, l, expiry):
+            for t in start_times:
+                idx = slot_index(t)
+                if idx is not None and expiry[idx] <= now:
+                    l &= ~(1 << idx)
+                    expiry[idx] = 0
+            return b, l
+        return self._update(date, apply)
+
+    def overlay(self, date, rows):
+        """
+        Return rows with is_booked/locked_until taken from the shared map.
+        Rows are returned unchanged if the date is unknown or unmappable.
+        """
+        rec = self._read(_ordinal(date))
+        if rows is None or rec is None or rec[1] & FLAG_UNMAPPABLE:
+            return rows
+        now = time.time()
+        booked, locked, expiry = rec[4], rec[5], rec[6:]
+        out = []
+        for r in rows:
+            idx = slot_index(r['start_time'])
+            if idx is None:
+                return rows
+            is_locked = locked >> idx & 1 and expiry[idx] > now
+            out.append(dict(
+                r,
+                is_booked=booked >> idx & 1,
+                locked_until=datetime.datetime.fromtimestamp(expiry[idx]) if is_locked else None
+            ))
+        return out
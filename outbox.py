@@ -0,0 +1,169 @@
+"""
+Transactional notification outbox.
+
+Request handlers call enqueue() with the cursor of the transaction that
+changes the booking, so a notification row exists if and only if the
+change was committed. OutboxDispatcher (run by notification_worker.py)
+drains due rows, sends them through per-channel thread pools and records
+the delivery status, retrying failures with exponential backoff.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+CHANNELS = ('email', 'whatsapp')
+
+CLAIM_DUE = """
+    SELECT id, channel, recipient, subject, body, attempts
+    FROM notification_outbox
+    WHERE status IN ('pending', 'sending') AND next_attempt_at <= NOW()
+    ORDER BY id
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+"""
+
+
+def enqueue(cursor, channel, recipient, body, subject=None):
+    """Queue a notification on the caller's transaction. Nothing is sent until it commits."""
+    if channel not in CHANNELS:
+        raise ValueError(f"Unknown notification channel: {channel}")
+    cursor.execute(
+        "INSERT INTO notification_outbox (channel, recipient, subject, body) VALUES (%s, %s, %s, %s)",
+        (channel, recipient, subject, body)
+    )
+
+
+class OutboxDispatcher:
+    """
+    Drains notification_outbox.
+
+    `senders` maps a channel to a callable taking the outbox row (a dict) and
+    returning True on success; returning False or raising counts as a failed
+    attempt. `channel_limits` caps concurrent sends per channel.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED and leased for
+    `lease_seconds`, so several dispatchers can run side by side and a row
+    claimed by a dispatcher that died is picked up again once its lease ends.
+    """
+
+    def __init__(self, connect, senders, channel_limits=None, batch_size=50,
+                 max_attempts=5, backoff_base=30, backoff_max=3600, lease_seconds=300):
+        self.connect = connect
+        self.senders = senders
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        limits = channel_limits or {}
+        self.pools = {
+            channel: ThreadPoolExecutor(max_workers=limits.get(channel, 2), thread_name_prefix=f"outbox-{channel}")
+            for channel in senders
+        }
+        self.conn = None
+
+    def _connection(self):
+        if self.conn is None or not self.conn.is_connected():
+            self.conn = self.connect()
+        return self.conn
+
+    def claim(self):
+        """Lease a batch of due rows to this dispatcher."""
+        conn = self._connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            conn.start_transaction()
+            cursor.execute(CLAIM_DUE, (self.batch_size,))
+            rows = cursor.fetchall()
+            if rows:
+                ids = [r['id'] for r in rows]
+                placeholders = ', '.join(['%s'] * len(ids))
+                cursor.execute(
+                    f"UPDATE notification_outbox SET status = 'sending', attempts = attempts + 1, "
+                    f"next_attempt_at = NOW() + INTERVAL %s SECOND WHERE id IN ({placeholders})",
+                    [self.lease_seconds] + ids
+                )
+            conn.commit()
+            for r in rows:
+                r['attempts'] += 1
+            return rows
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _send(self, row):
+        sender = self.senders[row['channel']]
+        started = time.monotonic()
+        try:
+            ok = sender(row)
+            error = None if ok else 'sender reported failure'
+        except Exception as e:
+            ok, error = False, str(e)
+        return row, ok, error, time.monotonic() - started
+
+    def backoff(self, attempts):
+        return min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+
+    def record(self, results):
+        """Write back the outcome of each send."""
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            for row, ok, error, elapsed in results:
+                if ok:
+                    cursor.execute(
+                        "UPDATE notification_outbox SET status = 'sent', sent_at = NOW(), last_error = NULL WHERE id = %s",
+                        (row['id'],)
+                    )
+                elif row['attempts'] >= self.max_attempts:
+                    cursor.execute(
+                        "UPDATE notification_outbox SET status = 'failed', last_error = %s WHERE id = %s",
+                        (error[:500], row['id'])
+                    )
+                else:
+                    cursor.execute(
+                        "UPDATE notification_outbox SET status = 'pending', last_error = %s, "
+                        "next_attempt_at = NOW() + INTERVAL %s SECOND WHERE id = %s",
+                        (error[:500], self.backoff(row['attempts']), row['id'])
+                    )
+            conn.commit()
+        finally:
+            cursor.close()
+
+    def run_once(self):
+        """Claim, send and record one batch. Returns the number of rows handled."""
+        rows = self.claim()
+        futures = []
+        skipped = []
+        for row in rows:
+            if row['channel'] in self.pools:
+                futures.append(self.pools[row['channel']].submit(self._send, row))
+            else:
+                skipped.append((row, False, f"no sender for channel {row['channel']}", 0.0))
+        results = [f.result() for f in futures] + skipped
+        if results:
+            self.record(results)
+            for row, ok, error, elapsed in results:
+                status = 'sent' if ok else f'failed ({error})'
+                print(f"Outbox #{row['id']} {row['channel']} to {row['recipient']}: {status} in {elapsed * 1000:.0f} ms")
+        return len(results)
+
+    def run_forever(self, poll_interval=2.0):
+        while True:
+            try:
+                handled = self.run_once()
+            except mysql.connector.Error as err:
+                print(f"Outbox dispatcher database error: {err}")
+                self.conn = None
+                handled = 0
+            if handled < self.batch_size:
+                time.sleep(poll_interval)
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown(wait=True)
+        if self.conn is not None:
+            self.conn.close()
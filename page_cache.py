@@ -0,0 +1,78 @@
+import collections
+import gzip
+import threading
+import time
+
+
+class CachedPage:
+    __slots__ = ('body', 'gzip_body', 'mimetype', 'expires')
+
+    def __init__(self, body, mimetype, expires):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=6)
+        self.mimetype = mimetype
+        self.expires = expires
+
+
+class PageCache:
+    """
+    In-process cache of rendered public pages.
+
+    Callers build the key from everything the page depends on (endpoint,
+    query string, the shared versions of the tables it shows, the code
+    release), so a data change simply stops matching the old entry and
+    nothing has to be purged. Bodies are stored plain and gzip-compressed,
+    so a hit is served from memory without rendering or compressing.
+    Entries also expire after `ttl` seconds and are evicted
+    least-recently-used beyond `max_entries`.
+    """
+
+    def __init__(self, ttl=300.0, max_entries=128, enabled=True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            page = self._entries.get(key)
+            if page and page.expires > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return page
+            self.misses += 1
+            return None
+
+    def put(self, key, body, mimetype):
+        page = CachedPage(body, mimetype, time.time() + self.ttl)
+        with self._lock:
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': sum(len(p.body) + len(p.gzip_body) for p in self._entries.values()),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
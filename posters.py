@@ -0,0 +1,208 @@
+"""
+Responsive variants of tournament posters.
+
+Every poster in static/tournament_images gets resized WebP and JPEG copies
+at a few widths in its `v/` subfolder, named after the poster's content
+hash (`<sha256[:16]>-<width>.<ext>`), so a variant URL never changes
+meaning and can be cached forever. A manifest (v/manifest.json) maps each
+poster to its variants; templates turn it into srcset attributes through
+srcset()/fallback_src(). Posters without variants (or without Pillow) are
+served as uploaded.
+
+Convert the posters already in the folder and report the bytes saved:
+    python posters.py
+    python posters.py --report      # only the report
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'tournament_images')
+VARIANT_DIR = 'v'
+MANIFEST = 'manifest.json'
+WIDTHS = (320, 640, 960)
+QUALITY = {'webp': 72, 'jpeg': 78}
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Width a typical visitor's browser picks (card image on a phone); used by the report
+REPORT_WIDTH = 640
+
+
+def available():
+    return Image is not None
+
+
+def formats():
+    return ('webp', 'jpeg') if features.check('webp') else ('jpeg',)
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def load_manifest(folder=FOLDER):
+    try:
+        with open(os.path.join(folder, VARIANT_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, folder=FOLDER):
+    path = os.path.join(folder, VARIANT_DIR, MANIFEST)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def make_variants(filename, folder=FOLDER):
+    """
+    Write the variants of folder/filename and return its manifest entry:
+    {'hash', 'width', 'bytes', 'variants': {format: [[width, name, bytes], ...]}}.
+    None if the image can't be read.
+    """
+    src = os.path.join(folder, filename)
+    out_dir = os.path.join(folder, VARIANT_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    h = content_hash(src)
+    try:
+        with Image.open(src) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            # Never upscale: widths beyond the original collapse to the original width
+            widths = sorted({min(w, img.width) for w in WIDTHS})
+            variants = {}
+            for fmt in formats():
+                variants[fmt] = []
+                for w in widths:
+                    name = f"{h}-{w}.{'jpg' if fmt == 'jpeg' else fmt}"
+                    path = os.path.join(out_dir, name)
+                    if not os.path.exists(path):
+                        resized = img if w == img.width else img.resize((w, round(img.height * w / img.width)), Image.LANCZOS)
+                        tmp = f"{path}.{os.getpid()}.tmp"
+                        resized.save(tmp, format=fmt.upper(), quality=QUALITY[fmt], optimize=True)
+                        os.replace(tmp, path)
+                    variants[fmt].append([w, name, os.path.getsize(path)])
+            width = img.width
+    except (OSError, ValueError) as e:
+        print(f"Poster variants failed for {filename}: {e}")
+        return None
+    return {'hash': h, 'width': width, 'bytes': os.path.getsize(src), 'variants': variants}
+
+
+def add(filename, folder=FOLDER):
+    """Make a newly uploaded poster's variants and record them; False without Pillow or on a bad image."""
+    if not available():
+        return False
+    entry = make_variants(filename, folder)
+    if entry is None:
+        return False
+    manifest = load_manifest(folder)
+    manifest[filename] = entry
+    save_manifest(manifest, folder)
+    return True
+
+
+class Manifest:
+    """Per-process view of the manifest, re-read when the file changes."""
+
+    def __init__(self, folder=FOLDER):
+        self.folder = folder
+        self._mtime = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def entries(self):
+        try:
+            mtime = os.stat(os.path.join(self.folder, VARIANT_DIR, MANIFEST)).st_mtime_ns
+        except OSError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                self._entries = load_manifest(self.folder)
+                self._mtime = mtime
+            return self._entries
+
+    def srcset(self, filename, fmt, url_prefix):
+        """srcset attribute value for a poster's variants in fmt, or None if it has none."""
+        entry = self.entries().get(filename) if filename else None
+        if not entry or fmt not in entry['variants']:
+            return None
+        return ', '.join(f"{url_prefix}/{name} {w}w" for w, name, _ in entry['variants'][fmt])
+
+    def fallback_src(self, filename, url_prefix):
+        """URL of the largest JPEG variant (for browsers without srcset), or None."""
+        entry = self.entries().get(filename) if filename else None
+        if not entry or 'jpeg' not in entry['variants']:
+            return None
+        return f"{url_prefix}/{entry['variants']['jpeg'][-1][1]}"
+
+
+def served_bytes(entry, width=REPORT_WIDTH):
+    """Bytes of the variant a browser picks for `width` (best format), or the original if none fits."""
+    best = None
+    for fmt, variants in entry['variants'].items():
+        for w, _, size in variants:
+            if w >= width or w == entry['width']:
+                best = size if best is None else min(best, size)
+                break
+    return best if best is not None else entry['bytes']
+
+
+def report(manifest):
+    total_source = total_served = 0
+    print(f"{'poster':<60}{'original':>10}{f'{REPORT_WIDTH}w':>10}")
+    for filename, entry in sorted(manifest.items()):
+        served = served_bytes(entry)
+        total_source += entry['bytes']
+        total_served += served
+        print(f"{filename[:58]:<60}{entry['bytes'] // 1024:>8}KB{served // 1024:>8}KB")
+    if total_source:
+        saved = total_source - total_served
+        print(f"\n{len(manifest)} posters: {total_source // 1024} KB -> {total_served // 1024} KB "
+              f"per view of every poster at {REPORT_WIDTH}px, {saved // 1024} KB ({saved * 100 // total_source}%) saved")
+
+
+def convert_all(folder=FOLDER):
+    manifest = load_manifest(folder)
+    converted = 0
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith(SOURCE_EXTENSIONS) or not os.path.isfile(os.path.join(folder, filename)):
+            continue
+        if filename in manifest and manifest[filename]['hash'] == content_hash(os.path.join(folder, filename)):
+            continue
+        entry = make_variants(filename, folder)
+        if entry:
+            manifest[filename] = entry
+            converted += 1
+    os.makedirs(os.path.join(folder, VARIANT_DIR), exist_ok=True)
+    save_manifest(manifest, folder)
+    print(f"Converted {converted} posters.\n")
+    return manifest
+
+
+if __name__ == "__main__":
+    if '--report' in sys.argv[1:]:
+        report(load_manifest())
+    elif not available():
+        print("Pillow is not installed (pip install Pillow); posters are served as uploaded.")
+        sys.exit(1)
+    else:
+        report(convert_all())
+        # Let the running app re-render its cached tournament cards with the new variants
+        from config import Config
+        from versions import ResourceVersions
+        ResourceVersions(Config.VERSIONS_FILE).bump('tournaments')
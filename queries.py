@@ -0,0 +1,63 @@
+"""
+SQL on the booking path and the admin booking list, shared by app.py and
+`python migrate.py --check`, which EXPLAINs these exact strings. `{ids}`
+is filled with one %s per id.
+"""
+
+AVAILABILITY_SELECT = """
+    SELECT s.id, s.slot_date, s.start_time, s.end_time, s.is_active,
+           EXISTS (SELECT 1 FROM bookings b
+                   WHERE b.slot_id = s.id AND b.booking_status != 'rejected') AS is_booked,
+           l.lock_expiry AS locked_until
+    FROM slots s
+    LEFT JOIN slot_locks l ON l.slot_id = s.id AND l.lock_expiry > NOW()
+"""
+
+AVAILABILITY_FOR_DATE = AVAILABILITY_SELECT + " WHERE s.slot_date = %s ORDER BY s.start_time ASC"
+
+# lock_slot: is the slot already booked (and which date to invalidate)
+SLOT_BOOKED_CHECK = """
+    SELECT s.slot_date, s.start_time,
+           EXISTS (SELECT 1 FROM bookings b
+                   WHERE b.slot_id = s.id AND b.booking_status != 'rejected') AS is_booked
+    FROM slots s WHERE s.id = %s
+"""
+
+# book_slot: the requested hour range, row-locked for the booking transaction
+BOOK_RANGE_SELECT = """
+    SELECT id, start_time FROM slots
+    WHERE slot_date = %s AND start_time >= %s AND start_time < %s AND is_active = TRUE
+    FOR UPDATE
+"""
+
+BOOK_CONFLICT_CHECK = """
+    SELECT s.start_time FROM slots s
+    JOIN bookings b ON b.slot_id = s.id
+    WHERE s.id IN ({ids})
+    AND b.booking_status IN ('confirmed', 'pending')
+    AND b.payment_status != 'rejected'
+    ORDER BY s.start_time
+    LIMIT 1
+"""
+
+BOOKING_GROUP_SELECT = """
+    SELECT g.id, g.booking_date, g.start_time AS slot_start, g.end_time AS slot_end,
+           g.slot_count AS duration_hours, g.total_price, g.paid_amount,
+           g.payment_proof AS payment_image, g.booking_status AS status, g.payment_status,
+           u.name as customer_name, u.phone as customer_phone, u.email as customer_email
+    FROM booking_groups g
+    LEFT JOIN users u ON g.user_id = u.id
+"""
+
+# Admin bookings list, newest first, keyed on (booking_date, id)
+BOOKING_PAGE = BOOKING_GROUP_SELECT + """
+    WHERE {where}
+    ORDER BY g.booking_date DESC, g.id DESC
+    LIMIT %s
+"""
+BOOKING_PAGE_AFTER = "(g.booking_date < %s OR (g.booking_date = %s AND g.id < %s))"
+
+PENDING_COUNT = "SELECT COUNT(*) AS pending FROM booking_groups WHERE booking_status = 'pending'"
+
+SET_GROUPS_STATUS = "UPDATE booking_groups SET booking_status = %s, payment_status = %s WHERE id IN ({ids})"
+SET_GROUP_BOOKINGS_STATUS = "UPDATE bookings SET booking_status = %s, payment_status = %s WHERE group_id IN ({ids})"
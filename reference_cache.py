@@ -0,0 +1,85 @@
+import collections
+import threading
+import time
+
+
+class ReferenceCache:
+    """
+    In-process read-through cache for small reference tables (pricing,
+    tournaments) that change a few times a month.
+
+    Entries are keyed by (table, key) and kept in least-recently-used order,
+    bounded by `max_entries`. An entry is served while it is younger than
+    `ttl` seconds and its table's shared version (see versions.py) is
+    unchanged. Admin write routes call invalidate(table), which drops this
+    worker's entries and bumps the version so the other workers reload too.
+    The TTL bounds how long an edit made outside the app stays unseen.
+    """
+
+    def __init__(self, versions=None, ttl=300.0, max_entries=64, enabled=True):
+        self.versions = versions
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _version(self, table):
+        return self.versions.get(table)[0] if self.versions else None
+
+    def get(self, table, key, loader):
+        """Return the cached value for (table, key), calling loader() on a miss. None is not cached."""
+        if not self.enabled:
+            with self._lock:
+                self.misses += 1
+            return loader()
+
+        now = time.time()
+        version = self._version(table)
+        with self._lock:
+            entry = self._entries.get((table, key))
+            if entry and entry[0] > now and entry[1] == version:
+                self._entries.move_to_end((table, key))
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        value = loader()
+        if value is None:
+            return None
+        with self._lock:
+            self._entries[(table, key)] = (now + self.ttl, version, value)
+            self._entries.move_to_end((table, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, *tables):
+        """Forget the tables' entries here and, through their shared version, in every worker."""
+        if self.versions:
+            self.versions.bump(*tables)
+        with self._lock:
+            for k in [k for k in self._entries if k[0] in tables]:
+                del self._entries[k]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
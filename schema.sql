@@ -1,6 +1,13 @@
 CREATE DATABASE IF NOT EXISTS box_cricket_db;
 USE box_cricket_db;
 
+-- Versions applied by migrate.py (every migration is already part of this file)
+CREATE TABLE schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- =========================
 -- ADMINS
 -- =========================
@@ -33,11 +40,24 @@ CREATE TABLE slots (
     is_active BOOLEAN DEFAULT TRUE,
     created_by INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_slot_start (slot_date, start_time),
     FOREIGN KEY (created_by) REFERENCES admins(id)
         ON DELETE SET NULL
         ON UPDATE CASCADE
 );
 
+-- Weekly opening hours; slot_schedule.py generates slots from these
+CREATE TABLE slot_schedules (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    weekday TINYINT NOT NULL,           -- 0 = Monday ... 6 = Sunday
+    open_time TIME NOT NULL,
+    close_time TIME NOT NULL,           -- at or before open_time = runs past midnight
+    slot_minutes INT NOT NULL DEFAULT 60,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_schedule_weekday (weekday)
+);
+
 -- =========================
 -- PRICING
 -- =========================
@@ -53,11 +73,51 @@ CREATE TABLE pricing (
         ON UPDATE CASCADE
 );
 
+-- =========================
+-- BOOKING GROUPS (one per booking request; its bookings are one row per slot)
+-- =========================
+CREATE TABLE booking_groups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    booking_date DATE NOT NULL,
+    start_time TIME,
+    end_time TIME,
+    slot_count INT NOT NULL DEFAULT 1,
+    total_price DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    paid_amount DECIMAL(10,2) DEFAULT 0.00,
+    payment_proof VARCHAR(255),
+    payment_status ENUM(
+        'pending',
+        'paid_manual_verification',
+        'paid_verified',
+        'rejected'
+    ) DEFAULT 'pending',
+    booking_status ENUM(
+        'pending',
+        'confirmed',
+        'rejected'
+    ) DEFAULT 'pending',
+    verified_by INT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_groups_date (booking_date),                        -- admin dashboard keyset pages (booking_date, id)
+    INDEX idx_groups_status (booking_status),
+
+    FOREIGN KEY (user_id) REFERENCES users(id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+
+    FOREIGN KEY (verified_by) REFERENCES admins(id)
+        ON DELETE SET NULL
+        ON UPDATE CASCADE
+);
+
 -- =========================
 -- BOOKINGS
 -- =========================
 CREATE TABLE bookings (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    group_id INT,
     user_id INT NOT NULL,
     slot_id INT NOT NULL,
     booking_date DATE NOT NULL,
@@ -79,6 +139,14 @@ CREATE TABLE bookings (
     verified_by INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    INDEX idx_bookings_group (group_id),
+    INDEX idx_bookings_payment_proof (payment_proof),
+    INDEX idx_bookings_slot_status (slot_id, booking_status),       -- "is this slot booked" probes
+
+    FOREIGN KEY (group_id) REFERENCES booking_groups(id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+
     FOREIGN KEY (user_id) REFERENCES users(id)
         ON DELETE CASCADE
         ON UPDATE CASCADE,
@@ -98,6 +166,24 @@ CREATE TABLE bookings (
     UNIQUE (slot_id, booking_date)
 );
 
+-- =========================
+-- DAILY STATS (per date and hour; kept up to date by stats.py on every booking change)
+-- =========================
+CREATE TABLE daily_stats (
+    stat_date DATE NOT NULL,
+    stat_hour TINYINT NOT NULL,
+    slots_total INT NOT NULL DEFAULT 0,
+    slots_booked INT NOT NULL DEFAULT 0,            -- pending or confirmed
+    slots_confirmed INT NOT NULL DEFAULT 0,
+    bookings INT NOT NULL DEFAULT 0,                -- booking requests starting this hour
+    booked_minutes INT NOT NULL DEFAULT 0,
+    booked_value DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    declared_amount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    collected_amount DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (stat_date, stat_hour)
+);
+
 -- =========================
 -- TOURNAMENTS
 -- =========================
@@ -163,9 +249,46 @@ CREATE TABLE slot_locks (
     lock_expiry DATETIME NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE KEY unique_slot_lock (slot_id),
+    INDEX idx_lock_expiry (lock_expiry),
     FOREIGN KEY (slot_id) REFERENCES slots(id) ON DELETE CASCADE
 );
 
+-- =========================
+-- NOTIFICATION OUTBOX
+-- (written in the booking transaction, drained by notification_worker.py)
+-- =========================
+CREATE TABLE notification_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    channel ENUM('email', 'whatsapp') NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255),
+    body TEXT NOT NULL,
+    status ENUM(
+        'pending',
+        'sending',
+        'sent',
+        'failed'
+    ) DEFAULT 'pending',
+    attempts INT DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error VARCHAR(500),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME,
+    INDEX idx_outbox_due (status, next_attempt_at)
+);
+
+-- =========================
+-- CHANGE LOG
+-- (one row per write to a booking group, tournament or contact message; see changes.py)
+-- =========================
+CREATE TABLE change_log (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    entity VARCHAR(32) NOT NULL,
+    entity_id INT NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_change_log_changed_at (changed_at)
+);
+
 -- =========================
 -- DEFAULT ADMIN (EXAMPLE HASH)
 -- =========================
@@ -0,0 +1,325 @@
+"""
+Slot holds ("locks") taken while a customer pays for a slot.
+
+Three interchangeable backends, picked with Config.SLOT_LOCK_BACKEND:
+
+- 'table'  (TableLockBackend): rows in slot_locks, checked and written under
+  SELECT ... FOR UPDATE in a short transaction. The default.
+- 'named'  (NamedLockBackend): lease rows in slot_locks, with MySQL GET_LOCK
+  serialising acquirers of the same slot instead of InnoDB row locks.
+- 'memory' (MemoryLockBackend): a dict of holds plus a heap ordered by
+  expiry, in this process only. For single-process deployments (one
+  worker, any number of threads); nothing is written to MySQL.
+
+Every backend offers acquire, refresh, release and owners (a bulk
+ownership read). The MySQL backends take a connection provider, a callable
+returning a connection; they never close it, so the provider decides
+whether it is pooled, request-scoped or per-thread. release() and owners()
+also accept a cursor, to run inside the caller's transaction.
+"""
+import datetime
+import heapq
+import threading
+
+import mysql.connector
+
+LOCKED = 'locked'
+REFRESHED = 'refreshed'
+TAKEN = 'taken'
+
+HOLD_OWNERS = "SELECT slot_id, user_identifier, lock_expiry FROM slot_locks WHERE slot_id IN ({ids})"
+
+# Holds being refreshed right now are row-locked and skipped until the next pass
+REAP_EXPIRED = """
+    SELECT l.slot_id, s.slot_date, s.start_time
+    FROM slot_locks l JOIN slots s ON s.id = l.slot_id
+    WHERE l.lock_expiry < NOW()
+    ORDER BY l.lock_expiry
+    LIMIT %s
+    FOR UPDATE OF l SKIP LOCKED
+"""
+
+
+class LockBackendUnavailable(Exception):
+    pass
+
+
+def _now():
+    return datetime.datetime.now().replace(microsecond=0)
+
+
+class SlotLockBackend:
+    in_database = True # holds are visible to SQL (slot_locks rows)
+
+    def acquire(self, slot_id, owner, ttl):
+        """
+        Take or extend the hold on a slot for `ttl` seconds.
+        Returns (status, expiry): LOCKED, REFRESHED (owner already held it) or TAKEN (expiry None).
+        """
+        raise NotImplementedError
+
+    def refresh(self, slot_id, owner, ttl):
+        """Extend an unexpired hold owned by `owner`; returns the new expiry, or None."""
+        raise NotImplementedError
+
+    def release(self, slot_ids, owner=None, cursor=None):
+        """Drop the holds on slot_ids (only those held by `owner`, if given)."""
+        raise NotImplementedError
+
+    def owners(self, slot_ids, cursor=None):
+        """
+        {slot_id: (owner, expiry)} for the slots that have a hold. Expired
+        holds not yet cleaned up may be included; compare expiry with now.
+        """
+        raise NotImplementedError
+
+    def reap(self, limit=500):
+        """Delete up to `limit` expired holds; returns [(slot_id, slot_date, start_time)] removed."""
+        return []
+
+
+class _MySQLBackend(SlotLockBackend):
+
+    read_suffix = ""
+
+    def __init__(self, connect):
+        self.connect = connect
+
+    def _connection(self):
+        conn = self.connect()
+        if conn is None:
+            raise LockBackendUnavailable("No database connection for slot locks")
+        return conn
+
+    def refresh(self, slot_id, owner, ttl):
+        conn = self._connection()
+        cursor = conn.cursor(buffered=True)
+        try:
+            expiry = _now() + datetime.timedelta(seconds=ttl)
+            cursor.execute(
+                "UPDATE slot_locks SET lock_expiry = %s WHERE slot_id = %s AND user_identifier = %s AND lock_expiry > NOW()",
+                (expiry, slot_id, owner)
+            )
+            updated = cursor.rowcount
+            conn.commit()
+            return expiry if updated else None
+        finally:
+            cursor.close()
+
+    def release(self, slot_ids, owner=None, cursor=None):
+        slot_ids = list(slot_ids)
+        if not slot_ids:
+            return
+        own_cursor = cursor is None
+        if own_cursor:
+            conn = self._connection()
+            cursor = conn.cursor(buffered=True)
+        try:
+            query = f"DELETE FROM slot_locks WHERE slot_id IN ({', '.join(['%s'] * len(slot_ids))})"
+            params = slot_ids
+            if owner is not None:
+                query += " AND user_identifier = %s"
+                params = slot_ids + [owner]
+            cursor.execute(query, params)
+            if own_cursor:
+                conn.commit()
+        finally:
+            if own_cursor:
+                cursor.close()
+
+    def owners(self, slot_ids, cursor=None):
+        slot_ids = list(slot_ids)
+        if not slot_ids:
+            return {}
+        own_cursor = cursor is None
+        if own_cursor:
+            cursor = self._connection().cursor(buffered=True)
+        try:
+            cursor.execute(HOLD_OWNERS.format(ids=', '.join(['%s'] * len(slot_ids))), slot_ids)
+            rows = cursor.fetchall()
+        finally:
+            if own_cursor:
+                cursor.close()
+        out = {}
+        for r in rows:
+            if isinstance(r, dict):
+                r = (r['slot_id'], r['user_identifier'], r['lock_expiry'])
+            out[r[0]] = (r[1], r[2])
+        return out
+
+    def reap(self, limit=500):
+        conn = self._connection()
+        cursor = conn.cursor(buffered=True)
+        try:
+            cursor.execute(REAP_EXPIRED, (limit,))
+            rows = cursor.fetchall()
+            if rows:
+                cursor.execute(
+                    f"DELETE FROM slot_locks WHERE slot_id IN ({', '.join(['%s'] * len(rows))})",
+                    [r[0] for r in rows]
+                )
+            conn.commit()
+            return rows
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _decide(self, cursor, slot_id, owner, ttl):
+        """Read the slot's hold and write ours if allowed. Caller serialises."""
+        cursor.execute("SELECT user_identifier, lock_expiry > NOW() FROM slot_locks WHERE slot_id = %s" + self.read_suffix, (slot_id,))
+        row = cursor.fetchone()
+        if isinstance(row, dict):
+            row = tuple(row.values())
+        expiry = _now() + datetime.timedelta(seconds=ttl)
+        if row is None:
+            cursor.execute("INSERT INTO slot_locks (slot_id, user_identifier, lock_expiry) VALUES (%s, %s, %s)",
+                           (slot_id, owner, expiry))
+            return LOCKED, expiry
+        current_owner, live = row
+        if live and current_owner != owner:
+            return TAKEN, None
+        cursor.execute("UPDATE slot_locks SET user_identifier = %s, lock_expiry = %s WHERE slot_id = %s",
+                       (owner, expiry, slot_id))
+        return (REFRESHED if live else LOCKED), expiry
+
+
+class TableLockBackend(_MySQLBackend):
+    """Holds in slot_locks, read and written under a row lock."""
+
+    read_suffix = " FOR UPDATE"
+
+    def acquire(self, slot_id, owner, ttl):
+        conn = self._connection()
+        cursor = conn.cursor(buffered=True)
+        try:
+            result = self._decide(cursor, slot_id, owner, ttl)
+            conn.commit()
+            return result
+        except mysql.connector.Error as err:
+            conn.rollback()
+            # Two first holds on the same slot raced (duplicate key or gap-lock deadlock): the other one won
+            if err.errno in (1062, 1213):
+                return TAKEN, None
+            raise
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+class NamedLockBackend(_MySQLBackend):
+    """
+    Lease rows in slot_locks; concurrent acquirers of one slot queue on a
+    MySQL named lock (GET_LOCK) for at most `wait` seconds instead of
+    holding InnoDB row locks.
+    """
+
+    def __init__(self, connect, wait=2, prefix='dmax_slot_'):
+        super().__init__(connect)
+        self.wait = wait
+        self.prefix = prefix
+
+    def acquire(self, slot_id, owner, ttl):
+        conn = self._connection()
+        cursor = conn.cursor(buffered=True)
+        name = f"{self.prefix}{slot_id}"
+        try:
+            # End any open snapshot, so the lease read below sees the latest committed row
+            conn.commit()
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (name, self.wait))
+            if cursor.fetchone()[0] != 1:
+                return TAKEN, None
+            try:
+                result = self._decide(cursor, slot_id, owner, ttl)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+class MemoryLockBackend(SlotLockBackend):
+    """Holds in a dict, expired through a heap ordered by expiry. Process-local."""
+
+    in_database = False
+
+    def __init__(self):
+        self._holds = {}   # slot_id -> (owner, expiry)
+        self._expiries = []   # (expiry, slot_id); stale entries are skipped
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        while self._expiries and self._expiries[0][0] <= now:
+            expiry, slot_id = heapq.heappop(self._expiries)
+            hold = self._holds.get(slot_id)
+            if hold and hold[1] == expiry:
+                del self._holds[slot_id]
+
+    def _set(self, slot_id, owner, expiry):
+        self._holds[slot_id] = (owner, expiry)
+        heapq.heappush(self._expiries, (expiry, slot_id))
+
+    def acquire(self, slot_id, owner, ttl):
+        now = _now()
+        expiry = now + datetime.timedelta(seconds=ttl)
+        with self._lock:
+            self._purge(now)
+            hold = self._holds.get(slot_id)
+            if hold and hold[0] != owner:
+                return TAKEN, None
+            self._set(slot_id, owner, expiry)
+            return (REFRESHED if hold else LOCKED), expiry
+
+    def refresh(self, slot_id, owner, ttl):
+        now = _now()
+        with self._lock:
+            self._purge(now)
+            hold = self._holds.get(slot_id)
+            if not hold or hold[0] != owner:
+                return None
+            expiry = now + datetime.timedelta(seconds=ttl)
+            self._set(slot_id, owner, expiry)
+            return expiry
+
+    def release(self, slot_ids, owner=None, cursor=None):
+        with self._lock:
+            for slot_id in slot_ids:
+                hold = self._holds.get(slot_id)
+                if hold and (owner is None or hold[0] == owner):
+                    del self._holds[slot_id]
+
+    def owners(self, slot_ids, cursor=None):
+        with self._lock:
+            self._purge(_now())
+            return {slot_id: self._holds[slot_id] for slot_id in slot_ids if slot_id in self._holds}
+
+    def reap(self, limit=500):
+        # Expired holds are dropped lazily on every call; nothing is stored in MySQL
+        with self._lock:
+            self._purge(_now())
+        return []
+
+    def __len__(self):
+        return len(self._holds)
+
+
+BACKENDS = ('table', 'named', 'memory')
+
+
+def create_backend(name, connect=None, wait=2):
+    """Build the backend called `name` ('table', 'named' or 'memory')."""
+    if name == 'table':
+        return TableLockBackend(connect)
+    if name == 'named':
+        return NamedLockBackend(connect, wait=wait)
+    if name == 'memory':
+        return MemoryLockBackend()
+    raise ValueError(f"Unknown slot lock backend: {name} (expected one of {', '.join(BACKENDS)})")
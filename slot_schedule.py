@@ -0,0 +1,129 @@
+"""
+Weekly schedule templates and the rolling-horizon slot generator.
+
+slot_schedules holds opening hours per weekday (0 = Monday ... 6 = Sunday);
+a close_time at or before open_time runs to that time the next day, so
+05:00-00:00 covers the whole evening and 18:00-02:00 puts its 00:00 and
+01:00 slots on the following date. generate_slots fills `slots` for
+every date in the next N weeks with INSERT IGNORE, relying on the unique
+(slot_date, start_time) key to skip slots that already exist.
+
+Run from cron (or the admin "Generate" button) to keep the horizon topped up:
+    python slot_schedule.py [weeks]
+"""
+import datetime
+import sys
+import time
+
+import mysql.connector
+from config import Config
+from occupancy import OccupancyMap
+import stats
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Seeded by migrate.py: weekdays 06:00-23:00, weekends 05:00-midnight
+DEFAULT_SCHEDULES = [(d, '06:00:00', '23:00:00') for d in range(5)] + [(d, '05:00:00', '00:00:00') for d in (5, 6)]
+
+INSERT_SLOT = "INSERT IGNORE INTO slots (slot_date, start_time, end_time, created_by) VALUES (%s, %s, %s, %s)"
+BATCH_SIZE = 1000
+
+
+def _as_time(value):
+    if isinstance(value, datetime.timedelta):
+        return (datetime.datetime.min + value).time()
+    return value
+
+
+def load_schedules(cursor):
+    """Active templates as {weekday: [(open_time, close_time, slot_minutes), ...]}."""
+    cursor.execute("""
+        SELECT weekday, open_time, close_time, slot_minutes FROM slot_schedules
+        WHERE is_active = TRUE ORDER BY weekday, open_time
+    """)
+    schedules = {}
+    for weekday, open_time, close_time, slot_minutes in cursor.fetchall():
+        schedules.setdefault(weekday, []).append((_as_time(open_time), _as_time(close_time), slot_minutes))
+    return schedules
+
+
+def day_slots(open_time, close_time, slot_minutes=60):
+    """
+    (day_offset, start, end) for one template, times as 'HH:MM:SS'; slots never
+    run past close_time. day_offset is 1 for slots starting after midnight,
+    which belong to the next slot_date.
+    """
+    start = datetime.datetime.combine(datetime.date.min, open_time)
+    end = datetime.datetime.combine(datetime.date.min, close_time)
+    if end <= start:
+        end += datetime.timedelta(days=1)
+    step = datetime.timedelta(minutes=slot_minutes)
+    slots = []
+    while start + step <= end:
+        slots.append(((start.date() - datetime.date.min).days,
+                      start.strftime('%H:%M:%S'), (start + step).strftime('%H:%M:%S')))
+        start += step
+    return slots
+
+
+def build_slot_rows(schedules, start_date, days, created_by=None):
+    """
+    Insert parameters for every templated slot from start_date for `days` days.
+    The day before start_date is walked too, for its post-midnight slots.
+    """
+    per_weekday = {
+        weekday: [s for open_time, close_time, minutes in templates for s in day_slots(open_time, close_time, minutes)]
+        for weekday, templates in schedules.items()
+    }
+    last_date = start_date + datetime.timedelta(days=days - 1)
+    rows = []
+    for offset in range(-1, days):
+        d = start_date + datetime.timedelta(days=offset)
+        for day_offset, slot_start, slot_end in per_weekday.get(d.weekday(), ()):
+            slot_date = d + datetime.timedelta(days=day_offset)
+            if start_date <= slot_date <= last_date:
+                rows.append((slot_date, slot_start, slot_end, created_by))
+    return rows
+
+
+def generate_slots(conn, weeks=None, start_date=None, created_by=None):
+    """
+    Fill the slot table for the next `weeks` weeks from the active templates.
+    Returns (slots_created, dates_covered); slots that already exist are left as they are.
+    """
+    weeks = weeks or Config.SLOT_HORIZON_WEEKS
+    start_date = start_date or datetime.date.today()
+    cursor = conn.cursor()
+    try:
+        rows = build_slot_rows(load_schedules(cursor), start_date, weeks * 7, created_by)
+        created = 0
+        for i in range(0, len(rows), BATCH_SIZE):
+            cursor.executemany(INSERT_SLOT, rows[i:i + BATCH_SIZE])
+            created += max(cursor.rowcount, 0)
+        conn.commit()
+    finally:
+        cursor.close()
+    dates = sorted({row[0] for row in rows})
+    if created and dates:
+        # New slots are new capacity in the occupancy rollup
+        stats.rebuild(conn, dates[0], dates[-1])
+    return created, dates
+
+
+if __name__ == "__main__":
+    weeks = int(sys.argv[1]) if len(sys.argv) > 1 else Config.SLOT_HORIZON_WEEKS
+    try:
+        conn = mysql.connector.connect(
+            host=Config.MYSQL_HOST,
+            user=Config.MYSQL_USER,
+            password=Config.MYSQL_PASSWORD,
+            database=Config.MYSQL_DB
+        )
+        started = time.perf_counter()
+        created, dates = generate_slots(conn, weeks)
+        # Running web workers re-read these dates on their next request
+        OccupancyMap(Config.OCCUPANCY_FILE).forget(*dates)
+        print(f"{created} slots created across {len(dates)} dates ({weeks} weeks) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        conn.close()
+    except mysql.connector.Error as err:
+        print(f"Database Error: {err}")
@@ -32,22 +32,18 @@ async function loadSlots() {
     container.innerHTML = '<p>Loading slots...</p>';
 
     try {
-        // 1. Fetch Slots (Master Data)
-        const slotsRes = await fetch(`/api/slots?date=${dateStr}`);
-        if (!slotsRes.ok) {
-            const text = await slotsRes.text();
-            throw new Error(`Server Error: ${slotsRes.status} ${text}`);
+        // Slots and their booked/locked/past state in one request
+        const res = await fetch(`/api/availability?date=${dateStr}`);
+        if (!res.ok) {
+            const text = await res.text();
+            throw new Error(`Server Error: ${res.status} ${text}`);
         }
-        allSlots = await slotsRes.json();
-
-        // 2. Fetch Booked IDs
-        const bookedRes = await fetch(`/api/check_availability?date=${dateStr}`);
-        if (!bookedRes.ok) {
-            throw new Error(`Availability Error: ${bookedRes.status}`);
-        }
-        bookedIds = await bookedRes.json();
+        const data = await res.json();
+        allSlots = data.slots;
+        bookedIds = allSlots.filter(s => s.is_booked || s.is_locked).map(s => s.id);
 
         renderSlots();
+        watchAvailability(dateStr);
 
     } catch (err) {
         console.error("Error loading slots:", err);
@@ -70,69 +66,76 @@ function renderSlots() {
 
     // Get current time for validation
     const now = new Date();
+    const isToday = isTodayDate(dateStr, now);
+
+    allSlots.forEach(slot => {
+        container.appendChild(slotElement(slot, now, isToday));
+    });
+}
+
+function isTodayDate(dateStr, now) {
     const year = now.getFullYear();
     const month = String(now.getMonth() + 1).padStart(2, '0');
     const day = String(now.getDate()).padStart(2, '0');
-    const todayYMD = `${year}-${month}-${day}`;
-    const isToday = dateStr === todayYMD;
+    return dateStr === `${year}-${month}-${day}`;
+}
 
-    allSlots.forEach(slot => {
-        // Server-side 'is_past' takes precedence, but keep safe default
-        let isPast = slot.is_past;
-
-        // Fallback for safety (or if API update hasn't propagated)
-        if (isPast === undefined && isToday) {
-            const [sHour, sMin] = slot.start_time.split(':');
-            const slotDate = new Date();
-            slotDate.setHours(sHour, sMin, 0, 0);
-            if (slotDate < now) {
-                isPast = true;
-            }
+function slotElement(slot, now, isToday) {
+    // Server-side 'is_past' takes precedence, but keep safe default
+    let isPast = slot.is_past;
+
+    // Fallback for safety (or if API update hasn't propagated)
+    if (isPast === undefined && isToday) {
+        const [sHour, sMin] = slot.start_time.split(':');
+        const slotDate = new Date();
+        slotDate.setHours(sHour, sMin, 0, 0);
+        if (slotDate < now) {
+            isPast = true;
         }
+    }
 
-        const isBooked = bookedIds.includes(slot.id);
-        const isUnavailable = isBooked || isPast;
-
-        const el = document.createElement('div');
-        el.className = `time-slot ${isUnavailable ? 'booked' : 'available'}`;
-        el.textContent = slot.display; // e.g., "10:00 AM"
-        el.dataset.id = slot.id;
-        el.dataset.time = slot.start_time;
-
-        if (isUnavailable) {
-            el.style.backgroundColor = "#ffcccc"; // Light Red
-            el.style.color = "#d9534f";
-            el.style.cursor = "not-allowed";
-            if (isBooked) {
-                el.title = "Booked";
-            } else {
-                el.title = "Time Passed";
-                el.style.backgroundColor = "#e0e0e0"; // Grey for past
-                el.style.color = "#a0a0a0";
-            }
+    const isBooked = bookedIds.includes(slot.id);
+    const isUnavailable = isBooked || isPast;
+
+    const el = document.createElement('div');
+    el.className = `time-slot ${isUnavailable ? 'booked' : 'available'}`;
+    el.textContent = slot.display; // e.g., "10:00 AM"
+    el.dataset.id = slot.id;
+    el.dataset.time = slot.start_time;
+
+    if (isUnavailable) {
+        el.style.backgroundColor = "#ffcccc"; // Light Red
+        el.style.color = "#d9534f";
+        el.style.cursor = "not-allowed";
+        if (isBooked) {
+            el.title = "Booked";
         } else {
-            el.style.backgroundColor = "#dff0d8"; // Light Green
-            el.style.color = "#3c763d";
-            el.onclick = () => handleSlotClick(slot);
+            el.title = "Time Passed";
+            el.style.backgroundColor = "#e0e0e0"; // Grey for past
+            el.style.color = "#a0a0a0";
         }
+    } else {
+        el.style.backgroundColor = "#dff0d8"; // Light Green
+        el.style.color = "#3c763d";
+        el.onclick = () => handleSlotClick(slot);
+    }
 
-        // Highlight Selection (only if available or if we want to show it was selected before? No, reset if invalid usually)
-        if (!isUnavailable) {
-            if (selectedStartId && selectedEndId) {
-                if (isSlotInSelectedRange(slot)) {
-                    el.classList.add('selected-range');
-                    el.style.backgroundColor = "#4CAF50"; // Darker Green
-                    el.style.color = "white";
-                }
-            } else if (selectedStartId === slot.id) {
-                el.classList.add('selected-start');
-                el.style.backgroundColor = "#4CAF50";
+    // Highlight Selection (only if available or if we want to show it was selected before? No, reset if invalid usually)
+    if (!isUnavailable) {
+        if (selectedStartId && selectedEndId) {
+            if (isSlotInSelectedRange(slot)) {
+                el.classList.add('selected-range');
+                el.style.backgroundColor = "#4CAF50"; // Darker Green
                 el.style.color = "white";
             }
+        } else if (selectedStartId === slot.id) {
+            el.classList.add('selected-start');
+            el.style.backgroundColor = "#4CAF50";
+            el.style.color = "white";
         }
+    }
 
-        container.appendChild(el);
-    });
+    return el;
 }
 
 function handleSlotClick(slot) {
@@ -308,3 +311,95 @@ function toTimeStr(date) {
 // Override Payment.js submit trigger if necessary, or work with it.
 // The existing `handleBooking` reads `paid_amount_input`.
 // We just need to ensure inputs are populated.
+
+// --- Live availability (Server-Sent Events) ---
+// Holds and bookings made by other customers arrive while the page is open,
+// so the grid is updated slot by slot instead of waiting for a 409.
+
+let availabilityStream = null;
+let availabilityPoll = null;
+const AVAILABILITY_POLL_MS = 20000;
+
+function watchAvailability(dateStr) {
+    if (availabilityStream) availabilityStream.close();
+    clearInterval(availabilityPoll);
+    availabilityPoll = null;
+    if (!window.EventSource) {
+        pollAvailability();
+        return;
+    }
+    availabilityStream = new EventSource(`/api/availability/stream?date=${dateStr}`);
+    ['lock', 'unlock', 'book', 'reject'].forEach(type => {
+        availabilityStream.addEventListener(type, e => applySlotEvent(JSON.parse(e.data)));
+    });
+    availabilityStream.addEventListener('reload', () => refreshSlots());
+    // Closed for good (204 when the server has no stream to spare, or an error): poll instead
+    availabilityStream.addEventListener('error', () => {
+        if (availabilityStream.readyState === EventSource.CLOSED) pollAvailability();
+    });
+}
+
+function pollAvailability() {
+    if (!availabilityPoll) availabilityPoll = setInterval(refreshSlots, AVAILABILITY_POLL_MS);
+}
+
+function applySlotEvent(event) {
+    if (event.date !== document.getElementById('date').value) return;
+    const slot = allSlots.find(s => s.start_time === event.start_time);
+    if (!slot) return;
+
+    const inSelection = selectedStartId === slot.id || isSlotInSelectedRange(slot);
+    // Our own hold (payment in progress) comes back as a lock too; leave the selection alone
+    if (event.type === 'lock' && inSelection) return;
+
+    if (event.type === 'lock') slot.is_locked = true;
+    if (event.type === 'unlock') slot.is_locked = false;
+    if (event.type === 'book') { slot.is_booked = true; slot.is_locked = false; }
+    if (event.type === 'reject') slot.is_booked = false;
+    bookedIds = allSlots.filter(s => s.is_booked || s.is_locked).map(s => s.id);
+
+    if (event.type === 'book' && inSelection) {
+        selectedStartId = null;
+        selectedEndId = null;
+        updateBookingInfo();
+        renderSlots();
+        showCustomAlert("A slot you selected has just been booked. Please choose another time.", "Slot Taken", "warning");
+        return;
+    }
+    updateSlotElement(slot);
+}
+
+function updateSlotElement(slot) {
+    const el = document.querySelector(`#slots-container .time-slot[data-id="${slot.id}"]`);
+    if (!el) {
+        renderSlots();
+        return;
+    }
+    const now = new Date();
+    el.replaceWith(slotElement(slot, now, isTodayDate(document.getElementById('date').value, now)));
+}
+
+// The date's slots were changed by the club: refetch, keeping the selection if it is still free
+async function refreshSlots() {
+    const dateStr = document.getElementById('date').value;
+    try {
+        const res = await fetch(`/api/availability?date=${dateStr}`);
+        if (!res.ok) return;
+        const data = await res.json();
+        if (data.date !== document.getElementById('date').value) return;
+        allSlots = data.slots;
+        bookedIds = allSlots.filter(s => s.is_booked || s.is_locked).map(s => s.id);
+
+        const start = allSlots.find(s => s.id === selectedStartId);
+        const end = selectedEndId ? allSlots.find(s => s.id === selectedEndId) : start;
+        if (selectedStartId && (!start || !end || allSlots.some(s =>
+                s.is_booked && s.start_time >= start.start_time && s.start_time <= end.start_time))) {
+            selectedStartId = null;
+            selectedEndId = null;
+        }
+        renderSlots();
+        updateBookingInfo();
+    } catch (err) {
+        console.error("Error refreshing slots:", err);
+    }
+}
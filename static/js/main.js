@@ -1,6 +1,8 @@
 document.addEventListener('DOMContentLoaded', () => {
     // If on tournaments page, load tournaments
-    if (document.getElementById('tournament-list')) {
+    const tournamentList = document.getElementById('tournament-list');
+    // The server renders the cards when it can; only fetch them when it couldn't
+    if (tournamentList && !tournamentList.dataset.rendered) {
         loadTournaments();
     }
 });
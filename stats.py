@@ -0,0 +1,185 @@
+"""
+Revenue and utilisation rollups.
+
+daily_stats holds one row per (date, hour) with the slot capacity, booked
+and confirmed slots, booking requests starting in that hour, booked
+minutes and money (value of live bookings, amount customers declared as
+paid, amount verified by an admin). Occupancy is slots_booked/slots_total.
+
+Cells are recomputed from slots and bookings rather than adjusted by
+deltas, so a missed update is repaired by the next one:
+
+- refresh_cells() upserts just the (date, hour) cells a booking touches;
+  booking, approve, reject and delete call it inside their transaction.
+- refresh_days() replaces whole days; slot changes (capacity) and the
+  rebuild use it.
+
+Rebuild everything (or a range) with:
+    python stats.py [from_date] [to_date]
+"""
+import datetime
+import sys
+import time
+
+import mysql.connector
+from config import Config
+
+COLUMNS = ('stat_date', 'stat_hour', 'slots_total', 'slots_booked', 'slots_confirmed', 'bookings',
+           'booked_minutes', 'booked_value', 'declared_amount', 'collected_amount')
+
+# Rejected bookings don't count; each slot has at most one live booking
+ROLLUP_SELECT = """
+    SELECT s.slot_date, HOUR(s.start_time),
+           SUM(s.is_active OR b.id IS NOT NULL),
+           COUNT(b.id),
+           COALESCE(SUM(b.booking_status = 'confirmed'), 0),
+           COALESCE(SUM(g.start_time = s.start_time), 0),
+           COALESCE(SUM(IF(b.id IS NULL, 0, MOD(TIME_TO_SEC(s.end_time) - TIME_TO_SEC(s.start_time) + 86400, 86400) DIV 60)), 0),
+           COALESCE(SUM(b.total_price), 0),
+           COALESCE(SUM(b.paid_amount), 0),
+           COALESCE(SUM(IF(b.payment_status = 'paid_verified', b.paid_amount, 0)), 0)
+    FROM slots s
+    LEFT JOIN bookings b ON b.slot_id = s.id AND b.booking_status != 'rejected'
+    LEFT JOIN booking_groups g ON g.id = b.group_id
+    WHERE s.slot_date BETWEEN %s AND %s{hours}
+    GROUP BY s.slot_date, HOUR(s.start_time)
+    ORDER BY s.slot_date, HOUR(s.start_time)
+"""
+
+UPSERT = (f"INSERT INTO daily_stats ({', '.join(COLUMNS)}) {{select}} ON DUPLICATE KEY UPDATE "
+          + ', '.join(f"{c} = VALUES({c})" for c in COLUMNS[2:]))
+
+
+def _hour(value):
+    if isinstance(value, datetime.timedelta):
+        return int(value.total_seconds()) // 3600 % 24
+    if isinstance(value, str):
+        return int(value.split(':')[0])
+    return value.hour
+
+
+def _row(row):
+    return tuple(row.values()) if isinstance(row, dict) else row
+
+
+def refresh_cells(cursor, cells):
+    """Recompute the given (date, start_time or hour) cells."""
+    by_date = {}
+    for slot_date, hour in cells:
+        by_date.setdefault(slot_date, set()).add(hour if isinstance(hour, int) else _hour(hour))
+    for slot_date, hours in sorted(by_date.items()):
+        hours = sorted(hours)
+        select = ROLLUP_SELECT.format(hours=f" AND HOUR(s.start_time) IN ({', '.join(['%s'] * len(hours))})")
+        cursor.execute(UPSERT.format(select=select), [slot_date, slot_date] + hours)
+
+
+def group_cells(cursor, *group_ids):
+    """(date, hour) cells covered by booking groups' slots. Read before deleting the groups."""
+    if not group_ids:
+        return []
+    cursor.execute(f"""
+        SELECT DISTINCT s.slot_date, HOUR(s.start_time)
+        FROM bookings b JOIN slots s ON s.id = b.slot_id
+        WHERE b.group_id IN ({', '.join(['%s'] * len(group_ids))})
+    """, group_ids)
+    return [_row(r) for r in cursor.fetchall()]
+
+
+def refresh_days(cursor, date_from, date_to=None):
+    """Replace every cell from date_from to date_to (inclusive)."""
+    date_to = date_to or date_from
+    cursor.execute("DELETE FROM daily_stats WHERE stat_date BETWEEN %s AND %s", (date_from, date_to))
+    cursor.execute(UPSERT.format(select=ROLLUP_SELECT.format(hours='')), (date_from, date_to))
+
+
+def rebuild(conn, date_from=None, date_to=None, chunk_days=31):
+    """Recompute daily_stats over a range (default: every date with slots), a month per transaction."""
+    cursor = conn.cursor(buffered=True)
+    try:
+        if date_from is None or date_to is None:
+            cursor.execute("SELECT MIN(slot_date), MAX(slot_date) FROM slots")
+            first, last = cursor.fetchone()
+            date_from = date_from or first
+            date_to = date_to or last
+        if date_from is None:
+            return 0
+        days = 0
+        day = date_from
+        while day <= date_to:
+            end = min(day + datetime.timedelta(days=chunk_days - 1), date_to)
+            refresh_days(cursor, day, end)
+            conn.commit()
+            days += (end - day).days + 1
+            day = end + datetime.timedelta(days=1)
+        return days
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+# --- reports -----------------------------------------------------------------
+
+SUMS = """
+    SUM(slots_total) AS slots_total, SUM(slots_booked) AS slots_booked,
+    SUM(slots_confirmed) AS slots_confirmed, SUM(bookings) AS bookings,
+    SUM(booked_minutes) AS booked_minutes, SUM(booked_value) AS booked_value,
+    SUM(declared_amount) AS declared_amount, SUM(collected_amount) AS collected_amount
+"""
+
+
+REPORT_BY_PERIOD = f"""
+    SELECT {{period}} AS period, {SUMS}
+    FROM daily_stats WHERE stat_date BETWEEN %s AND %s
+    GROUP BY period ORDER BY period
+"""
+
+REPORT_BY_HOUR = f"""
+    SELECT stat_hour, {SUMS}
+    FROM daily_stats WHERE stat_date BETWEEN %s AND %s
+    GROUP BY stat_hour ORDER BY stat_hour
+"""
+
+
+def _finish(row):
+    row['booked_hours'] = round((row['booked_minutes'] or 0) / 60, 1)
+    row['occupancy'] = round(100 * row['slots_booked'] / row['slots_total'], 1) if row['slots_total'] else 0.0
+    return row
+
+
+def report(cursor, date_from, date_to):
+    """
+    Totals for a date range from daily_stats: per day (per month beyond ~3
+    months), per hour of day, and overall. `cursor` must be a dictionary cursor.
+    """
+    monthly = (date_to - date_from).days > 92
+    # The month format is bound: a literal '%' would have to survive the driver's parameter substitution
+    period, params = ("DATE_FORMAT(stat_date, %s)", ['%Y-%m']) if monthly else ("stat_date", [])
+    cursor.execute(REPORT_BY_PERIOD.format(period=period), params + [date_from, date_to])
+    periods = [_finish(r) for r in cursor.fetchall()]
+
+    cursor.execute(REPORT_BY_HOUR, (date_from, date_to))
+    hours = [_finish(r) for r in cursor.fetchall()]
+
+    totals = {k: sum(r[k] or 0 for r in periods) for k in
+              ('slots_total', 'slots_booked', 'slots_confirmed', 'bookings', 'booked_minutes',
+               'booked_value', 'declared_amount', 'collected_amount')}
+    return {'monthly': monthly, 'periods': periods, 'hours': hours, 'totals': _finish(totals)}
+
+
+if __name__ == "__main__":
+    args = [datetime.date.fromisoformat(a) for a in sys.argv[1:3]]
+    try:
+        conn = mysql.connector.connect(
+            host=Config.MYSQL_HOST,
+            user=Config.MYSQL_USER,
+            password=Config.MYSQL_PASSWORD,
+            database=Config.MYSQL_DB
+        )
+        started = time.perf_counter()
+        days = rebuild(conn, *args)
+        print(f"daily_stats rebuilt for {days} days in {(time.perf_counter() - started) * 1000:.0f} ms")
+        conn.close()
+    except mysql.connector.Error as err:
+        print(f"Database Error: {err}")
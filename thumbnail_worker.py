@@ -0,0 +1,64 @@
+"""
+Makes thumbnails of payment screenshots (see thumbnails.py).
+
+Run alongside the web app (see Procfile); it picks up new uploads within
+THUMBNAIL_POLL_INTERVAL seconds:
+    python thumbnail_worker.py
+
+Thumbnail every existing screenshot that has none, then exit:
+    python thumbnail_worker.py --backfill
+"""
+import os
+import sys
+import time
+
+from config import Config
+import thumbnails
+
+PAYMENT_UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads', 'payment_proofs')
+
+
+def build_pool():
+    return thumbnails.ThumbnailPool(
+        PAYMENT_UPLOAD_FOLDER,
+        workers=Config.THUMBNAIL_WORKERS,
+        size=Config.THUMBNAIL_SIZE,
+        quality=Config.THUMBNAIL_QUALITY,
+    )
+
+
+def backfill(pool):
+    pending = thumbnails.missing(PAYMENT_UPLOAD_FOLDER)
+    print(f"{len(pending)} screenshots without thumbnails")
+    start = time.time()
+    made, failed, source_bytes, thumb_bytes = pool.run(pending)
+    print(f"Made {made} thumbnails ({failed} failed) in {time.time() - start:.1f}s: "
+          f"{source_bytes / 1024:.0f} KB of screenshots -> {thumb_bytes / 1024:.0f} KB of thumbnails")
+
+
+def run_forever(pool, poll_interval):
+    failed = set() # unreadable files are not retried until the worker restarts
+    while True:
+        pending = [name for name in thumbnails.missing(PAYMENT_UPLOAD_FOLDER) if name not in failed]
+        if pending:
+            pool.run(pending)
+            failed.update(name for name in pending
+                          if not os.path.exists(thumbnails.thumb_path(PAYMENT_UPLOAD_FOLDER, name)))
+        time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    if not thumbnails.available():
+        print("Pillow is not installed (pip install Pillow); no thumbnails will be made.")
+        sys.exit(1)
+    pool = build_pool()
+    try:
+        if '--backfill' in sys.argv[1:]:
+            backfill(pool)
+        else:
+            print("Thumbnail worker started.")
+            run_forever(pool, Config.THUMBNAIL_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
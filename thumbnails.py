@@ -0,0 +1,100 @@
+"""
+Thumbnails of payment screenshots for the admin dashboard.
+
+Each image in the payment proof folder gets a small copy in its `thumbs/`
+subfolder (WebP when Pillow supports it, JPEG otherwise) with the same
+stem. thumbnail_worker.py creates them for new uploads in a process pool
+and backfills old ones; the dashboard's thumbnail route makes a missing
+one on demand. Pillow is optional: without it there are no thumbnails and
+the dashboard links the full image as before.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+THUMB_DIR = 'thumbs'
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+
+def available():
+    return Image is not None
+
+
+def thumb_ext():
+    return '.webp' if features.check('webp') else '.jpg'
+
+
+def thumb_name(filename):
+    return os.path.splitext(filename)[0] + thumb_ext()
+
+
+def thumb_path(folder, filename):
+    return os.path.join(folder, THUMB_DIR, thumb_name(filename))
+
+
+def make_thumbnail(folder, filename, size=240, quality=70):
+    """Write the thumbnail of folder/filename; returns its size in bytes, or None if the image can't be read."""
+    src = os.path.join(folder, filename)
+    dest = thumb_path(folder, filename)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    try:
+        with Image.open(src) as img:
+            img = ImageOps.exif_transpose(img) # phone captures are often rotated by EXIF only
+            img.thumbnail((size, size))
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            img.save(tmp, format='WEBP' if dest.endswith('.webp') else 'JPEG', quality=quality)
+    except (OSError, ValueError) as e:
+        print(f"Thumbnail failed for {filename}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return None
+    os.replace(tmp, dest)
+    return os.path.getsize(dest)
+
+
+def missing(folder):
+    """Images in folder that have no thumbnail yet."""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        name for name in os.listdir(folder)
+        if name.lower().endswith(SOURCE_EXTENSIONS) and not name.startswith('.')
+        and os.path.isfile(os.path.join(folder, name))
+        and not os.path.exists(thumb_path(folder, name))
+    )
+
+
+class ThumbnailPool:
+    """Process pool making thumbnails, so resizing large captures doesn't compete with the GIL."""
+
+    def __init__(self, folder, workers=2, size=240, quality=70):
+        self.folder = folder
+        self.size = size
+        self.quality = quality
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    def run(self, filenames):
+        """Thumbnail the files; returns (made, failed, source_bytes, thumb_bytes)."""
+        made = failed = source_bytes = thumb_bytes = 0
+        futures = {
+            name: self.executor.submit(make_thumbnail, self.folder, name, self.size, self.quality)
+            for name in filenames
+        }
+        for name, future in futures.items():
+            result = future.result()
+            if result is None:
+                failed += 1
+                continue
+            made += 1
+            source_bytes += os.path.getsize(os.path.join(self.folder, name))
+            thumb_bytes += result
+        return made, failed, source_bytes, thumb_bytes
+
+    def shutdown(self):
+        self.executor.shutdown()
@@ -0,0 +1,80 @@
+"""
+Content-addressed storage for uploaded images (payment screenshots).
+
+The upload is copied to disk in chunks while its SHA-256 is computed; the
+first bytes must be a PNG or JPEG signature and the copy stops as soon as
+it passes max_bytes, so a bad or oversized file never reaches the upload
+folder. By then Werkzeug has already received the whole request (spooled
+to memory or a temp file); what a client can send is bounded only by
+MAX_CONTENT_LENGTH (Config.MAX_REQUEST_BYTES). The file is named after its
+hash, so the same screenshot uploaded again (e.g. a retried booking) is
+stored only once.
+"""
+import hashlib
+import os
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of the accepted formats -> stored extension
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+)
+
+
+class UploadRejected(Exception):
+    """The upload is not an accepted image; the message is safe to show to the customer."""
+
+
+def image_type(head):
+    for signature, ext in SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+def store_image(stream, folder, max_bytes, prefix=''):
+    """
+    Copy an image stream into folder as <prefix><sha256>.<ext>. Returns
+    (file name, created); created is False when the same content was already
+    stored, so a caller undoing its work must leave that file alone. Raises
+    UploadRejected for empty, oversized or non-PNG/JPEG data; nothing is left
+    on disk in that case.
+    """
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    ext = None
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.upload_')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if ext is None:
+                    # Signatures are a few bytes long, well inside the first chunk
+                    ext = image_type(chunk)
+                    if ext is None:
+                        raise UploadRejected("Invalid file type. Only PNG/JPEG allowed.")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(f"File too large. Max {max_bytes // (1024 * 1024)}MB allowed.")
+                digest.update(chunk)
+                out.write(chunk)
+        if ext is None:
+            raise UploadRejected("Uploaded file is empty.")
+
+        filename = f"{prefix}{digest.hexdigest()}.{ext}"
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.remove(tmp_path) # same content already stored
+            return filename, False
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        return filename, True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,111 @@
+"""
+Check conditional GETs on the tournament, pricing and slot endpoints: a
+request carrying the current ETag gets a 304 without executing any SQL,
+and a change (a bumped version, a new hold on a slot) gets a full 200.
+The page cache's gzip copy of a page carries a weak ETag, so it is never
+mistaken for the identity body.
+
+"No SQL" is measured on this process's connection pool: a request that
+checks out no connection cannot have run a query. Needs the MySQL
+database; uses its own occupancy/version files so a running server is
+left alone.
+"""
+import datetime
+import os
+import tempfile
+import time
+
+scratch = tempfile.mkdtemp(prefix='dmax_verify_')
+os.environ.update({
+    'OCCUPANCY_FILE': os.path.join(scratch, 'occupancy.bin'),
+    'VERSIONS_FILE': os.path.join(scratch, 'versions.bin'),
+    'LOCK_REAPER_INTERVAL': '0',
+})
+
+import app as web
+
+
+def checkouts():
+    return web.get_db_pool().stats()['checkouts']
+
+
+def get(client, url, **headers):
+    before = checkouts()
+    res = client.get(url, headers=headers)
+    return res, checkouts() - before
+
+
+def report(ok, message):
+    print(("✅ " if ok else "❌ ") + message)
+    return ok
+
+
+def verify_table(client, url, resource):
+    print(f"\n{url}")
+    res, _ = get(client, url)
+    etag = res.headers.get('ETag')
+    if not report(res.status_code == 200 and etag, f"200 with ETag {etag}"):
+        return False
+
+    res, used = get(client, url, **{'If-None-Match': etag})
+    ok = report(res.status_code == 304 and used == 0, f"If-None-Match -> {res.status_code}, {used} DB checkouts")
+
+    # Last-Modified is only sent once its second is over
+    time.sleep(1.1)
+    res, _ = get(client, url)
+    last_modified = res.headers.get('Last-Modified')
+    res, used = get(client, url, **{'If-Modified-Since': last_modified or ''})
+    ok &= report(last_modified and res.status_code == 304 and used == 0,
+                 f"If-Modified-Since {last_modified} -> {res.status_code}, {used} DB checkouts")
+
+    web.resource_versions.bump(resource)
+    res, _ = get(client, url, **{'If-None-Match': etag})
+    ok &= report(res.status_code == 200 and res.headers.get('ETag') != etag, f"after a {resource} change -> {res.status_code}")
+    return ok
+
+
+def verify_encodings(client, url):
+    print(f"\n{url} (gzip)")
+    plain = client.get(url).headers.get('ETag')
+    client.get(url, headers={'Accept-Encoding': 'gzip'}) # first read fills the page cache
+    res = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    etag = res.headers.get('ETag')
+    ok = report(res.headers.get('Content-Encoding') == 'gzip' and etag == f"W/{plain}",
+                f"gzip body has weak ETag {etag} (identity {plain})")
+    res = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    ok &= report(res.status_code == 304 and res.headers.get('ETag') == etag, f"If-None-Match -> {res.status_code} {res.headers.get('ETag')}")
+    return ok
+
+
+def verify_slots(client):
+    date = datetime.date.today() + datetime.timedelta(days=1)
+    url = f"/api/availability?date={date.isoformat()}"
+    print(f"\n{url}")
+    client.get(url) # first read publishes the date to the occupancy map
+    res, _ = get(client, url)
+    etag = res.headers.get('ETag')
+    if not report(res.status_code == 200 and etag, f"200 with ETag {etag}"):
+        return False
+
+    res, used = get(client, url, **{'If-None-Match': etag})
+    ok = report(res.status_code == 304 and used == 0, f"If-None-Match -> {res.status_code}, {used} DB checkouts")
+
+    # Another customer starts paying for the 18:00 slot
+    web.occupancy.set_lock(date, '18:00', datetime.datetime.now() + datetime.timedelta(minutes=5))
+    res, _ = get(client, url, **{'If-None-Match': etag})
+    ok &= report(res.status_code == 200 and res.headers.get('ETag') != etag, f"after a new hold -> {res.status_code}")
+    return ok
+
+
+def verify():
+    client = web.app.test_client()
+    ok = verify_table(client, '/api/tournaments', 'tournaments')
+    ok &= verify_table(client, '/tournaments', 'tournaments')
+    ok &= verify_table(client, '/pricing', 'pricing')
+    ok &= verify_encodings(client, '/pricing')
+    ok &= verify_slots(client)
+    print("\n" + ("✅ Conditional GETs verified." if ok else "❌ Conditional GET check failed."))
+
+
+if __name__ == "__main__":
+    verify()
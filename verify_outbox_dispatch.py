@@ -0,0 +1,78 @@
+"""
+End-to-end check of the notification outbox against a local fake SMTP
+server and a stubbed Twilio sender. Needs the MySQL database (with the
+notification_outbox table), but sends nothing to the outside world.
+"""
+import os
+
+from local_stubs import FakeSMTPServer
+
+smtp = FakeSMTPServer().start()
+os.environ.update({
+    'MAIL_SERVER': '127.0.0.1',
+    'MAIL_PORT': str(smtp.port),
+    'MAIL_USE_TLS': 'false',
+    'MAIL_USERNAME': 'admin@example.com',
+    'MAIL_PASSWORD': 'secret',
+})
+
+import outbox
+from notifications import send_email_core
+from notification_worker import build_dispatcher, connect
+
+
+class StubTwilio:
+    """Fails the first send to each number, then succeeds."""
+
+    def __init__(self):
+        self.sent = []
+        self.failed_once = set()
+
+    def __call__(self, row):
+        if row['recipient'] not in self.failed_once:
+            self.failed_once.add(row['recipient'])
+            raise RuntimeError("stub: Twilio 503")
+        self.sent.append(row)
+        return True
+
+
+def verify():
+    conn = connect()
+    cursor = conn.cursor()
+
+    print("1. Queueing notifications in one transaction...")
+    conn.start_transaction()
+    outbox.enqueue(cursor, 'email', 'player@example.com', 'Your slot is confirmed', 'Booking Confirmed')
+    outbox.enqueue(cursor, 'whatsapp', 'whatsapp:+919999999999', 'Booking confirmed!')
+    first_id = cursor.lastrowid - 1
+    conn.commit()
+
+    twilio = StubTwilio()
+    dispatcher = build_dispatcher({
+        'email': lambda row: send_email_core(row['recipient'], row['subject'], row['body']),
+        'whatsapp': twilio,
+    })
+    dispatcher.backoff_base = 0 # retry immediately for the check
+
+    print("\n2. Dispatching (WhatsApp stub fails once, then succeeds)...")
+    for _ in range(3):
+        dispatcher.run_once()
+
+    cursor.execute("SELECT id, channel, status, attempts, last_error FROM notification_outbox WHERE id >= %s", (first_id,))
+    for row in cursor.fetchall():
+        print(f"   {row}")
+
+    print(f"\n3. Fake SMTP received {len(smtp.messages)} message(s); stub Twilio sent {len(twilio.sent)}.")
+    if smtp.messages and twilio.sent:
+        print("✅ Outbox delivered through both channels.")
+    else:
+        print("❌ Outbox delivery incomplete.")
+
+    cursor.close()
+    conn.close()
+    dispatcher.shutdown()
+    smtp.stop()
+
+
+if __name__ == "__main__":
+    verify()
@@ -33,10 +33,10 @@ def test_flow():
     # 3. Create Booking with File Upload
     print("\n--- 3. Creating Booking ---")
     
-    # Create a dummy image
+    # Create a dummy image (uploads are checked for a PNG/JPEG signature)
     dummy_img_path = "test_payment.jpg"
     with open(dummy_img_path, "wb") as f:
-        f.write(b"dummy image content")
+        f.write(b"\xff\xd8\xff\xe0dummy image content")
         
     img_file = open(dummy_img_path, 'rb')
     files = {'payment_screenshot': (dummy_img_path, img_file, 'image/jpeg')}
@@ -0,0 +1,48 @@
+"""
+Check the slot_schedule template expansion without a database: a template
+running past midnight (18:00-02:00) puts its 00:00 and 01:00 slots on the
+next date, and the default weekend 05:00-00:00 stays on its own date.
+"""
+import datetime
+
+import slot_schedule
+
+MONDAY = datetime.date(2099, 1, 5)
+
+
+def report(ok, message):
+    print(("✅ " if ok else "❌ ") + message)
+    return ok
+
+
+def t(value):
+    return datetime.datetime.strptime(value, '%H:%M').time()
+
+
+def verify():
+    late = {0: [(t('18:00'), t('02:00'), 60)], 1: [(t('18:00'), t('02:00'), 60)]}
+    rows = slot_schedule.build_slot_rows(late, MONDAY, 3)
+    slots = [(d, start) for d, start, end, created_by in rows]
+    tuesday, wednesday = MONDAY + datetime.timedelta(days=1), MONDAY + datetime.timedelta(days=2)
+
+    ok = report((tuesday, '00:00:00') in slots and (tuesday, '01:00:00') in slots,
+                "Monday 18:00-02:00 puts 00:00 and 01:00 on Tuesday")
+    ok &= report(not any(d == MONDAY and start < '18:00:00' for d, start in slots),
+                 "no early-morning slots on Monday itself")
+    ok &= report((wednesday, '00:00:00') in slots and (wednesday, '01:00:00') in slots,
+                 "Tuesday's post-midnight slots land on Wednesday")
+    ok &= report(len(slots) == len(set(slots)), "no (slot_date, start_time) collisions")
+
+    rows = slot_schedule.build_slot_rows(late, tuesday, 1)
+    ok &= report(sorted(start for d, start, end, created_by in rows if start < '18:00:00') == ['00:00:00', '01:00:00'],
+                 "a horizon starting Tuesday still gets Monday's post-midnight slots")
+
+    weekend = slot_schedule.day_slots(t('05:00'), t('00:00'))
+    ok &= report(len(weekend) == 19 and all(day_offset == 0 for day_offset, start, end in weekend)
+                 and weekend[-1][1:] == ('23:00:00', '00:00:00'),
+                 "05:00-00:00 is 19 slots on the same date, the last ending at midnight")
+    return ok
+
+
+if __name__ == "__main__":
+    print("\n" + ("✅ slot schedule checks passed." if verify() else "❌ slot schedule checks failed."))
@@ -0,0 +1,56 @@
+"""
+Check stats.report() against MySQL: a range of more than ~3 months is
+grouped per month ('YYYY-MM'), a shorter one per day, and both add up to
+the same totals. Writes daily_stats rows for dates in 2099 inside a
+transaction that is rolled back, so the real rollup is left alone.
+"""
+import datetime
+
+import mysql.connector
+from config import Config
+import stats
+
+DAYS = [datetime.date(2099, 1, 15), datetime.date(2099, 1, 31), datetime.date(2099, 2, 1),
+        datetime.date(2099, 3, 10), datetime.date(2099, 4, 30)]
+
+
+def report(ok, message):
+    print(("✅ " if ok else "❌ ") + message)
+    return ok
+
+
+def verify():
+    conn = mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DB
+    )
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction()
+        cursor.execute("DELETE FROM daily_stats WHERE stat_date BETWEEN %s AND %s", (DAYS[0], DAYS[-1]))
+        cursor.executemany(
+            "INSERT INTO daily_stats (stat_date, stat_hour, slots_total, slots_booked, bookings) VALUES (%s, 18, 2, 1, 1)",
+            [(d,) for d in DAYS]
+        )
+
+        monthly = stats.report(cursor, DAYS[0], DAYS[-1])
+        periods = [(r['period'], int(r['slots_booked'])) for r in monthly['periods']]
+        ok = report(monthly['monthly'], "105-day range is reported per month")
+        ok &= report(periods == [('2099-01', 2), ('2099-02', 1), ('2099-03', 1), ('2099-04', 1)],
+                     f"monthly periods {periods}")
+        ok &= report(int(monthly['totals']['slots_booked']) == len(DAYS), "monthly totals cover every day")
+
+        daily = stats.report(cursor, DAYS[0], DAYS[1])
+        ok &= report(not daily['monthly'] and [r['period'] for r in daily['periods']] == DAYS[:2],
+                     "short range is reported per day")
+        return ok
+    finally:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    print("\n" + ("✅ stats report checks passed." if verify() else "❌ stats report checks failed."))
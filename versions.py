@@ -0,0 +1,110 @@
+"""
+Shared version counters for cacheable resources.
+
+A tiny memory-mapped file (next to the occupancy map) holds, per resource
+name, a counter and the time it last changed. Write routes bump the
+counter of what they changed; read routes build their ETag and
+Last-Modified from it, so a conditional GET is answered without touching
+the database. All workers on the node map the same file.
+
+The file also stores an epoch picked when it is created, which is part
+of every ETag: counters restart from zero after a reboot and must not
+repeat an ETag a client cached before it.
+
+Data changed outside the app (SQL by hand, one-off scripts) doesn't bump
+anything; do it explicitly afterwards:
+    python versions.py bump pricing
+"""
+import contextlib
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from occupancy import default_path as occupancy_path
+
+try:
+    import fcntl
+except ImportError: # Windows dev server: single process, thread lock is enough
+    fcntl = None
+
+RESOURCES = ('tournaments', 'pricing')
+
+MAGIC = b'DMXVER01'
+HEADER = struct.Struct('<8sQd')           # magic, epoch, created_at
+COUNTER = struct.Struct('<Qd')            # version, modified_at
+HEADER_SIZE = 32
+SLOTS = 16
+
+
+def default_path():
+    return os.path.join(os.path.dirname(occupancy_path()), 'dmax_versions.bin')
+
+
+class ResourceVersions:
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self._thread_lock = threading.Lock()
+
+        size = HEADER_SIZE + SLOTS * COUNTER.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, 'r+b')
+        with self._write_lock():
+            if os.fstat(fd).st_size != size:
+                self._file.truncate(size)
+            self._mm = mmap.mmap(fd, size)
+            if HEADER.unpack_from(self._mm, 0)[0] != MAGIC:
+                now = time.time()
+                self._mm[:] = bytes(size)
+                for i in range(SLOTS):
+                    COUNTER.pack_into(self._mm, HEADER_SIZE + i * COUNTER.size, 0, now)
+                HEADER.pack_into(self._mm, 0, MAGIC, struct.unpack('<Q', os.urandom(8))[0], now)
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        with self._thread_lock:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _offset(self, name):
+        return HEADER_SIZE + RESOURCES.index(name) * COUNTER.size
+
+    @property
+    def epoch(self):
+        return HEADER.unpack_from(self._mm, 0)[1]
+
+    def get(self, name):
+        """(version, modified_at) of a resource."""
+        return COUNTER.unpack_from(self._mm, self._offset(name))
+
+    def bump(self, *names):
+        """Record that the named resources changed."""
+        now = time.time()
+        with self._write_lock():
+            for name in names:
+                offset = self._offset(name)
+                version, _ = COUNTER.unpack_from(self._mm, offset)
+                COUNTER.pack_into(self._mm, offset, version + 1, now)
+
+    def etag(self, name):
+        """(etag, last_modified) for a resource; the ETag is unquoted."""
+        version, modified_at = self.get(name)
+        return f"{name}-{self.epoch:x}-{version}", modified_at
+
+
+if __name__ == "__main__":
+    from config import Config
+    versions = ResourceVersions(Config.VERSIONS_FILE)
+    if len(sys.argv) > 2 and sys.argv[1] == 'bump':
+        versions.bump(*sys.argv[2:])
+    for name in RESOURCES:
+        version, modified_at = versions.get(name)
+        print(f"{name:<12} {version:>6}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(modified_at))}")